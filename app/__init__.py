@@ -1,3 +1,4 @@
+from . import startup
 from . import text_widget_monkey_p
 from . import editor_gui
 from . import editor_app
@@ -0,0 +1,47 @@
+import queue
+import threading
+
+AUTOSAVE_DELAY_MS = 2000  # quiet time after the last edit before tabs are saved
+
+
+class AutosaveWriter(threading.Thread):
+    """Background thread writing tab snapshots to the store.
+
+    Snapshots queued while a write is in progress are merged, so a burst of
+    saves turns into one transaction holding the latest text of each tab.
+    """
+
+    def __init__(self, store):
+        super().__init__(name="autosave", daemon=True)
+        self.store = store
+        self._queue = queue.Queue()
+        self.start()
+
+    def submit(self, snapshots):
+        """Queue ``{tab_id: code}`` to be saved."""
+        if snapshots:
+            self._queue.put(dict(snapshots))
+
+    def run(self):
+        while True:
+            pending = self._queue.get()
+            stop = pending is None
+            pending = pending or {}
+            while not self._queue.empty():
+                more = self._queue.get()
+                if more is None:
+                    stop = True
+                else:
+                    pending.update(more)
+            if pending:
+                try:
+                    self.store.upsert_codes(pending)
+                except Exception as ex:
+                    print("Autosave Error:", repr(ex))
+            if stop:
+                return
+
+    def close(self):
+        """Write everything queued so far and stop the thread."""
+        self._queue.put(None)
+        self.join()
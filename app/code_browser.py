@@ -0,0 +1,282 @@
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import messagebox
+
+from .storage import MATCH_END, MATCH_START, format_timestamp
+
+PAGE_SIZE = 50
+MAX_CACHED_PAGES = 20
+DEFAULT_ROW_HEIGHT = 110
+SEARCH_DELAY_MS = 150
+
+
+class CodePager:
+    """Positional access (newest first) to code summaries, one page at a time.
+
+    Pages next to an already loaded one are fetched with keyset queries;
+    only a jump with the scrollbar falls back to OFFSET.
+    """
+
+    def __init__(self, store, page_size=PAGE_SIZE):
+        self.store = store
+        self.page_size = page_size
+        self.count = 0
+        self._pages = OrderedDict()
+        self.reset()
+
+    def reset(self):
+        self.count = self.store.count_codes()
+        self._pages.clear()
+
+    def _page(self, number):
+        if number in self._pages:
+            self._pages.move_to_end(number)
+            return self._pages[number]
+        previous = self._pages.get(number - 1)
+        following = self._pages.get(number + 1)
+        if previous and len(previous) == self.page_size:
+            rows = self.store.codes_before(previous[-1].id, self.page_size)
+        elif following:
+            rows = self.store.codes_after(following[0].id, self.page_size)
+        elif number == 0:
+            rows = self.store.codes_before(None, self.page_size)
+        else:
+            rows = self.store.codes_at(number * self.page_size, self.page_size)
+        self._pages[number] = rows
+        while len(self._pages) > MAX_CACHED_PAGES:
+            self._pages.popitem(last=False)
+        return rows
+
+    def rows(self, start, stop):
+        result = []
+        for number in range(start // self.page_size, (stop - 1) // self.page_size + 1):
+            page = self._page(number)
+            offset = number * self.page_size
+            result.extend(page[max(start - offset, 0):stop - offset])
+        return result
+
+    def replace(self, summary):
+        for page in self._pages.values():
+            for i, row in enumerate(page):
+                if row.id == summary.id:
+                    page[i] = summary
+                    return
+
+
+class SearchResults:
+    """Ranked full-text matches, with the same interface as CodePager."""
+
+    def __init__(self, store, text):
+        self.store = store
+        self.text = text
+        self._rows = []
+        self.count = 0
+        self.reset()
+
+    def reset(self):
+        self._rows = self.store.search_codes(self.text)
+        self.count = len(self._rows)
+
+    def rows(self, start, stop):
+        return self._rows[start:stop]
+
+    def replace(self, summary):
+        """Show an edited code where it was, with a fresh snippet (or its
+        first lines, if it no longer matches)."""
+        for i, row in enumerate(self._rows):
+            if row.id == summary.id:
+                matches = self.store.search_codes(self.text, code_id=summary.id)
+                self._rows[i] = matches[0] if matches else summary
+                return
+
+
+class CodeRow:
+    """One recycled row of the browser; shows whichever code it is given."""
+
+    def __init__(self, browser, parent):
+        self.browser = browser
+        self.code_id = None
+        self.box = tk.LabelFrame(parent, text="", padx=10, pady=5, font=("Arial", 10, "bold"))
+        self.preview = tk.Text(self.box, font=("Courier", 10), bg="white", relief="sunken", height=3,
+                               wrap="none", state="disabled")
+        self.preview.disable_colorify = True
+        self.preview.tag_configure("match", background="yellow")
+        self.preview.pack(fill='x', padx=5, pady=5)
+        tk.Button(self.box, text="Restore",
+                  command=lambda: browser.restore(self.code_id)).pack(side='left', padx=5)
+        tk.Button(self.box, text="Restore By Char",
+                  command=lambda: browser.restore(self.code_id, animated=True)).pack(side='left', padx=5)
+        tk.Button(self.box, text="Edit", command=lambda: browser.edit(self.code_id)).pack(side='left', padx=5)
+        tk.Button(self.box, text="Delete", command=lambda: browser.delete(self.code_id)).pack(side='left', padx=5)
+        tk.Button(self.box, text="History", command=lambda: browser.history(self.code_id)).pack(side='left', padx=5)
+
+    def show(self, summary):
+        self.code_id = summary.id
+        self.box.config(text=f"Tab ID: {summary.tab_id} | ID: {summary.id} | {format_timestamp(summary.timestamp)}")
+        self.preview.config(state="normal")
+        self.preview.delete("1.0", "end")
+        # Search snippets mark matched terms as MATCH_START ... MATCH_END.
+        for i, part in enumerate(summary.preview.strip().replace(MATCH_END, MATCH_START).split(MATCH_START)):
+            self.preview.insert("end", part, "match" if i % 2 else ())
+        self.preview.config(state="disabled")
+        if not self.box.winfo_ismapped():
+            self.box.pack(fill='x', padx=10, pady=5)
+
+    def hide(self):
+        self.code_id = None
+        self.box.pack_forget()
+
+
+class SavedCodesBrowser:
+    """The "Manage Saved Codes" window.
+
+    Only as many row widgets as fit in the window exist; scrolling re-binds
+    them to other codes. Full code bodies are loaded on Restore/Edit only.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.store = app.store
+        self.pager = CodePager(self.store)
+        self.top = 0
+        self.rows = []
+        self.row_height = None
+
+        self.win = tk.Toplevel(app)
+        self.win.title("Manage Saved Codes")
+        self.win.geometry("700x400")
+
+        search_bar = tk.Frame(self.win)
+        search_bar.pack(fill='x', padx=10, pady=5)
+        tk.Label(search_bar, text="Search:").pack(side='left')
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(search_bar, textvariable=self.search_var)
+        search_entry.pack(side='left', fill='x', expand=True, padx=5)
+        search_entry.bind("<KeyRelease>", lambda e: self.schedule_search())
+        self._search_after_id = None
+
+        frame = tk.Frame(self.win)
+        frame.pack(fill='both', expand=True)
+        self.scrollbar = tk.Scrollbar(frame, orient="vertical", command=self.on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
+        self.body = tk.Frame(frame)
+        self.body.pack(side="left", fill="both", expand=True)
+
+        self.body.bind("<Configure>", lambda e: self.render())
+        self.win.bind("<MouseWheel>", lambda e: self.on_scroll("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.win.bind("<Button-4>", lambda e: self.on_scroll("scroll", -1, "units"))
+        self.win.bind("<Button-5>", lambda e: self.on_scroll("scroll", 1, "units"))
+
+    def schedule_search(self):
+        if self._search_after_id:
+            self.win.after_cancel(self._search_after_id)
+        self._search_after_id = self.win.after(SEARCH_DELAY_MS, self.search)
+
+    def search(self):
+        self._search_after_id = None
+        text = self.search_var.get().strip()
+        if getattr(self.pager, "text", None) == text or (not text and isinstance(self.pager, CodePager)):
+            return
+        self.pager = SearchResults(self.store, text) if text else CodePager(self.store)
+        self.top = 0
+        self.render()
+
+    @property
+    def visible_rows(self):
+        return max(1, self.body.winfo_height() // (self.row_height or DEFAULT_ROW_HEIGHT))
+
+    def render(self):
+        visible = self.visible_rows
+        self.top = max(0, min(self.top, self.pager.count - visible))
+        summaries = self.pager.rows(self.top, self.top + visible) if self.pager.count else []
+        while len(self.rows) < len(summaries):
+            self.rows.append(CodeRow(self, self.body))
+        for row, summary in zip(self.rows, summaries):
+            row.show(summary)
+        for row in self.rows[len(summaries):]:
+            row.hide()
+
+        if self.row_height is None and self.rows:
+            self.body.update_idletasks()
+            self.row_height = self.rows[0].box.winfo_reqheight() + 10
+            if self.visible_rows != visible:
+                self.render()
+                return
+
+        if self.pager.count:
+            self.scrollbar.set(self.top / self.pager.count, (self.top + len(summaries)) / self.pager.count)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.top = int(float(amount) * self.pager.count)
+        else:
+            self.top += int(amount) * (self.visible_rows if unit == "pages" else 1)
+        self.render()
+
+    def restore(self, code_id, animated=False):
+        saved = self.store.get_code(code_id)
+        if saved:
+            self.app.open_new_tab(initial_code=saved.code, animated=animated)
+
+    def edit(self, code_id):
+        saved = self.store.get_code(code_id)
+        if not saved:
+            return
+        editor_win = tk.Toplevel(self.win)
+        editor_win.title(f"Edit Code ID {code_id}")
+        text = tk.Text(editor_win, wrap='word', font=("Courier", 12))
+        text.insert("1.0", saved.code)
+        text.pack(fill='both', expand=True)
+
+        def save_edit():
+            self.store.update_code(code_id, text.snapshot())
+            editor_win.destroy()
+            summary = self.store.code_summary(code_id)
+            if summary:
+                self.pager.replace(summary)
+            self.render()
+
+        tk.Button(editor_win, text="Save", command=save_edit).pack(pady=5)
+
+    def history(self, code_id):
+        summary = self.store.code_summary(code_id)
+        if not summary:
+            return
+        revisions = self.store.list_revisions(summary.tab_id)
+        history_win = tk.Toplevel(self.win)
+        history_win.title(f"History of {summary.tab_id}")
+        listbox = tk.Listbox(history_win, font=("Courier", 10), width=60)
+        for revision in revisions:
+            kind = "snapshot" if revision.is_snapshot else "delta"
+            listbox.insert("end", f"#{revision.id} | {format_timestamp(revision.timestamp)} | "
+                                  f"{kind} | {revision.size} bytes")
+        listbox.pack(fill='both', expand=True)
+
+        def selected_revision():
+            selection = listbox.curselection()
+            return revisions[selection[0]].id if selection else None
+
+        def open_revision():
+            revision_id = selected_revision()
+            if revision_id:
+                self.app.open_new_tab(initial_code=self.store.revision_code(revision_id))
+
+        def restore_revision():
+            revision_id = selected_revision()
+            if revision_id and messagebox.askyesno("Confirm Restore", f"Restore revision {revision_id}?"):
+                self.store.restore_revision(revision_id)
+                history_win.destroy()
+                self.pager.reset()
+                self.render()
+
+        listbox.bind("<Double-Button-1>", lambda e: open_revision())
+        tk.Button(history_win, text="Open", command=open_revision).pack(side='left', padx=5, pady=5)
+        tk.Button(history_win, text="Restore", command=restore_revision).pack(side='left', padx=5, pady=5)
+
+    def delete(self, code_id):
+        if messagebox.askyesno("Confirm Delete", f"Delete code ID {code_id}?"):
+            self.store.delete_code(code_id)
+            self.pager.reset()
+            self.render()
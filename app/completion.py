@@ -0,0 +1,126 @@
+import importlib
+import os
+import threading
+
+COMPLETION_POLL_MS = 15
+
+# Service states
+LOADING = "loading"  # Jedi is being imported on the completion thread
+READY = "ready"
+MISSING = "missing"  # Jedi is not installed
+
+_service = None
+
+
+def load_jedi():
+    """Import Jedi, or return None if it is not installed. It takes longer to import than the whole editor."""
+    importlib.invalidate_caches()  # see a Jedi pip-installed while the editor runs
+    try:
+        import jedi
+        return jedi
+    except ImportError:
+        print("Jedi is not installed")
+        return None
+
+
+class CompletionService(threading.Thread):
+    """Runs Jedi completions on one background thread.
+
+    Jedi is imported and its project created on that thread too, so the Tk
+    thread never waits for them; requests made while ``state`` is LOADING
+    are answered once it is READY, and with no names if Jedi is MISSING.
+    The Jedi project stays alive between requests and every editor keeps a
+    fixed script path, so Jedi/parso reuse their parsed modules and only
+    re-parse what changed. Only the newest request matters: a new submit()
+    replaces any request still waiting, and results of superseded requests
+    are dropped.
+    """
+
+    def __init__(self, loader=load_jedi):
+        super().__init__(name="completion", daemon=True)
+        self.loader = loader
+        self.state = LOADING
+        self.jedi = None
+        self.project = None
+        self.generation = 0
+        self._pending = None
+        self._result = None
+        self._reload = False
+        self._cond = threading.Condition()
+        self.start()
+
+    def submit(self, code, path, line, column):
+        """Queue a request; returns its generation for take_result()."""
+        with self._cond:
+            self.generation += 1
+            self._pending = (self.generation, code, path, line, column)
+            self._result = None
+            self._cond.notify()
+            return self.generation
+
+    def cancel(self):
+        with self._cond:
+            self.generation += 1
+            self._pending = None
+            self._result = None
+
+    def reload(self):
+        """Import Jedi again, e.g. after installing it."""
+        with self._cond:
+            self.state = LOADING
+            self._reload = True
+            self._cond.notify()
+
+    def take_result(self, generation):
+        """Completion names for ``generation``, or None if not ready (yet)."""
+        with self._cond:
+            if self._result and self._result[0] == generation:
+                names = self._result[1]
+                self._result = None
+                return names
+        return None
+
+    def _load(self):
+        jedi = self.loader()
+        project = None
+        if jedi is not None:
+            try:
+                project = jedi.Project(os.getcwd())
+            except Exception as e:
+                print("Autocomplete error:", e)
+                jedi = None
+        with self._cond:
+            self.jedi, self.project = jedi, project
+            self.state = READY if jedi is not None else MISSING
+
+    def run(self):
+        self._load()
+        while True:
+            with self._cond:
+                while self._pending is None and not self._reload:
+                    self._cond.wait()
+                reload, self._reload = self._reload, False
+                if not reload:
+                    request, self._pending = self._pending, None
+            if reload:
+                self._load()  # a waiting request is answered after
+                continue
+            generation, code, path, line, column = request
+            names = []
+            if self.jedi is not None:
+                try:
+                    script = self.jedi.Script(code=code, path=path, project=self.project)
+                    names = [c.name for c in script.complete(line, column) if not c.name.startswith("__")]
+                except Exception as e:
+                    print("Autocomplete error:", e)
+            with self._cond:
+                if generation == self.generation:
+                    self._result = (generation, names)
+
+
+def get_completion_service():
+    """The editor's completion service, started (and Jedi loading) on first use."""
+    global _service
+    if _service is None:
+        _service = CompletionService()
+    return _service
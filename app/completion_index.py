@@ -0,0 +1,56 @@
+import bisect
+import heapq
+
+
+class CompletionIndex:
+    """Words kept sorted case-insensitively, answering prefix queries with bisect.
+
+    Words are reference counted, so an identifier harvested from several
+    lines stays in the index until the last of them is gone.
+    """
+
+    def __init__(self, words=()):
+        self._counts = {}
+        self._keys = []  # sorted (word.lower(), word)
+        for word in words:
+            self.add(word)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, word):
+        count = self._counts.get(word, 0)
+        self._counts[word] = count + 1
+        if not count:
+            bisect.insort(self._keys, (word.lower(), word))
+
+    def discard(self, word):
+        count = self._counts.get(word)
+        if not count:
+            return
+        if count > 1:
+            self._counts[word] = count - 1
+            return
+        del self._counts[word]
+        del self._keys[bisect.bisect_left(self._keys, (word.lower(), word))]
+
+    def complete(self, prefix):
+        """Words starting with ``prefix``, already in case-insensitive order."""
+        lower = prefix.lower()
+        result = []
+        for i in range(bisect.bisect_left(self._keys, (lower,)), len(self._keys)):
+            key, word = self._keys[i]
+            if not key.startswith(lower):
+                break
+            if word.startswith(prefix) and word != prefix and not word.startswith("__"):
+                result.append(word)
+        return result
+
+
+def merge_completions(*sorted_lists):
+    """Merge already sorted completion lists, dropping duplicates."""
+    merged = []
+    for word in heapq.merge(*sorted_lists, key=lambda w: (w.lower(), w)):
+        if not merged or merged[-1] != word:
+            merged.append(word)
+    return merged
@@ -0,0 +1,123 @@
+import bisect
+import re
+
+# The Tk text indices Document.resolve() understands: a numeric or "end"
+# base, then any number of "+/-N chars", "linestart" and "lineend".
+INDEX_BASE = re.compile(r"(\d+)\.(\d+|end)|end")
+INDEX_MODIFIER = re.compile(r"\s*(?:([+-])\s*(\d+)\s*(?:chars|char|cha|ch|c)\b|(linestart|lineend)\b)")
+
+
+class Document:
+    """Python-side copy of the content of a Text widget.
+
+    ``lines`` holds the lines without their line breaks (and without the
+    newline Tk always keeps at the end). Positions are ``(line, col)`` with
+    1-based lines, as in Tk indices. ``version`` goes up with every edit, so
+    a consumer can tell whether what it computed is still current.
+
+    The offset of each line's start is kept in ``_starts`` for a prefix of
+    the lines only: an edit drops the entries after the edited line, and
+    they are rebuilt on the next offset lookup, which then bisects.
+    """
+
+    def __init__(self, text=""):
+        self.version = 0
+        self.reset(text)
+
+    def reset(self, text):
+        self.lines = text.split("\n")
+        self.version += 1
+        self._starts = [0]
+        self._snapshot = text
+
+    @property
+    def line_count(self):
+        return len(self.lines)
+
+    @property
+    def end(self):
+        """Tk's ``end``: the start of the line after the final newline."""
+        return len(self.lines) + 1, 0
+
+    def replace(self, start, end, chars):
+        """Replace the text between positions ``start`` and ``end`` by ``chars``."""
+        (first, start_col), (last, end_col) = start, end
+        lines = self.lines
+        new = (lines[first - 1][:start_col] + chars + lines[last - 1][end_col:]).split("\n")
+        lines[first - 1:last] = new
+        del self._starts[first:]
+        self._snapshot = None
+        self.version += 1
+
+    def snapshot(self):
+        """The whole text, joined once per version."""
+        if self._snapshot is None:
+            self._snapshot = "\n".join(self.lines)
+        return self._snapshot
+
+    def get_lines(self, start, stop):
+        """Lines ``start`` to ``stop`` (1-based, inclusive)."""
+        return self.lines[start - 1:stop]
+
+    def _extend_starts(self, upto=None):
+        starts, lines = self._starts, self.lines
+        upto = len(lines) if upto is None else min(upto, len(lines))
+        offset = starts[-1]
+        for i in range(len(starts) - 1, upto - 1):
+            offset += len(lines[i]) + 1
+            starts.append(offset)
+
+    def offset(self, line, col):
+        """Offset in ``snapshot()`` of position ``(line, col)``."""
+        if line > len(self.lines):
+            return self.offset(len(self.lines), len(self.lines[-1])) + 1
+        self._extend_starts(line)
+        return self._starts[line - 1] + col
+
+    def position(self, offset):
+        """``(line, col)`` of an offset in ``snapshot()``."""
+        starts, lines = self._starts, self.lines
+        while starts[-1] <= offset and len(starts) < len(lines):
+            starts.append(starts[-1] + len(lines[len(starts) - 1]) + 1)
+        line = bisect.bisect_right(starts, offset)
+        return line, offset - starts[line - 1]
+
+    def resolve(self, index):
+        """``(line, col)`` of a Tk text index, clamped the way Tk clamps it.
+
+        Returns None for what only Tk knows about (marks, tags, ``@x,y``,
+        other modifiers), for the caller to ask the widget instead.
+        """
+        match = INDEX_BASE.match(index)
+        if not match:
+            return None
+        line, col = match.groups()
+        if line is None:
+            position = self.end
+        elif int(line) < 1:
+            position = 1, 0
+        elif int(line) > len(self.lines):
+            position = self.end
+        else:
+            length = len(self.lines[int(line) - 1])
+            position = int(line), length if col == "end" else min(int(col), length)
+        pos = match.end()
+        while pos < len(index):
+            match = INDEX_MODIFIER.match(index, pos)
+            if not match:
+                return None
+            sign, count, word = match.groups()
+            if word:
+                if position[0] <= len(self.lines):
+                    position = position[0], 0 if word == "linestart" else len(self.lines[position[0] - 1])
+            else:
+                position = self._move(position, int(count) if sign == "+" else -int(count))
+            pos = match.end()
+        return position
+
+    def _move(self, position, count):
+        target = self.offset(*position) + count
+        if target <= 0:
+            return 1, 0
+        line, col = self.position(target)
+        return (line, col) if col <= len(self.lines[line - 1]) else self.end
@@ -3,27 +3,62 @@ import subprocess
 import tempfile
 import threading
 import tkinter as tk
-import sqlite3
-import traceback
 from tkinter import messagebox
-from datetime import datetime
 import sys
-import ast
 from . import editor_gui
-from .name_checker import NameChecker
+from .linter import LINT_DELAY_MS, LINT_POLL_MS, get_lint_service, lint_code
+from .output_buffer import OutputRingBuffer
+from .kernel import KernelPool
+from .script_runner import read_report
+from .code_browser import SavedCodesBrowser
+from .autosave import AUTOSAVE_DELAY_MS
+from .run_manager import RunManager, QUEUED, STOPPED, wait_with_usage, format_bytes
+from .profile_view import RUN_MODES, ProfileWindow, MemoryWindow
+from .heatmap import apply_heatmap, clear_heatmap
+from .limits import RunLimits, DEFAULT_LIMITS, popen_options, exit_reason
+from .startup import report_ready
+from .storage import normalize_code
 import re
 
-MAX_OUTPUT_CHARS = 2000
+OUTPUT_BUFFER_BYTES = 1024 * 1024  # tail of the child's output kept in memory
+OUTPUT_MAX_LINES = 5000  # lines kept in the output widget
+READ_CHUNK_BYTES = 64 * 1024
+RUNNER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "script_runner.py")
+CHILD_ENV = {**os.environ, "PYTHONIOENCODING": "utf-8", "PYTHONUNBUFFERED": "1"}
 MODIFIER_MASK = 0x1 | 0x4 | 0x8
+LIMIT_LABELS = {
+    "wall_seconds": "Wall-clock timeout (s)",
+    "memory_mb": "Memory limit (MB)",
+    "cpu_seconds": "CPU time limit (s)",
+    "output_mb": "Output limit (MB)",
+}
 
 
 class App(editor_gui.GUI):
     def __init__(self):
         super(App, self).__init__()
-        self.process = None
-        self.thread = None
-        self.open_new_tab(initial_code=self.get_last_code())
-        self.should_stop = threading.Event()
+        self.runs = RunManager(self.max_parallel_runs.get())
+        self.output_buffer_bytes = OUTPUT_BUFFER_BYTES
+        self.output_max_lines = OUTPUT_MAX_LINES
+        self.kernel_pools = {}
+        self.startup_seconds = None
+        self.open_new_tab()
+        self.restore_last_code(self.get_active_tab())
+
+    def restore_last_code(self, tab):
+        """Fill ``tab`` with the last saved code, read off the Tk thread so the window shows first."""
+        def fill(code):
+            if code and tab.winfo_exists() and not tab.dirty:
+                tab.text.insert("1.0", code)
+                # Restoring the code is not an edit (and not something to undo).
+                tab.text.edit_reset()
+                tab.text.edit_modified(False)
+                tab.dirty = False
+                self.schedule_lint(tab)
+            report_ready(self)
+
+        threading.Thread(target=lambda: self.ui.call(fill, self.get_last_code()),
+                         name="restore", daemon=True).start()
 
     def get_active_tab(self):
         return self.tab_control.nametowidget(self.tab_control.select())
@@ -37,121 +72,92 @@ class App(editor_gui.GUI):
     def get_active_tab_id(self):
         return self.get_active_tab().tab_id
 
+    def get_kernel_pool(self, tab_id):
+        """The tab's pool of warm workers, started if needed; Tk thread only."""
+        if tab_id not in self.kernel_pools:
+            self.kernel_pools[tab_id] = KernelPool(env=CHILD_ENV)
+        return self.kernel_pools[tab_id]
+
+    def close_kernels(self, tab_id=None):
+        for key in ([tab_id] if tab_id else list(self.kernel_pools)):
+            pool = self.kernel_pools.pop(key, None)
+            if pool:
+                pool.close()
+
+    def toggle_warm_kernel(self):
+        if self.warm_kernel.get():
+            # Start the active tab's workers now so the first run is already warm.
+            self.get_kernel_pool(self.get_active_tab_id())
+        else:
+            self.close_kernels()
+
     def on_close(self):
-        self.save_current_code()
-        self.destroy()
+        self.shutdown()
 
     def quit_app(self):
+        self.shutdown()
+
+    def shutdown(self):
+        """Save every tab, stop all runs (with their process trees) and close the app."""
         try:
-            self.save_current_code()
+            self.autosave()
+            self.autosave_writer.close()
         except Exception as ex:
             print("Quit App Error:", repr(ex))
-            pass
         finally:
+            # Runs start in their own session, so nothing else would stop them.
+            self.runs.stop_all()
+            self.ui.close()
+            self.close_kernels()
+            self.store.close()
             self.destroy()
 
     def close_editor(self):
         tab_id = self.tab_control.select()
         if tab_id:
+            if self.get_active_tab().dirty:
+                self.autosave()
+            self.runs.forget(self.get_active_tab_id())
+            self.close_kernels(self.get_active_tab_id())
+            get_lint_service().forget(self.get_active_tab_id())
             self.tab_control.forget(tab_id)
 
     def save_current_code(self):
-        code = self.get_active_text().get("1.0", tk.END).strip()
-        tab_id = self.get_active_tab_id()
+        tab = self.get_active_tab()
+        code = normalize_code(tab.text.snapshot())
         if code:
-            self.upsert_code(tab_id, code)
+            self.upsert_code(tab.tab_id, code)
+        tab.dirty = False
 
-    def manage_codes(self):
-        win = tk.Toplevel(self)
-        win.title("Manage Saved Codes")
-        win.geometry("700x400")
-
-        frame = tk.Frame(win)
-        frame.pack(fill='both', expand=True)
-
-        canvas = tk.Canvas(frame)
-        scrollbar = tk.Scrollbar(frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = tk.Frame(canvas)
+    def on_text_modified(self, tab):
+        # Tk only fires <<Modified>> when the flag flips, so clear it again
+        # (which fires once more, with the flag off) to hear about the next edit.
+        if not tab.text.edit_modified():
+            return
+        tab.text.edit_modified(False)
+        tab.dirty = True
+        if self._autosave_after_id:
+            self.after_cancel(self._autosave_after_id)
+        self._autosave_after_id = self.after(AUTOSAVE_DELAY_MS, self.autosave)
+        self.schedule_lint(tab)
+
+    def autosave(self):
+        """Hand the text of every dirty tab to the background writer."""
+        if self._autosave_after_id:
+            self.after_cancel(self._autosave_after_id)
+            self._autosave_after_id = None
+        snapshots = {}
+        for name in self.tab_control.tabs():
+            tab = self.tab_control.nametowidget(name)
+            if getattr(tab, "dirty", False):
+                tab.dirty = False
+                code = normalize_code(tab.text.snapshot())
+                if code:
+                    snapshots[tab.tab_id] = code
+        self.autosave_writer.submit(snapshots)
 
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(
-                scrollregion=canvas.bbox("all")
-            )
-        )
-
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
-        conn = sqlite3.connect(self.DB_PATH)
-        c = conn.cursor()
-        c.execute("SELECT id, tab_id, timestamp, code FROM codes ORDER BY id DESC")
-        rows = c.fetchall()
-        conn.close()
-
-        for row in rows:
-            code_id, tab_id, timestamp, code = row
-            first_lines = "\n".join(code.splitlines()[:3])
-
-            box = tk.LabelFrame(scrollable_frame, text=f"Tab ID: {tab_id} | ID: {code_id} | {timestamp}", padx=10,
-                                pady=5, font=("Arial", 10, "bold"))
-            box.pack(fill='x', padx=10, pady=5)
-
-            preview = tk.Label(box, text=first_lines.strip(), justify='left', anchor='w', font=("Courier", 10),
-                               bg="white", relief="sunken")
-            preview.pack(fill='x', padx=5, pady=5)
-
-            btn_restore = tk.Button(box, text="Restore",
-                                    command=lambda init_code=code: self.open_new_tab(initial_code=init_code))
-            btn_restore.pack(side='left', padx=5)
-            btn_restore_by_char = tk.Button(box, text="Restore By Char",
-                                            command=lambda init_code=code: self.open_new_tab(
-                                                initial_code=init_code, animated=True))
-
-            btn_restore_by_char.pack(side='left', padx=5)
-
-            def make_editor(e_code_id=code_id, e_code=code):
-                def edit_code():
-                    editor_win = tk.Toplevel(win)
-                    editor_win.title(f"Edit Code ID {e_code_id}")
-                    text = tk.Text(editor_win, wrap='word', font=("Courier", 12))
-                    text.insert("1.0", e_code)
-                    text.pack(fill='both', expand=True)
-
-                    def save_edit():
-                        new_code = text.get("1.0", "end-1c")
-                        extra_conn = sqlite3.connect(self.DB_PATH)
-                        cur = extra_conn.cursor()
-                        cur.execute("UPDATE codes SET code = ?, timestamp = ? WHERE id = ?",
-                                    (new_code, datetime.now().isoformat(), e_code_id))
-                        extra_conn.commit()
-                        extra_conn.close()
-                        editor_win.destroy()
-                        win.destroy()
-                        self.manage_codes()
-
-                    tk.Button(editor_win, text="Save", command=save_edit).pack(pady=5)
-
-                return edit_code
-
-            btn_edit = tk.Button(box, text="Edit", command=make_editor())
-            btn_edit.pack(side='left', padx=5)
-
-            def delete_code(del_code_id=code_id):
-                if messagebox.askyesno("Confirm Delete", f"Delete code ID {del_code_id}?"):
-                    extra_conn = sqlite3.connect(self.DB_PATH)
-                    cur = extra_conn.cursor()
-                    cur.execute("DELETE FROM codes WHERE id = ?", (del_code_id,))
-                    extra_conn.commit()
-                    extra_conn.close()
-                    win.destroy()
-                    self.manage_codes()
-
-            btn_delete = tk.Button(box, text="Delete", command=delete_code)
-            btn_delete.pack(side='left', padx=5)
+    def manage_codes(self):
+        return SavedCodesBrowser(self)
 
     ###################################
     def increase_font(self):
@@ -164,11 +170,15 @@ class App(editor_gui.GUI):
             self.get_active_text().config(font=("Courier", self.font_size, "bold"))
 
     def run_code(self):
-        self.run_button.config(state="disabled")
-        self.save_current_code()
+        tab = self.get_active_tab()
+        run = self.runs.get(tab.tab_id)
+        if run and run.active:
+            return
+        tab.dirty = True
+        self.autosave()
         text = self.get_active_text()
         output = self.get_active_output()
-        code = text.get("1.0", "end")
+        code = text.snapshot()
         if '\t' in code:
             code = code.replace('\t', '    ')
             text.delete("1.0", "end")  # Clear the widget
@@ -184,96 +194,199 @@ class App(editor_gui.GUI):
                 "##################################\n"
             )
             text.insert("1.0", input_override)
-            code = text.get("1.0", "end")
+            code = text.snapshot()
 
         # Clear output and error marks
         output.delete("1.0", "end")
         text.tag_remove("exec_error", "1.0", "end")
         text.tag_configure("exec_error", underline=True, foreground="red")
+        clear_heatmap(text)
+        tab.gutter.hide()
 
         # Write code to a temporary file
         with tempfile.NamedTemporaryFile(delete=False, suffix=".py", mode="w", encoding="utf-8") as tmp:
             tmp.write(code)
             script_path = tmp.name
 
-        def mark_error_line():
-            try:
-                compiled = compile(code, script_path, "exec")
-                exec(compiled, {})
-            except Exception as e:
-                tb = traceback.extract_tb(e.__traceback__)
-                for entry in reversed(tb):
-                    if entry.filename == script_path:
-                        lineno = entry.lineno
-                        start = f"{lineno}.0"
-                        end = f"{lineno}.end"
-                        text.tag_add("exec_error", start, end)
-                        break
-
-                if isinstance(e, ModuleNotFoundError):
-                    module_name = e.name
-                    confirm = messagebox.askokcancel("Missing Module",
-                                                     f"Module '{module_name}' is missing.\nInstall it?")
-                    if confirm:
-                        try:
-                            subprocess.run([sys.executable, "-m", "pip", "install", module_name], check=True)
-                            messagebox.showinfo("Installed",
-                                                f"Module '{module_name}' installed.\nPlease re-run your code.")
-                        except subprocess.CalledProcessError as install_error:
-                            messagebox.showerror("Install Failed",
-                                                 f"Could not install '{module_name}':\n{install_error}")
-                    else:
-                        output.insert("end", f"Missing module: {module_name}\n")
+        report_path = os.path.splitext(script_path)[0] + ".error.json"
+        mode = RUN_MODES.get(self.run_mode.get())
+        result_path = os.path.splitext(script_path)[0] + ".result.json"
+
+        def mark_error_line(error):
+            lineno = error.get("lineno")
+            if lineno:
+                start = f"{lineno}.0"
+                end = f"{lineno}.end"
+                text.tag_add("exec_error", start, end)
+
+            if error.get("type") == "ModuleNotFoundError" and error.get("module"):
+                module_name = error["module"]
+                confirm = messagebox.askokcancel("Missing Module",
+                                                 f"Module '{module_name}' is missing.\nInstall it?")
+                if confirm:
+                    self.install_module(module_name)
                 else:
-                    output.insert("end", f"Execution error: {str(e)}\n")
-
-        def execute():
+                    output.insert("end", f"Missing module: {module_name}\n")
+            else:
+                output.insert("end", f"Execution error: {error.get('message')}\n")
+
+        buffer = OutputRingBuffer(self.output_buffer_bytes)
+
+        def finish(run):
+            # Posted through self.ui once the run is over, after the last of its output.
+            if buffer.dropped:
+                output.insert("end", f"\n... (output truncated, {buffer.dropped} of {buffer.total} bytes dropped)\n")
+            if run.reason:
+                output.insert("end", f"\n[!] Run ended: {run.reason}\n")
+            if run.started is not None:
+                self.report_run(run, code, output)
+            if run.result:
+                self.show_run_result(tab, mode, run.result)
+            output.see("end")
+            self.update_run_button()
+
+        fresh_namespace = not self.keep_namespace.get()
+        tab_id = tab.tab_id
+        # Pools are made and closed on the Tk thread only; the run keeps the one
+        # it started with even if warm kernels are turned off meanwhile.
+        pool = self.get_kernel_pool(tab_id) if self.warm_kernel.get() else None
+        limits = self.current_limits()
+
+        def execute(run):
+            # The run's worker starts inside runs.submit(), before run_code
+            # gets the run back, so use the one handed to the worker.
+            def on_output(data):
+                buffer.append(data)
+                if limits.output_mb and buffer.total > limits.output_bytes:
+                    self.runs.kill(run, f"output limit of {limits.output_mb} MB exceeded")
+
+            returncode = None
             try:
-                self.process = subprocess.Popen(
-                    [sys.executable, script_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    # encoding='utf-8'
-                )
-                stdout, stderr = self.process.communicate()
-
-                output_text = stdout + stderr
-                trimmed = output_text[:MAX_OUTPUT_CHARS]
-                if len(output_text) > MAX_OUTPUT_CHARS:
-                    trimmed += "\n... (output truncated)"
-
-                try:
-                    trimmed = trimmed.encode('cp1256').decode()
-                except Exception as ex:
-                    print(repr(ex))
-                    print("Failed to encode, skipping ...")
-
-                output.insert("end", trimmed)
-
-                output.see("end")
-                output.update_idletasks()
-
-                if self.process.returncode != 0:
-                    mark_error_line()
+                if pool is not None:
+                    # Memory/CPU limits would stick to the long-lived worker; the
+                    # timeout and output limits still apply.
+                    kernel = pool.acquire()
+                    try:
+                        self.runs.attach(run, kernel.process)
+                        returncode = kernel.run(code, script_path, on_output, fresh=fresh_namespace,
+                                                report_path=report_path, mode=mode, result_path=result_path)
+                        # The worker's peak RSS covers its whole life, not only this run.
+                        run.cpu_seconds, run.peak_rss_kb = kernel.last_cpu_seconds, kernel.peak_rss_kb
+                    finally:
+                        pool.release(kernel)  # closes it instead if it died (or the pool did)
+                else:
+                    process = subprocess.Popen(
+                        [sys.executable, RUNNER_PATH, script_path, report_path] + ([mode, result_path] if mode else []),
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        **popen_options(limits, CHILD_ENV),
+                    )
+                    self.runs.attach(run, process)
+                    while data := process.stdout.read1(READ_CHUNK_BYTES):
+                        on_output(data)
+                    returncode, run.cpu_seconds, run.peak_rss_kb = wait_with_usage(process)
+                buffer.close(returncode)
+
+                error = read_report(report_path) if returncode != 0 else None
+                if mode:
+                    run.result = read_report(result_path)
+                if run.state != STOPPED:
+                    run.reason = exit_reason(returncode, error, limits)
+                    if error:
+                        self.ui.call(mark_error_line, error)
 
             except Exception as e:
-                output.insert("end", f"Execution error: {str(e)}\n")
+                buffer.close()
+                self.ui.append(output, f"Execution error: {str(e)}\n")
             finally:
-                if os.path.exists(script_path):
-                    os.remove(script_path)
-                self.process = None
-                self.run_button.config(state="normal")
-
-        self.thread = threading.Thread(target=execute)
-        self.thread.start()
+                for path in (script_path, report_path, result_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+            return returncode
+
+        self.ui.stream(buffer, output, self.output_max_lines)
+        run = self.runs.submit(tab_id, execute, buffer, timeout=limits.wall_seconds,
+                               on_finished=lambda run: self.ui.call(finish, run))
+        if run.state == QUEUED:
+            output.insert("end", "[queued: waiting for a free run slot]\n")
+        self.update_run_button()
 
     def stop_code(self):
-        if self.process and self.process.poll() is None:
-            self.process.terminate()
-            self.get_active_output().insert("end", "\n[!] Code execution forcibly stopped.\n")
-            self.process = None
-        self.run_button.config(state='normal')
+        tab = self.get_active_tab()
+        if self.runs.stop(tab.tab_id):
+            tab.output.insert("end", "\n[!] Code execution forcibly stopped.\n")
+        self.update_run_button()
+
+    def install_module(self, module_name):
+        """pip-install ``module_name`` off the Tk thread, then say how it went."""
+        def install():
+            try:
+                subprocess.run([sys.executable, "-m", "pip", "install", module_name], check=True)
+                self.ui.call(messagebox.showinfo, "Installed",
+                             f"Module '{module_name}' installed.\nPlease re-run your code.")
+            except (subprocess.CalledProcessError, OSError) as install_error:
+                self.ui.call(messagebox.showerror, "Install Failed",
+                             f"Could not install '{module_name}':\n{install_error}")
+
+        threading.Thread(target=install, name="pip-install", daemon=True).start()
+
+    def show_run_result(self, tab, mode, result):
+        """Display what the instrument of a profiling run mode collected."""
+        if mode in ("profile", "sample"):
+            ProfileWindow(self, tab.text, result, title="Profile (sampling)" if mode == "sample" else "Profile")
+        elif mode == "lines":
+            apply_heatmap(tab.text, result["lines"])
+            tab.gutter.show(result["lines"])
+        elif mode == "memory":
+            MemoryWindow(self, tab.text, result)
+            apply_heatmap(tab.text, result["lines"])
+            tab.gutter.show(result["lines"], format_cost=format_bytes)
+            tab.output.insert("end", f"[peak traced memory {format_bytes(result['peak'])}]\n")
+
+    def report_run(self, run, code, output):
+        """Show the run's one-line summary and keep it in the runs table."""
+        try:
+            previous = self.store.last_run(run.tab_id)
+            output.insert("end", "\n" + run.summary(previous) + "\n")
+            self.store.add_run(run.tab_id, code, run.elapsed, run.cpu_seconds, run.peak_rss_kb,
+                               run.output.total, run.exit_code, run.reason)
+        except Exception as ex:
+            print("Run Report Error:", repr(ex))
+
+    def update_run_button(self):
+        """Show the run state of the active tab on the shared Run button."""
+        # Also called while a new tab is being set up, before it has a tab_id.
+        tab = self.get_active_tab() if self.tab_control.select() else None
+        run = self.runs.get(getattr(tab, "tab_id", None))
+        if run and run.active:
+            self.run_button.config(state="disabled", text="Queued..." if run.state == QUEUED else "Running...")
+        else:
+            self.run_button.config(state="normal", text="Run Code")
+
+    def current_limits(self):
+        values = {}
+        for name, var in self.limit_vars.items():
+            try:
+                values[name] = max(0, int(var.get()))
+            except (tk.TclError, ValueError):
+                values[name] = getattr(DEFAULT_LIMITS, name)
+        return RunLimits(**values)
+
+    def edit_limits(self):
+        """Small window for the limits applied to the next runs (0 = unlimited)."""
+        window = tk.Toplevel(self)
+        window.title("Run Limits")
+        for row, (name, label) in enumerate(LIMIT_LABELS.items()):
+            tk.Label(window, text=label).grid(row=row, column=0, sticky='w', padx=5, pady=2)
+            tk.Spinbox(window, from_=0, to=10 ** 6, width=8,
+                       textvariable=self.limit_vars[name]).grid(row=row, column=1, padx=5, pady=2)
+        tk.Button(window, text="Close", command=window.destroy).grid(row=len(LIMIT_LABELS), column=1, pady=5)
+
+    def set_max_parallel_runs(self):
+        try:
+            self.runs.set_max_parallel(int(self.max_parallel_runs.get()))
+        except (tk.TclError, ValueError):
+            pass
 
     @staticmethod
     def restart_app():
@@ -285,36 +398,66 @@ class App(editor_gui.GUI):
         if not text:
             return
 
-        text.tag_delete("syntax_error")
-        text.tag_configure("syntax_error", underline=True, foreground="red")
-
-        code = text.get("1.0", "end-1c")
+        code = text.snapshot()
         if '\t' in code:
             code = code.replace('\t', '    ')
             text.delete("1.0", "end")  # Clear the widget
             text.insert("1.0", code)
 
-        try:
-            tree = ast.parse(code)
-        except SyntaxError as e:
-            lineno, offset = e.lineno, e.offset
-            start = f"{lineno}.{max(offset - 1, 0)}"
-            end = f"{lineno}.{offset}"
-            text.tag_add("syntax_error", start, end)
-            messagebox.showerror("Syntax Error", f"{e.msg} on line {lineno}")
-            return
-
-        checker = NameChecker()
-        checker.visit(tree)
-        for name, lineno, col in checker.errors:
-            start = f"{lineno}.{col}"
-            end = f"{lineno}.{col + len(name)}"
-            text.tag_add("syntax_error", start, end)
-
-        if checker.errors:
-            msg_lines = [f"Possibly undefined name '{n}' at line {l}" for n, l, _ in checker.errors]
-            messagebox.showwarning("Name Errors", "\n".join(msg_lines))
+        diagnostics, _ = lint_code(code)
+        self.apply_diagnostics(text, diagnostics)
+        if diagnostics and diagnostics[0].syntax:
+            messagebox.showerror("Syntax Error", diagnostics[0].message)
+        elif diagnostics:
+            messagebox.showwarning("Name Errors", "\n".join(d.message for d in diagnostics))
         else:
-            text.tag_remove("syntax_error", "1.0", "end")
             text.tag_remove("exec_error", "1.0", "end")
             messagebox.showinfo("Check Complete", "No syntax or name errors detected.")
+
+    def schedule_lint(self, tab):
+        """Check ``tab`` in the background once typing pauses for LINT_DELAY_MS."""
+        if tab.lint_after_id:
+            self.after_cancel(tab.lint_after_id)
+            tab.lint_after_id = None
+        if self.live_check.get():
+            tab.lint_after_id = self.after(LINT_DELAY_MS, lambda: self.lint_tab(tab))
+
+    def lint_tab(self, tab):
+        tab.lint_after_id = None
+        if not tab.winfo_exists():
+            return
+        service = get_lint_service()
+        document = tab.text.get_document()
+        version = document.version
+        generation = service.submit(tab.tab_id, document.snapshot())
+
+        def poll():
+            diagnostics = service.take_result(tab.tab_id, generation)
+            if diagnostics is None:
+                if service.is_current(tab.tab_id, generation):
+                    self.after(LINT_POLL_MS, poll)
+            # Results for text that was edited meanwhile would land on the
+            # wrong characters; the lint scheduled by that edit replaces them.
+            elif (tab.winfo_exists() and tab.text.get_document().version == version
+                  and self.live_check.get()):
+                self.apply_diagnostics(tab.text, diagnostics)
+
+        self.after(LINT_POLL_MS, poll)
+
+    def toggle_live_check(self):
+        for name in self.tab_control.tabs():
+            tab = self.tab_control.nametowidget(name)
+            self.schedule_lint(tab)  # with live checking off this only cancels the pending check
+            if not self.live_check.get():
+                tab.text.tag_remove("syntax_error", "1.0", "end")
+
+    @staticmethod
+    def apply_diagnostics(text, diagnostics):
+        """Make the syntax_error tag cover ``diagnostics``, only touching ranges that changed."""
+        ranges = text.tag_ranges("syntax_error")
+        current = {(str(ranges[i]), str(ranges[i + 1])) for i in range(0, len(ranges), 2)}
+        wanted = {(f"{d.lineno}.{d.col}", f"{d.lineno}.{d.end_col}") for d in diagnostics}
+        for start, end in current - wanted:
+            text.tag_remove("syntax_error", start, end)
+        for start, end in wanted - current:
+            text.tag_add("syntax_error", start, end)
@@ -1,10 +1,17 @@
 from tkinter import ttk
 from tkinter import Tk
 import tkinter as tk
-import sqlite3
-from datetime import datetime
 import time
 import os
+from .storage import CodeStore
+from .autosave import AutosaveWriter
+from .ui_dispatch import UiDispatcher
+from .run_manager import MAX_PARALLEL_RUNS
+from .limits import DEFAULT_LIMITS
+from .profile_view import RUN_MODES
+from .heatmap import HeatmapGutter
+
+STORE_FLUSH_MS = 1000
 
 
 class GUI(Tk):
@@ -14,7 +21,12 @@ class GUI(Tk):
         self.font_size = 12
         self.DB_PATH = os.path.abspath(
             os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "app.db"))
-        self.init_db()
+        self.store = CodeStore(self.DB_PATH)
+        self.autosave_writer = AutosaveWriter(self.store)
+        self._autosave_after_id = None
+        self._next_tab_number = None
+        self.ui = UiDispatcher(self)
+        self.after(STORE_FLUSH_MS, self.flush_store)
         self.title("Code Editor")
         self.state('zoomed')
 
@@ -32,8 +44,24 @@ class GUI(Tk):
         tk.Button(ctrl_bar, text="-", command=lambda: self.decrease_font(), width=2).pack(side='left')
         self.run_button = tk.Button(ctrl_bar, text="Run Code", command=lambda: self.run_code())
         self.run_button.pack(side='left', padx=10)
+        self.run_mode = tk.StringVar(value="Run")
+        tk.OptionMenu(ctrl_bar, self.run_mode, *RUN_MODES).pack(side='left')
+        self.warm_kernel = tk.BooleanVar(value=False)
+        self.keep_namespace = tk.BooleanVar(value=False)
+        tk.Checkbutton(ctrl_bar, text="Warm Kernel", variable=self.warm_kernel,
+                       command=lambda: self.toggle_warm_kernel()).pack(side='left')
+        tk.Checkbutton(ctrl_bar, text="Keep Namespace", variable=self.keep_namespace).pack(side='left')
+        tk.Label(ctrl_bar, text="Parallel:").pack(side='left')
+        self.max_parallel_runs = tk.IntVar(value=MAX_PARALLEL_RUNS)
+        tk.Spinbox(ctrl_bar, from_=1, to=16, width=3, textvariable=self.max_parallel_runs,
+                   command=lambda: self.set_max_parallel_runs()).pack(side='left')
+        self.limit_vars = {name: tk.IntVar(value=value) for name, value in DEFAULT_LIMITS._asdict().items()}
+        tk.Button(ctrl_bar, text="Limits", command=lambda: self.edit_limits()).pack(side='left', padx=5)
         tk.Button(ctrl_bar, text="Stop Code", command=lambda: self.stop_code()).pack(side='left', padx=10)
         tk.Button(ctrl_bar, text="Check Errors", command=lambda: self.check_errors()).pack(side='left', padx=10)
+        self.live_check = tk.BooleanVar(value=True)
+        tk.Checkbutton(ctrl_bar, text="Live Check", variable=self.live_check,
+                       command=lambda: self.toggle_live_check()).pack(side='left')
         tk.Button(ctrl_bar, text="Save Code", command=lambda: self.save_current_code()).pack(side='left', padx=10)
         tk.Button(ctrl_bar, text="Close Editor", command=lambda: self.close_editor()).pack(side='left', padx=10)
         tk.Button(ctrl_bar, text="Open Editor", command=lambda: self.open_new_tab()).pack(side='left', padx=10)
@@ -42,56 +70,36 @@ class GUI(Tk):
 
         self.tab_control = ttk.Notebook(self)
         self.tab_control.pack(expand=1, fill='both')
+        self.tab_control.bind("<<NotebookTabChanged>>", lambda e: self.update_run_button())
 
         self.after(100, lambda: self.get_active_text().focus_set())
         self.protocol("WM_DELETE_WINDOW", lambda: self.on_close())
 
     def get_last_code(self):
-        conn = sqlite3.connect(self.DB_PATH)
-        c = conn.cursor()
-        c.execute("SELECT code FROM codes ORDER BY id DESC LIMIT 1")
-        row = c.fetchone()
-        conn.close()
-        return row[0] if row else ""
+        return self.store.last_code()
 
     def upsert_code(self, tab_id, code):
-        conn = sqlite3.connect(self.DB_PATH)
-        c = conn.cursor()
-        c.execute("SELECT id FROM codes WHERE tab_id = ? ORDER BY id DESC LIMIT 1", (tab_id,))
-        existing = c.fetchone()
-        if existing:
-            c.execute("UPDATE codes SET timestamp = ?, code = ? WHERE id = ?",
-                      (datetime.now().isoformat(), code, existing[0]))
-        else:
-            c.execute("INSERT INTO codes (tab_id, timestamp, code) VALUES (?, ?, ?)",
-                      (tab_id, datetime.now().isoformat(), code))
-        conn.commit()
-        conn.close()
-
-    def init_db(self):
-        conn = sqlite3.connect(self.DB_PATH)
-        c = conn.cursor()
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS codes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tab_id TEXT,
-                timestamp TEXT,
-                code TEXT
-            )
-        """)
-        conn.commit()
-        conn.close()
+        self.store.upsert_code(tab_id, code)
+
+    def flush_store(self):
+        self.store.flush(wait=False)  # never stall the Tk thread behind the autosave writer
+        self.after(STORE_FLUSH_MS, self.flush_store)
+
+    def reserve_tab_number(self):
+        """A tab number used by no other tab of this session and no saved code.
+
+        Runs, kernels, lint results and autosaves are all keyed by the tab id,
+        so two open tabs must never share one, saved or not.
+        """
+        if self._next_tab_number is None:
+            self._next_tab_number = self.store.next_tab_number()
+        number = self._next_tab_number
+        self._next_tab_number += 1
+        return number
 
     def open_new_tab(self, initial_code="", tab_id=None, animated=False):
         if not tab_id:
-            # Get last code ID from database
-            conn = sqlite3.connect(self.DB_PATH)
-            cur = conn.cursor()
-            cur.execute("SELECT MAX(id) FROM codes")
-            row = cur.fetchone()
-            conn.close()
-            last_id = row[0] if row and row[0] is not None else 0
-            next_id = last_id + 1
+            next_id = self.reserve_tab_number()
             tab_id = f"tab_{next_id}"
         else:
             next_id = tab_id.split("_")[-1]
@@ -130,6 +138,13 @@ class GUI(Tk):
             text.bind("<Escape>", lambda e, txt=text: self.cancel_restore(txt))
         else:
             text.insert("1.0", initial_code)
+        # Restoring the code is not an edit; only later changes mark the tab dirty.
+        text.edit_modified(False)
+        tab.dirty = False
+        tab.lint_after_id = None
+        text.tag_configure("syntax_error", underline=True, foreground="red")
+        text.bind("<<Modified>>", lambda e, t=tab: self.on_text_modified(t), add="+")
+        tab.gutter = HeatmapGutter(editor_frame, text, y_scroll_edit)  # packed by a Heatmap run
         ###############################################################
         output_frame = tk.Frame(tab, height=120)
         output_frame.pack(fill='x', side='bottom')
@@ -158,6 +173,7 @@ class GUI(Tk):
         tab.output = output
         tab.tab_id = tab_id
         self.tab_control.select(tab)
+        self.schedule_lint(tab)
 
     @staticmethod
     def restore_next_char(text_widget):
@@ -195,6 +211,9 @@ class GUI(Tk):
     def save_current_code(self):
         ...
 
+    def on_text_modified(self, tab):
+        ...
+
     def close_editor(self):
         ...
 
@@ -237,8 +256,26 @@ class GUI(Tk):
     def check_errors(self):
         ...
 
+    def schedule_lint(self, tab):
+        ...
+
+    def toggle_live_check(self):
+        ...
+
     def stop_code(self):
         ...
 
+    def toggle_warm_kernel(self):
+        ...
+
+    def update_run_button(self):
+        ...
+
+    def set_max_parallel_runs(self):
+        ...
+
+    def edit_limits(self):
+        ...
+
     def ctrl_plus(self, e):
         ...
@@ -0,0 +1,96 @@
+import tkinter as tk
+
+HEAT_COLORS = ("#FFF8DC", "#FFE4A0", "#FFC266", "#FF944D", "#FF5C5C")  # coolest to hottest
+HEAT_TAGS = tuple(f"heat_{level}" for level in range(len(HEAT_COLORS)))
+GUTTER_WIDTH = 130
+
+
+def heat_levels(lines):
+    """``{line: level}`` for ``[[line, hits, cost], ...]``, graded by share of the costliest line.
+
+    The cost is seconds for a Heatmap run and bytes for a Memory run.
+    """
+    hottest = max((cost for _, _, cost in lines), default=0.0)
+    if hottest <= 0:
+        return {line: 0 for line, _, _ in lines}
+    top = len(HEAT_COLORS) - 1
+    return {line: min(top, int(len(HEAT_COLORS) * cost / hottest)) for line, _, cost in lines}
+
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    return f"{seconds * 1000:.1f}ms"
+
+
+def clear_heatmap(text):
+    for tag in HEAT_TAGS:
+        text.tag_remove(tag, "1.0", "end")
+
+
+def apply_heatmap(text, lines):
+    """Paint line backgrounds of ``text`` by the cost of each line."""
+    clear_heatmap(text)
+    for tag, color in zip(HEAT_TAGS, HEAT_COLORS):
+        text.tag_configure(tag, background=color)
+        text.tag_lower(tag)  # under "sel" and the error underlines
+    by_level = {}
+    for line, level in heat_levels(lines).items():
+        by_level.setdefault(level, []).extend((f"{line}.0", f"{line + 1}.0"))
+    for level, ranges in by_level.items():
+        text.tag_add(HEAT_TAGS[level], *ranges)
+
+
+class HeatmapGutter(tk.Canvas):
+    """Column left of the editor showing hits and cost next to every line of the last heatmap run."""
+
+    def __init__(self, master, text, scrollbar):
+        super().__init__(master, width=GUTTER_WIDTH, bg="#F4F4F4", highlightthickness=0)
+        self.text = text
+        self.scrollbar = scrollbar
+        self.lines = {}  # line -> (hits, cost)
+        self.levels = {}
+        self.format_cost = format_seconds
+        text.bind("<Configure>", lambda e: self.redraw(), add="+")
+
+    def show(self, lines, format_cost=format_seconds):
+        self.lines = {line: (hits, cost) for line, hits, cost in lines}
+        self.format_cost = format_cost
+        self.levels = heat_levels(lines)
+        if not self.winfo_manager():
+            self.pack(side="left", fill="y", before=self.text)
+            self.text.configure(yscrollcommand=self.on_scroll)
+        self.redraw()
+
+    def hide(self):
+        if self.winfo_manager():
+            self.pack_forget()
+            self.text.configure(yscrollcommand=self.scrollbar.set)
+        self.lines = {}
+        self.delete("all")
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.redraw()
+
+    def redraw(self):
+        self.delete("all")
+        if not self.lines:
+            return
+        index = self.text.index("@0,0")
+        while True:
+            info = self.text.dlineinfo(index)
+            if info is None:
+                break
+            line = int(index.split(".")[0])
+            stats = self.lines.get(line)
+            if stats:
+                y = info[1]
+                self.create_rectangle(0, y, GUTTER_WIDTH, y + info[3], width=0,
+                                      fill=HEAT_COLORS[self.levels[line]])
+                self.create_text(GUTTER_WIDTH - 4, y, anchor="ne", font=("Courier", 9),
+                                 text=f"{stats[0]}x {self.format_cost(stats[1])}")
+            next_index = self.text.index(f"{line + 1}.0")
+            if next_index == index or int(next_index.split(".")[0]) == line:
+                break
+            index = next_index
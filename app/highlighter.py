@@ -0,0 +1,179 @@
+import re
+
+# Lexer state carried from one line to the next: either plain code or the
+# delimiter of the triple-quoted string the line ends inside of.
+NORMAL = ""
+
+HIGHLIGHT_TAGS = ("comment", "keyword", "string", "builtin")
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<comment>\#.*)
+  | (?P<triple>'''|\"\"\")
+  | (?P<string>'(?:\\.|[^\\'])*'?|"(?:\\.|[^\\"])*"?)
+  | (?P<name>[^\W\d]\w*)
+""", re.VERBOSE)
+
+TRIPLE_END = {
+    "'''": re.compile(r"(?:\\.|[^\\])*?'''"),
+    '"""': re.compile(r'(?:\\.|[^\\])*?"""'),
+}
+
+
+def lex_line(line, state, keywords, builtins, names=None):
+    """Return ([(tag, start_col, end_col), ...], state at the end of the line).
+
+    Other identifiers found on the line are added to ``names`` if given.
+    """
+    tokens = []
+    pos = 0
+    if state:
+        match = TRIPLE_END[state].match(line)
+        if not match:
+            if line:
+                tokens.append(("string", 0, len(line)))
+            return tokens, state
+        pos = match.end()
+        tokens.append(("string", 0, pos))
+        state = NORMAL
+
+    while True:
+        match = TOKEN_PATTERN.search(line, pos)
+        if not match:
+            break
+        kind = match.lastgroup
+        start, pos = match.span()
+        if kind == "name":
+            word = match.group()
+            if word in keywords:
+                tokens.append(("keyword", start, pos))
+            elif word in builtins:
+                tokens.append(("builtin", start, pos))
+            elif names is not None:
+                names.add(word)
+        elif kind == "triple":
+            delimiter = match.group()
+            end = TRIPLE_END[delimiter].match(line, pos)
+            if not end:
+                tokens.append(("string", start, len(line)))
+                return tokens, delimiter
+            pos = end.end()
+            tokens.append(("string", start, pos))
+        else:
+            tokens.append((kind, start, pos))
+    return tokens, state
+
+
+class LineHighlighter:
+    """Per-line lexer cache.
+
+    ``ends[i]`` is the lexer state at the end of line ``i`` (0-based) and
+    ``tokens[i]`` its tokens; both only cover a prefix of the document.
+    Lines below ``valid`` are known to be correct. Edits reset ``valid`` to
+    the first touched line, and ``update`` re-lexes from there until the
+    end-of-line state matches what was cached before the edit.
+
+    When an ``index`` (CompletionIndex) is given, the identifiers of every
+    lexed line are kept in it, one reference per line.
+    """
+
+    def __init__(self, keywords, builtins, index=None):
+        self.keywords = keywords
+        self.builtins = builtins
+        self.index = index
+        self.ends = []
+        self.tokens = []
+        self.names = []  # identifiers of each line, as registered in index
+        self.tagged = []  # whether the widget's tags match tokens[i]
+        self.valid = 0
+        self.edit_end = 0  # lines below this may have been edited since last update
+
+    def reset(self):
+        for names in self.names:
+            self._set_names(names, ())
+        self.ends = []
+        self.tokens = []
+        self.names = []
+        self.tagged = []
+        self.valid = 0
+        self.edit_end = 0
+
+    def _set_names(self, old, new):
+        if self.index is not None and old != new:
+            for word in old:
+                if word not in new:
+                    self.index.discard(word)
+            for word in new:
+                if word not in old:
+                    self.index.add(word)
+
+    def replace_lines(self, first, removed, added):
+        """Record an edit starting on line ``first`` that removed ``removed``
+        and inserted ``added`` line breaks."""
+        if first >= len(self.ends):
+            return
+        # Joined lines keep the end state of the last one, split lines the
+        # end state of the original line (on the last piece).
+        for names in self.names[first:first + removed]:
+            self._set_names(names, ())
+        for cache, fill in ((self.ends, None), (self.tokens, None), (self.names, frozenset()),
+                            (self.tagged, False)):
+            del cache[first:first + removed]
+            cache[first:first] = [fill] * added
+        if first + added < len(self.tokens):
+            self.tokens[first + added] = None
+            self.tagged[first + added] = False
+
+        if self.edit_end > first + removed:
+            self.edit_end += added - removed
+        else:
+            self.edit_end = min(self.edit_end, first)
+        self.edit_end = max(self.edit_end, first + added + 1)
+        self.valid = min(self.valid, first)
+
+    def update(self, fetch_lines, upto):
+        """Make lines ``[0, upto)`` valid.
+
+        ``fetch_lines(start, stop)`` must return the text of lines
+        ``[start, stop)``. Returns the indices of lines whose tokens changed.
+        """
+        changed = []
+        i = self.valid
+        while i < upto:
+            i = self._lex_from(i, fetch_lines(i, upto), changed)
+        self.valid = i
+        if i < len(self.ends):
+            # Stopped before the state converged: line i still has to be
+            # re-lexed from its new start state.
+            self.edit_end = max(self.edit_end, i + 1)
+        else:
+            self.edit_end = 0
+        return changed
+
+    def _lex_from(self, i, lines, changed):
+        state = self.ends[i - 1] if i else NORMAL
+        for line in lines:
+            names = set() if self.index is not None else None
+            tokens, state = lex_line(line, state, self.keywords, self.builtins, names)
+            names = frozenset(names or ())
+            if i < len(self.ends):
+                self._set_names(self.names[i], names)
+                self.names[i] = names
+                if tokens != self.tokens[i]:
+                    self.tokens[i] = tokens
+                    self.tagged[i] = False
+                    changed.append(i)
+                old_state = self.ends[i]
+                self.ends[i] = state
+                i += 1
+                if i >= self.edit_end and old_state == state:
+                    # Everything below was lexed from this very state already.
+                    return len(self.ends)
+            else:
+                self._set_names(frozenset(), names)
+                self.ends.append(state)
+                self.tokens.append(tokens)
+                self.names.append(names)
+                self.tagged.append(False)
+                changed.append(i)
+                i += 1
+        return i
@@ -0,0 +1,263 @@
+# Instrumentation for the "Run" modes other than a plain run. Used inside the
+# child by script_runner.run(): the instrument is started right before the
+# user's code and stopped right after it, and its result() is written as JSON
+# to the run's result file for the editor to display.
+import os
+import sys
+import threading
+import time
+
+PROFILE_TOP = 300  # functions kept in a profile result
+SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+MEMORY_FRAMES = 25  # frames kept per allocation, enough to find the script line behind library code
+MEMORY_SNAPSHOT_INTERVAL = 1.0  # seconds between periodic snapshots (0 = only at exit)
+MEMORY_TOP = 100  # allocation sites kept in a memory result
+
+_OWN_FILES = {os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+              for name in ("instruments.py", "script_runner.py", "kernel_worker.py")}
+
+
+def _function_rows(stats, script):
+    """``{(file, line, name): (calls, self seconds, cumulative seconds)}`` as sorted result rows."""
+    rows = [{"file": file, "line": line, "function": name, "calls": calls,
+             "self": round(own, 6), "cumulative": round(cumulative, 6)}
+            for (file, line, name), (calls, own, cumulative) in stats.items()
+            if os.path.abspath(file) not in _OWN_FILES]
+    rows.sort(key=lambda row: row["cumulative"], reverse=True)
+    return {"script": script, "functions": rows[:PROFILE_TOP]}
+
+
+class Profile:
+    """Deterministic profile of every function call, with cProfile."""
+
+    def __init__(self, script):
+        import cProfile
+        self.script = script
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+
+    def result(self):
+        import pstats
+        stats = pstats.Stats(self.profiler).stats
+        return _function_rows({key: (calls, own, cumulative)
+                               for key, (_, calls, own, cumulative, _) in stats.items()}, self.script)
+
+
+class Sampler:
+    """Low-overhead statistical profile: a thread samples the running stack every SAMPLE_INTERVAL."""
+
+    def __init__(self, script, interval=SAMPLE_INTERVAL):
+        self.script = script
+        self.interval = interval
+        self.samples = {}  # (file, line, name) -> [samples on top of the stack, samples anywhere in it]
+        self.count = 0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._sample, name="sampler", daemon=True)
+        self.elapsed = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.elapsed
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            self.count += 1
+            seen = set()
+            top = True
+            while frame is not None:
+                code = frame.f_code
+                key = (code.co_filename, code.co_firstlineno, code.co_name)
+                counts = self.samples.get(key)
+                if counts is None:
+                    counts = self.samples[key] = [0, 0]
+                if top:
+                    counts[0] += 1
+                    top = False
+                if key not in seen:
+                    counts[1] += 1
+                    seen.add(key)
+                frame = frame.f_back
+
+    def result(self):
+        # The sampler gets the GIL less often than it asks for, so spread the
+        # measured wall time over the samples actually taken.
+        each = self.elapsed / self.count if self.count else 0.0
+        return _function_rows({key: (None, own * each, cumulative * each)
+                               for key, (own, cumulative) in self.samples.items()}, self.script)
+
+
+class LineHeat:
+    """Hit count and time of every line of the script.
+
+    Time runs from one line event of the script to the next, so a line is
+    charged for everything it calls outside the script. Uses sys.monitoring
+    (3.12+), where events in other files are disabled after their first hit,
+    and sys.settrace elsewhere.
+    """
+
+    def __init__(self, script):
+        self.script = script
+        self.lines = {}  # line -> [hits, seconds]
+        self._last = None
+        self._since = 0.0
+        self._tool = None
+
+    def start(self):
+        monitoring = getattr(sys, "monitoring", None)
+        if monitoring:
+            self._tool = next((tool for tool in range(6) if monitoring.get_tool(tool) is None), None)
+        if self._tool is not None:
+            monitoring.use_tool_id(self._tool, "editor heatmap")
+            monitoring.register_callback(self._tool, monitoring.events.LINE, self._on_line)
+            monitoring.set_events(self._tool, monitoring.events.LINE)
+        else:
+            sys.settrace(self._trace)
+        self._since = time.perf_counter()
+
+    def stop(self):
+        if self._tool is not None:
+            monitoring = sys.monitoring
+            monitoring.set_events(self._tool, 0)
+            monitoring.register_callback(self._tool, monitoring.events.LINE, None)
+            monitoring.free_tool_id(self._tool)
+            monitoring.restart_events()  # re-enable what was disabled, for the next run in a warm kernel
+        else:
+            sys.settrace(None)
+        self._hit(None)
+
+    def _hit(self, line):
+        now = time.perf_counter()
+        if self._last is not None:
+            self.lines[self._last][1] += now - self._since
+        if line is not None:
+            entry = self.lines.get(line)
+            if entry is None:
+                entry = self.lines[line] = [0, 0.0]
+            entry[0] += 1
+        self._last = line
+        self._since = now
+
+    def _on_line(self, code, line):
+        if code.co_filename != self.script:
+            return sys.monitoring.DISABLE
+        self._hit(line)
+
+    def _trace(self, frame, event, arg):
+        return self._trace_lines if frame.f_code.co_filename == self.script else None
+
+    def _trace_lines(self, frame, event, arg):
+        if event == "line":
+            self._hit(frame.f_lineno)
+        return self._trace_lines
+
+    def result(self):
+        return {"script": self.script,
+                "lines": [[line, hits, round(seconds, 6)] for line, (hits, seconds) in sorted(self.lines.items())]}
+
+
+class MemoryTrace:
+    """Peak traced memory and the top allocation sites, with tracemalloc.
+
+    Snapshots are taken at exit and every MEMORY_SNAPSHOT_INTERVAL while the
+    script runs; the one holding the most memory is reported, so data freed
+    before the end still shows up. Besides the sites themselves, every
+    allocation is charged to the innermost line of the script on its stack.
+    """
+
+    def __init__(self, script, interval=MEMORY_SNAPSHOT_INTERVAL):
+        self.script = script
+        self.interval = interval
+        self.snapshot = None
+        self.snapshot_size = 0
+        self.snapshot_at = "at exit"
+        self.peak = 0
+        self._overhead = 0
+        self._started = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        import tracemalloc
+        self._started = time.perf_counter()
+        tracemalloc.start(MEMORY_FRAMES)
+        if self.interval:
+            self._thread = threading.Thread(target=self._take_periodically, name="memory", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        import tracemalloc
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.peak = tracemalloc.get_traced_memory()[1]
+        self._take("at exit")
+        tracemalloc.stop()  # before result() walks the traces, which would otherwise be traced too
+
+    def _take_periodically(self):
+        while not self._stop.wait(self.interval):
+            self._take(f"at {time.perf_counter() - self._started:.1f} s")
+
+    def _take(self, when):
+        import tracemalloc
+        # A snapshot's own objects are traced as well; leave them out of the comparison.
+        if self.snapshot is not None and tracemalloc.get_traced_memory()[0] - self._overhead <= self.snapshot_size:
+            return
+        self.snapshot = None
+        size = tracemalloc.get_traced_memory()[0]
+        self.snapshot = tracemalloc.take_snapshot()
+        self._overhead = tracemalloc.get_traced_memory()[0] - size
+        self.snapshot_size = size
+        self.snapshot_at = when
+
+    def result(self):
+        import tracemalloc
+        ignored = {tracemalloc.__file__, __file__}
+        sites = {}
+        script_lines = {}
+        for trace in self.snapshot.traces:
+            frames = trace.traceback
+            top = frames[-1] if len(frames) else None  # newest frame last
+            if top is None or top.filename in ignored:
+                continue
+            for key, target in (((top.filename, top.lineno), sites),
+                                (next(((f.filename, f.lineno) for f in reversed(frames)
+                                       if f.filename == self.script), None), script_lines)):
+                if key is None:
+                    continue
+                entry = target.get(key)
+                if entry is None:
+                    entry = target[key] = [0, 0]
+                entry[0] += trace.size
+                entry[1] += 1
+        rows = [{"file": file, "line": line, "size": size, "count": count}
+                for (file, line), (size, count) in sites.items()]
+        rows.sort(key=lambda row: row["size"], reverse=True)
+        return {
+            "script": self.script,
+            "peak": self.peak,
+            "snapshot": self.snapshot_at,
+            "snapshot_size": self.snapshot_size,
+            "sites": rows[:MEMORY_TOP],
+            "lines": [[line, count, size] for (_, line), (size, count) in sorted(script_lines.items())],
+        }
+
+
+MODES = {
+    "profile": Profile,
+    "sample": Sampler,
+    "lines": LineHeat,
+    "memory": MemoryTrace,
+}
@@ -0,0 +1,165 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from .limits import kill_process_tree, process_group_options
+
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kernel_worker.py")
+MARKER_ENV = "EDITOR_KERNEL_MARKER"  # hands the end-of-run marker to the worker, out of the script's sight
+READ_CHUNK_BYTES = 64 * 1024
+
+KERNEL_POOL_SIZE = 1  # idle workers kept warm per tab
+KERNEL_MAX_RUNS = 50  # recycle a worker after this many runs
+KERNEL_MAX_RSS_MB = 1024  # ... or once its peak RSS goes above this
+KERNEL_PRELOAD = ()  # modules imported by every worker at start-up, e.g. ("pandas",)
+
+
+class Kernel:
+    """One pre-started interpreter running kernel_worker.py."""
+
+    def __init__(self, preload=(), env=None):
+        self.marker = f"__kernel_done_{os.urandom(16).hex()}__".encode()
+        self.runs = 0
+        self.peak_rss_kb = 0
+        self.last_cpu_seconds = None  # CPU time of the latest run
+        self.process = subprocess.Popen(
+            [sys.executable, WORKER_PATH, *preload],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env={**(os.environ if env is None else env), MARKER_ENV: self.marker.decode()},
+            **process_group_options(),
+        )
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def run(self, code, filename, on_output, fresh=True, report_path=None, mode=None, result_path=None):
+        """Run ``code`` and feed its output to ``on_output`` as bytes chunks.
+
+        Returns the script's exit status, or the worker's return code if it
+        died (e.g. it was terminated by Stop Code). A failing run writes its
+        error record to ``report_path``; with a ``mode`` the instrument's
+        result goes to ``result_path``.
+        """
+        self.last_cpu_seconds = None
+        request = json.dumps({"code": code, "filename": filename, "fresh": fresh, "report": report_path,
+                              "mode": mode, "result": result_path})
+        try:
+            self.process.stdin.write(request.encode() + b"\n")
+            self.process.stdin.flush()
+        except OSError:
+            return self.process.wait()
+        try:
+            return self._read_until_marker(on_output)
+        except Exception:
+            self.kill()  # no telling where the worker's output stands; it cannot be reused
+            raise
+
+    def _read_until_marker(self, on_output):
+        keep = len(self.marker) - 1
+        pending = b""
+        while True:
+            data = self.process.stdout.read1(READ_CHUNK_BYTES)
+            if not data:
+                if pending:
+                    on_output(pending)
+                return self.process.wait()
+            pending += data
+            idx = pending.find(self.marker)
+            if idx != -1:
+                end = pending.find(b"\n", idx)
+                if end == -1:
+                    continue
+                if idx:
+                    on_output(pending[:idx])
+                try:
+                    status, rss, cpu_ms = map(int, pending[idx + len(self.marker):end].split())
+                except ValueError:
+                    print("Kernel Error: malformed end-of-run line", repr(pending[idx:end]))
+                    self.kill()
+                    return self.process.wait()
+                self.runs += 1
+                self.peak_rss_kb = rss
+                self.last_cpu_seconds = cpu_ms / 1000
+                return status
+            if len(pending) > keep:
+                on_output(pending[:-keep])
+                pending = pending[-keep:]
+
+    def kill(self):
+        """Kill the worker and whatever the script started."""
+        if self.alive:
+            kill_process_tree(self.process)
+        self.process.wait()
+
+    def close(self):
+        if self.alive:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+            try:
+                self.process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class KernelPool:
+    """Warm workers for one tab.
+
+    Workers are handed out most-recently-used first, so a tab that keeps its
+    namespace between runs keeps getting the same worker until it is
+    recycled. Once the pool is closed, workers still out on a run are shut
+    down when they come back and none are started in their place.
+    """
+
+    def __init__(self, size=KERNEL_POOL_SIZE, max_runs=KERNEL_MAX_RUNS, max_rss_mb=KERNEL_MAX_RSS_MB,
+                 preload=KERNEL_PRELOAD, env=None):
+        self.size = size
+        self.max_runs = max_runs
+        self.max_rss_kb = max_rss_mb * 1024
+        self.preload = preload
+        self.env = env
+        self.closed = False
+        self._idle = []
+        self._lock = threading.Lock()
+        self._refill()
+
+    def _refill(self):
+        with self._lock:
+            if self.closed:
+                return
+            self._idle = [k for k in self._idle if k.alive]
+            while len(self._idle) < self.size:
+                self._idle.insert(0, Kernel(self.preload, self.env))
+
+    def acquire(self):
+        with self._lock:
+            while self._idle:
+                kernel = self._idle.pop()
+                if kernel.alive:
+                    return kernel
+        return Kernel(self.preload, self.env)
+
+    def release(self, kernel):
+        surplus = [kernel]
+        with self._lock:
+            if (not self.closed and kernel.alive and kernel.runs < self.max_runs
+                    and kernel.peak_rss_kb < self.max_rss_kb):
+                self._idle.append(kernel)
+                surplus = self._idle[:-self.size]
+                del self._idle[:-self.size]
+        for extra in surplus:
+            extra.close()
+        self._refill()
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            idle, self._idle = self._idle, []
+        for kernel in idle:
+            kernel.close()
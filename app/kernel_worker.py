@@ -0,0 +1,66 @@
+# Long-lived interpreter used by app.kernel. Started as
+#   python kernel_worker.py [module-to-preload ...]
+# with the end-of-run marker in the kernel.MARKER_ENV environment variable,
+# it reads one JSON request per line from stdin, runs the code, lets its
+# output go straight to stdout/stderr and then writes
+#   <marker> <exit status> <peak rss in KB> <cpu time of the run in ms>\n
+# so the parent knows the run is over. Errors are reported to the request's
+# "report" file by script_runner.run().
+import builtins
+import importlib.util
+import io
+import json
+import os
+import sys
+import time
+
+MARKER_ENV = "EDITOR_KERNEL_MARKER"  # kernel.MARKER_ENV
+
+
+def load_script_runner():
+    """script_runner.py, loaded by path so that a user's own script_runner.py is not shadowed."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "script_runner.py")
+    spec = importlib.util.spec_from_file_location("_editor_script_runner", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def main():
+    marker = os.environ.pop(MARKER_ENV).encode()
+    run = load_script_runner().run
+    for name in sys.argv[1:]:
+        try:
+            __import__(name)
+        except Exception:
+            pass
+
+    requests = sys.stdin
+    sys.stdin = io.StringIO()
+    namespace = None
+    for line in requests:
+        request = json.loads(line)
+        filename = request["filename"]
+        sys.argv = [filename]
+        if request["fresh"] or namespace is None:
+            namespace = {"__name__": "__main__", "__file__": filename, "__builtins__": builtins}
+        cpu = time.process_time()
+        status = run(request["code"], filename, namespace, request.get("report"),
+                     request.get("mode"), request.get("result"))
+        cpu_ms = (time.process_time() - cpu) * 1000
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.write(1, b"%s %d %d %d\n" % (marker, status, peak_rss_kb(), cpu_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import signal
+import subprocess
+from typing import NamedTuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class RunLimits(NamedTuple):
+    """Per-run limits; 0 means unlimited."""
+    wall_seconds: int = 0
+    memory_mb: int = 0
+    cpu_seconds: int = 0
+    output_mb: int = 0
+
+    @property
+    def output_bytes(self):
+        return self.output_mb * 1024 * 1024
+
+
+# No default memory limit: RLIMIT_AS caps address space, not RAM, and
+# numpy/BLAS and other libraries reserve far more of it than they ever use.
+DEFAULT_LIMITS = RunLimits(wall_seconds=0, memory_mb=0, cpu_seconds=0, output_mb=256)
+
+# Environment variable passing "<memory MB>,<CPU seconds>" to script_runner,
+# which applies them itself before running the script.
+LIMITS_ENV = "EDITOR_RUN_LIMITS"
+
+
+def process_group_options():
+    """Popen options starting the child in its own process group, so kill_process_tree() reaches its children."""
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def popen_options(limits, env=None):
+    """process_group_options() plus the child environment (``env``, default
+    os.environ) carrying the memory and CPU limits.
+
+    A preexec_fn would be the obvious way to set them, but it is not safe
+    while the editor has other threads running: the child can deadlock
+    before exec. script_runner calls apply_limits() instead.
+    """
+    options = process_group_options()
+    env = dict(os.environ if env is None else env)
+    env.pop(LIMITS_ENV, None)
+    if limits.memory_mb or limits.cpu_seconds:
+        env[LIMITS_ENV] = f"{limits.memory_mb},{limits.cpu_seconds}"
+    options["env"] = env
+    return options
+
+
+def apply_limits(setting):
+    """Apply a LIMITS_ENV ``setting`` to the current process (and so to everything it starts)."""
+    if resource is None or not setting:
+        return
+    memory_mb, cpu_seconds = (int(value) for value in setting.split(","))
+    if memory_mb:
+        size = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (size, size))
+    if cpu_seconds:
+        # The soft limit sends SIGXCPU, the hard one a second later SIGKILL.
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+
+
+def kill_process_tree(process):
+    """Kill ``process`` and everything it started."""
+    try:
+        if os.name == "nt":
+            if process.poll() is None:
+                subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True)
+        else:
+            # The group outlives its leader, so kill it even if the child itself is gone.
+            os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        if process.poll() is None:
+            process.kill()
+
+
+def exit_reason(returncode, error=None, limits=DEFAULT_LIMITS):
+    """Why a run most likely ended the way it did, or None for an ordinary exit."""
+    if error and error.get("type") == "MemoryError" and limits.memory_mb:
+        return f"memory limit of {limits.memory_mb} MB exceeded"
+    if os.name == "nt" or returncode is None or returncode >= 0:
+        return None
+    if returncode in (-signal.SIGXCPU, -signal.SIGKILL) and limits.cpu_seconds:
+        return f"CPU time limit of {limits.cpu_seconds} s exceeded"
+    if returncode == -signal.SIGKILL:
+        return "killed by the system (out of memory?)"
+    try:
+        return f"terminated by signal {signal.Signals(-returncode).name}"
+    except ValueError:
+        return f"terminated by signal {-returncode}"
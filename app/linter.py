@@ -0,0 +1,149 @@
+import ast
+import threading
+from typing import NamedTuple
+
+from .name_checker import NameChecker
+
+LINT_DELAY_MS = 600  # quiet time after the last edit before the tab is checked
+LINT_POLL_MS = 50
+
+_service = None
+
+
+class Diagnostic(NamedTuple):
+    message: str
+    lineno: int
+    col: int
+    end_col: int
+    syntax: bool
+
+
+class Block(NamedTuple):
+    """What a top-level statement contributes to the module: names it binds and reads it leaves open."""
+    bound: frozenset
+    reads: list  # (name, line relative to the block, col, ordered)
+    star_import: bool
+
+
+def _analyze(stmt, first):
+    checker = NameChecker()
+    checker.visit(stmt)
+    bound = checker.module.bound
+    reads = [(name, node.lineno - first, node.col_offset, ordered)
+             for name, node, ordered in checker.module_reads() if ordered or name not in bound]
+    return Block(frozenset(bound), reads, checker.star_import)
+
+
+def lint_code(code, cache=None):
+    """Diagnostics for ``code``, plus the block cache to pass to the next call.
+
+    The cache maps the source of each top-level statement (a function, a
+    class, an assignment...) to its analysis, so only blocks that changed
+    since the previous call are walked again.
+    """
+    cache = cache or {}
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        lineno = e.lineno or 1
+        col = max((e.offset or 1) - 1, 0)
+        return [Diagnostic(f"{e.msg} on line {lineno}", lineno, col, col + 1, True)], cache
+
+    lines = code.split("\n")
+    blocks = []
+    new_cache = {}
+    for stmt in tree.body:
+        first = min([stmt.lineno] + [d.lineno for d in getattr(stmt, "decorator_list", ())])
+        key = (stmt.col_offset, stmt.end_col_offset, "\n".join(lines[first - 1:stmt.end_lineno]))
+        block = new_cache.get(key) or cache.get(key) or _analyze(stmt, first)
+        new_cache[key] = block
+        blocks.append((first, block))
+
+    diagnostics = []
+    if any(block.star_import for _, block in blocks):
+        return diagnostics, new_cache
+    module_bound = set().union(*(block.bound for _, block in blocks))
+    bound_before = set()
+    for first, block in blocks:
+        for name, line, col, ordered in block.reads:
+            if name not in (bound_before if ordered else module_bound):
+                lineno = first + line
+                diagnostics.append(Diagnostic(
+                    f"Possibly undefined name '{name}' at line {lineno}", lineno, col, col + len(name), False))
+        bound_before |= block.bound
+    return diagnostics, new_cache
+
+
+class LintService(threading.Thread):
+    """Checks code on a background thread, keeping a block cache per tab.
+
+    Like the completion service, only the newest request matters, but per
+    tab: a request replaces the one its tab has waiting and leaves other
+    tabs' requests alone. Tabs waiting are checked in the order they asked.
+    """
+
+    def __init__(self):
+        super().__init__(name="lint", daemon=True)
+        self._generation = 0
+        self._latest = {}  # key -> generation of its newest request
+        self._pending = {}  # key -> (generation, code), oldest request first
+        self._results = {}  # key -> (generation, diagnostics)
+        self._caches = {}
+        self._cond = threading.Condition()
+        self.start()
+
+    def submit(self, key, code):
+        """Queue ``code`` of tab ``key``; returns its generation for take_result()."""
+        with self._cond:
+            self._generation += 1
+            self._latest[key] = self._generation
+            self._pending.pop(key, None)
+            self._pending[key] = (self._generation, code)
+            self._results.pop(key, None)
+            self._cond.notify()
+            return self._generation
+
+    def is_current(self, key, generation):
+        """Whether ``generation`` is still the newest request of tab ``key``."""
+        with self._cond:
+            return self._latest.get(key) == generation
+
+    def forget(self, key):
+        with self._cond:
+            for table in (self._latest, self._pending, self._results, self._caches):
+                table.pop(key, None)
+
+    def take_result(self, key, generation):
+        """Diagnostics for request ``generation`` of tab ``key``, or None if not ready (yet)."""
+        with self._cond:
+            result = self._results.get(key)
+            if result and result[0] == generation:
+                del self._results[key]
+                return result[1]
+        return None
+
+    def run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                key = next(iter(self._pending))
+                generation, code = self._pending.pop(key)
+                cache = self._caches.get(key)
+            try:
+                diagnostics, cache = lint_code(code, cache)
+            except Exception as e:
+                print("Lint error:", repr(e))
+                diagnostics, cache = [], None
+            with self._cond:
+                if key in self._latest:  # not forgotten meanwhile
+                    self._caches[key] = cache
+                    if self._latest[key] == generation:
+                        self._results[key] = (generation, diagnostics)
+
+
+def get_lint_service():
+    global _service
+    if _service is None:
+        _service = LintService()
+    return _service
@@ -1,71 +1,289 @@
 import ast
 import builtins
 
+BUILTIN_NAMES = frozenset(dir(builtins))
+# Names every module / class body has without binding them.
+IMPLICIT_NAMES = frozenset({
+    "__name__", "__file__", "__doc__", "__builtins__", "__spec__", "__loader__", "__package__",
+    "__annotations__", "__dict__", "__module__", "__qualname__", "__class__",
+})
+
+
+def _own_statements(body):
+    """Statements of a function body, not descending into nested scopes."""
+    stack = list(body)
+    while stack:
+        node = stack.pop()
+        yield node
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            stack.extend(child for child in ast.iter_child_nodes(node) if isinstance(child, ast.stmt))
+
+
+class Scope:
+    def __init__(self, kind, parent):
+        self.kind = kind  # "module", "function", "class" or "comprehension"
+        self.parent = parent
+        self.bound = set()
+        self.globals = set()
+        self.nonlocals = set()
+        self.first_bound = {}  # name -> event number of its first binding (module scope only)
+        self.loads = []  # (name, node, event number, inside a loop)
+
 
 class NameChecker(ast.NodeVisitor):
+    """Reports names that are not bound in any scope they can resolve to.
+
+    One walk over the tree records, per scope, what is bound there (all
+    binding forms: assignments, walrus, parameters, imports, def/class,
+    for/with/except targets, match captures, global/nonlocal) and every name
+    that is read. When the module is done, each read is resolved through
+    the enclosing function scopes (class bodies are skipped, as in Python),
+    the module and the builtins. At module level, reads that happen before
+    the first binding are reported too, unless they are inside a loop.
+    """
+
     def __init__(self):
-        self.defined_names = set()
         self.errors = []
+        self.module = Scope("module", None)
+        self.scope = self.module
+        self.scopes = [self.module]
+        self.star_import = False
+        self._event = 0
+        self._loop_depth = 0
+
+    # -- scopes ---------------------------------------------------------
+
+    def _push(self, kind):
+        scope = Scope(kind, self.scope)
+        self.scopes.append(scope)
+        self.scope = scope
+        return scope
+
+    def _pop(self, previous):
+        self.scope = previous
+
+    def _bind(self, name, scope=None):
+        scope = scope or self.scope
+        if name in scope.nonlocals:
+            return
+        if name in scope.globals:
+            scope = self.module
+        scope.bound.add(name)
+        if scope is self.module:
+            self._event += 1
+            scope.first_bound.setdefault(name, self._event)
+
+    def _bind_arguments(self, args):
+        for arg in args.posonlyargs + args.args + args.kwonlyargs:
+            self._bind(arg.arg)
+        if args.vararg:
+            self._bind(args.vararg.arg)
+        if args.kwarg:
+            self._bind(args.kwarg.arg)
+
+    def _visit_all(self, nodes):
+        for node in nodes:
+            if node is not None:
+                self.visit(node)
+
+    def _visit_signature(self, args):
+        # Defaults and annotations are evaluated in the enclosing scope.
+        self._visit_all(args.defaults)
+        self._visit_all(args.kw_defaults)
+        for arg in args.posonlyargs + args.args + args.kwonlyargs + [args.vararg, args.kwarg]:
+            if arg is not None and arg.annotation is not None:
+                self.visit(arg.annotation)
+
+    # -- module ---------------------------------------------------------
+
+    def visit_Module(self, node):
+        self.generic_visit(node)
+        self.resolve()
+
+    def resolve(self):
+        for name, node, ordered in self.module_reads():
+            if ordered or name not in self.module.bound:
+                self.errors.append((name, node.lineno, node.col_offset))
+        self.errors.sort(key=lambda error: (error[1], error[2]))
+
+    def module_reads(self):
+        """Reads left for the module scope once local, enclosing and builtin names are ruled out.
+
+        Yields ``(name, node, ordered)``. An ``ordered`` read happens directly
+        at module level before any binding of the name in this tree, so only a
+        binding made earlier (e.g. by a previous statement) satisfies it.
+        """
+        for scope in self.scopes:
+            for name, node, event, in_loop in scope.loads:
+                ordered = self._module_read(scope, name, event, in_loop)
+                if ordered is not None:
+                    yield name, node, ordered
+
+    def _module_read(self, scope, name, event, in_loop):
+        if self.star_import or name in BUILTIN_NAMES or name in IMPLICIT_NAMES:
+            return None
+        if name in scope.globals:
+            return False
+        if scope is self.module:
+            if name in scope.bound and (in_loop or scope.first_bound[name] < event):
+                return None
+            return not in_loop
+        if name in scope.bound or name in scope.nonlocals:
+            return None
+        parent = scope.parent
+        while parent is not None and parent is not self.module:
+            if parent.kind != "class" and (name in parent.bound or name in parent.nonlocals):
+                return None
+            parent = parent.parent
+        return False
+
+    # -- names ----------------------------------------------------------
 
     def visit_Name(self, node):
-        if isinstance(node.ctx, ast.Store):
-            self.defined_names.add(node.id)
-        elif isinstance(node.ctx, ast.Load):
-            if node.id not in self.defined_names and node.id not in dir(builtins):
-                self.errors.append((node.id, node.lineno, node.col_offset))
+        if isinstance(node.ctx, ast.Load):
+            self._event += 1
+            self.scope.loads.append((node.id, node, self._event, self._loop_depth > 0))
+        else:
+            self._bind(node.id)
+
+    def visit_Global(self, node):
+        self.scope.globals.update(node.names)
+
+    def visit_Nonlocal(self, node):
+        self.scope.nonlocals.update(node.names)
 
     def visit_Import(self, node):
         for alias in node.names:
-            self.defined_names.add(alias.asname or alias.name.split('.')[0])
+            self._bind(alias.asname or alias.name.split('.')[0])
 
     def visit_ImportFrom(self, node):
         for alias in node.names:
-            self.defined_names.add(alias.asname or alias.name)
-
-    def visit_comprehension(self, node):  # type: (ast.AST) -> None
-        self.visit(node.target)  # Track loop variables
-        self.visit(node.iter)
-        for if_clause in node.ifs:
-            self.visit(if_clause)
-
-    def visit_ListComp(self, node):  # type: (ast.AST) -> None
-        for gen in node.generators:
-            self.visit(gen)
-        self.visit(node.elt)
-
-    def visit_SetComp(self, node):  # type: (ast.AST) -> None
-        for gen in node.generators:
-            self.visit(gen)
-        self.visit(node.elt)
-
-    def visit_DictComp(self, node):  # type: (ast.AST) -> None
-        for gen in node.generators:
-            self.visit(gen)
-        self.visit(node.key)
+            if alias.name == "*":
+                self.star_import = True
+            else:
+                self._bind(alias.asname or alias.name)
+
+    def visit_ExceptHandler(self, node):
+        if node.type is not None:
+            self.visit(node.type)
+        if node.name:
+            self._bind(node.name)
+        self._visit_all(node.body)
+
+    def visit_MatchAs(self, node):
+        if node.pattern is not None:
+            self.visit(node.pattern)
+        if node.name:
+            self._bind(node.name)
+
+    def visit_MatchStar(self, node):
+        if node.name:
+            self._bind(node.name)
+
+    def visit_MatchMapping(self, node):
+        self._visit_all(node.keys)
+        self._visit_all(node.patterns)
+        if node.rest:
+            self._bind(node.rest)
+
+    # -- statements evaluated right to left -----------------------------
+
+    def visit_Assign(self, node):
         self.visit(node.value)
+        self._visit_all(node.targets)
+
+    def visit_AnnAssign(self, node):
+        self._visit_all([node.value, node.annotation, node.target])
+
+    def visit_AugAssign(self, node):
+        self.visit(node.value)
+        self.visit(node.target)
+
+    def visit_NamedExpr(self, node):
+        self.visit(node.value)
+        # The target of := inside a comprehension belongs to the enclosing scope.
+        scope = self.scope
+        while scope.kind == "comprehension":
+            scope = scope.parent
+        self._bind(node.target.id, scope)
+
+    def _visit_loop(self, node, header):
+        self._visit_all(header)
+        self._loop_depth += 1
+        self._visit_all(node.body)
+        self._loop_depth -= 1
+        self._visit_all(node.orelse)
 
-    def visit_GeneratorExp(self, node):  # type: (ast.AST) -> None
-        for gen in node.generators:
-            self.visit(gen)
-        self.visit(node.elt)
+    def visit_For(self, node):
+        self._visit_loop(node, [node.iter, node.target])
+
+    visit_AsyncFor = visit_For
+
+    def visit_While(self, node):
+        self._loop_depth += 1
+        self.visit(node.test)
+        self._loop_depth -= 1
+        self._visit_loop(node, [])
+
+    # -- new scopes -----------------------------------------------------
 
     def visit_FunctionDef(self, node):
-        self.defined_names.add(node.name)
-        self.defined_names.add(node.name)  # add function name itself
-        # Add all function arguments
-        for arg in node.args.args:
-            self.defined_names.add(arg.arg)
+        self._visit_all(node.decorator_list)
+        self._visit_signature(node.args)
+        if node.returns is not None:
+            self.visit(node.returns)
+        self._bind(node.name)
 
-        self.generic_visit(node)
+        previous = self.scope
+        loop_depth, self._loop_depth = self._loop_depth, 0
+        self._push("function")
+        self._bind_arguments(node.args)
+        # global/nonlocal apply to the whole body, even before the statement.
+        for child in _own_statements(node.body):
+            if isinstance(child, (ast.Global, ast.Nonlocal)):
+                self.visit(child)
+        self._visit_all(node.body)
+        self._pop(previous)
+        self._loop_depth = loop_depth
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        self._visit_signature(node.args)
+        previous = self.scope
+        self._push("function")
+        self._bind_arguments(node.args)
+        self.visit(node.body)
+        self._pop(previous)
 
     def visit_ClassDef(self, node):
-        self.defined_names.add(node.name)
-        self.generic_visit(node)
+        self._visit_all(node.decorator_list)
+        self._visit_all(node.bases)
+        self._visit_all(node.keywords)
+        previous = self.scope
+        self._push("class")
+        self._visit_all(node.body)
+        self._pop(previous)
+        self._bind(node.name)
 
-    def visit_Module(self, node):
-        # First collect all top-level function/class names
-        for stmt in node.body:
-            if isinstance(stmt, (ast.FunctionDef, ast.ClassDef)):
-                self.defined_names.add(stmt.name)
-        # Then visit all
-        self.generic_visit(node)
+    def _visit_comprehension(self, node, results):
+        # The first iterable is evaluated in the enclosing scope.
+        self.visit(node.generators[0].iter)
+        previous = self.scope
+        self._push("comprehension")
+        for i, generator in enumerate(node.generators):
+            if i:
+                self.visit(generator.iter)
+            self.visit(generator.target)
+            self._visit_all(generator.ifs)
+        self._visit_all(results)
+        self._pop(previous)
+
+    def visit_ListComp(self, node):
+        self._visit_comprehension(node, [node.elt])
+
+    visit_SetComp = visit_ListComp
+    visit_GeneratorExp = visit_ListComp
+
+    def visit_DictComp(self, node):
+        self._visit_comprehension(node, [node.key, node.value])
@@ -0,0 +1,57 @@
+import codecs
+import threading
+from collections import deque
+
+
+class OutputRingBuffer:
+    """Bounded, thread-safe hand-off of child output from the reader thread to Tk.
+
+    Only the last ``max_bytes`` are kept; older chunks are discarded and
+    counted in ``dropped``, so memory stays constant however much the script
+    prints.
+    """
+
+    def __init__(self, max_bytes, encoding="utf-8"):
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        self.total = 0
+        self.closed = False
+        self.returncode = None
+        self._chunks = deque()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+    def append(self, data):
+        with self._lock:
+            self.total += len(data)
+            if len(data) > self.max_bytes:
+                self.dropped += len(data) - self.max_bytes
+                data = data[-self.max_bytes:]
+            self._chunks.append(data)
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                excess = self._size - self.max_bytes
+                head = self._chunks[0]
+                if len(head) <= excess:
+                    self._chunks.popleft()
+                    self._size -= len(head)
+                    self.dropped += len(head)
+                else:
+                    self._chunks[0] = head[excess:]
+                    self._size -= excess
+                    self.dropped += excess
+
+    def close(self, returncode=None):
+        with self._lock:
+            self.returncode = returncode
+            self.closed = True
+
+    def drain(self):
+        """Return everything buffered so far as text (called from the Tk thread)."""
+        with self._lock:
+            data = b"".join(self._chunks)
+            self._chunks.clear()
+            self._size = 0
+            final = self.closed
+        return self._decoder.decode(data, final=final)
@@ -0,0 +1,130 @@
+import os
+import tkinter as tk
+from tkinter import ttk
+
+from .run_manager import format_bytes
+
+# Run button modes: label -> instrument in the child (see instruments.MODES).
+RUN_MODES = {
+    "Run": None,
+    "Profile": "profile",
+    "Profile (sampling)": "sample",
+    "Heatmap": "lines",
+    "Memory": "memory",
+}
+
+
+class ResultTable(tk.Toplevel):
+    """Rows collected by an instrument; click a heading to sort, a row of the script to jump to it.
+
+    Subclasses set ``COLUMNS`` (key, heading, width) and ``SORT_KEY``, and
+    format rows in ``values()``.
+    """
+
+    COLUMNS = ()
+    TEXT_COLUMNS = ("function", "location")  # left aligned, sorted ascending first
+    SORT_KEY = None
+
+    def __init__(self, app, text, script, rows, title):
+        super().__init__(app)
+        self.title(title)
+        self.geometry("860x420")
+        self.text = text
+        self.script = os.path.normcase(os.path.abspath(script))
+        self.rows = rows
+        self.sort_key, self.descending = self.SORT_KEY, True
+        self._shown = []
+
+        self.header = tk.Label(self, anchor="w")
+        self.header.pack(fill="x", padx=5)
+        columns = [name for name, _, _ in self.COLUMNS]
+        self.tree = ttk.Treeview(self, columns=columns, show="headings")
+        for name, heading, width in self.COLUMNS:
+            self.tree.heading(name, text=heading, command=lambda n=name: self.sort_by(n))
+            self.tree.column(name, width=width, anchor="w" if name in self.TEXT_COLUMNS else "e")
+        scroll = tk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        scroll.pack(side="right", fill="y")
+        self.tree.pack(fill="both", expand=True)
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self.jump())
+        self.render()
+
+    def in_script(self, row):
+        return os.path.normcase(os.path.abspath(row["file"])) == self.script
+
+    def location(self, row):
+        return f"line {row['line']}" if self.in_script(row) else f"{row['file']}:{row['line']}"
+
+    def values(self, row):
+        raise NotImplementedError
+
+    def render(self):
+        self.tree.delete(*self.tree.get_children())
+        if self.sort_key == "location":
+            key = lambda row: (row["file"], row["line"])
+        else:
+            key = lambda row: row[self.sort_key] if row[self.sort_key] is not None else -1
+        self._shown = sorted(self.rows, key=key, reverse=self.descending)
+        for i, row in enumerate(self._shown):
+            self.tree.insert("", "end", iid=str(i), values=self.values(row))
+
+    def sort_by(self, column):
+        if column == self.sort_key:
+            self.descending = not self.descending
+        else:
+            self.sort_key, self.descending = column, column not in self.TEXT_COLUMNS
+        self.render()
+
+    def jump(self):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        row = self._shown[int(selection[0])]
+        if not self.in_script(row) or not self.text.winfo_exists():
+            return
+        index = f"{row['line']}.0"
+        self.text.mark_set("insert", index)
+        self.text.see(index)
+        self.text.tag_remove("sel", "1.0", "end")
+        self.text.tag_add("sel", index, f"{row['line']}.end")
+        self.text.focus_set()
+
+
+class ProfileWindow(ResultTable):
+    """Top functions of a profiled run."""
+
+    COLUMNS = (
+        ("function", "Function", 220),
+        ("location", "File:Line", 320),
+        ("calls", "Calls", 80),
+        ("self", "Self (s)", 90),
+        ("cumulative", "Cumulative (s)", 110),
+    )
+    SORT_KEY = "cumulative"
+
+    def __init__(self, app, text, result, title="Profile"):
+        super().__init__(app, text, result["script"], result["functions"], title)
+        self.header.config(text="Select a function of the script to jump to it.")
+
+    def values(self, row):
+        calls = row["calls"] if row["calls"] is not None else ""
+        return row["function"], self.location(row), calls, f"{row['self']:.4f}", f"{row['cumulative']:.4f}"
+
+
+class MemoryWindow(ResultTable):
+    """Top allocation sites of a memory run, with the peak traced memory."""
+
+    COLUMNS = (
+        ("location", "File:Line", 520),
+        ("size", "Size", 120),
+        ("count", "Blocks", 100),
+    )
+    SORT_KEY = "size"
+
+    def __init__(self, app, text, result, title="Memory"):
+        super().__init__(app, text, result["script"], result["sites"], title)
+        self.header.config(text=f"Peak traced memory: {format_bytes(result['peak'])}    "
+                                f"Allocations alive {result['snapshot']}: {format_bytes(result['snapshot_size'])}")
+
+    def values(self, row):
+        return self.location(row), format_bytes(row["size"]), row["count"]
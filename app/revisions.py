@@ -0,0 +1,45 @@
+import difflib
+import json
+import zlib
+
+SNAPSHOT_EVERY = 20  # a full copy after this many deltas keeps restores cheap
+
+
+def compress_snapshot(code):
+    return zlib.compress(code.encode("utf-8"))
+
+
+def make_delta(old, new):
+    """Line delta turning ``old`` into ``new``, compressed.
+
+    The delta is a list of ops: ``[i1, i2]`` copies ``old`` lines i1..i2 and a
+    list of strings inserts those lines.
+    """
+    a = old.splitlines(keepends=True)
+    b = new.splitlines(keepends=True)
+    ops = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b).get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j1 != j2:
+            ops.append(b[j1:j2])
+    return zlib.compress(json.dumps(ops).encode("utf-8"))
+
+
+def apply_delta(old, data):
+    a = old.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(zlib.decompress(data)):
+        if isinstance(op[0], int):
+            parts.extend(a[op[0]:op[1]])
+        else:
+            parts.extend(op)
+    return "".join(parts)
+
+
+def rebuild(chain):
+    """Text of the last revision in ``chain``: ``[(depth, data), ...]`` starting at a snapshot."""
+    code = None
+    for depth, data in chain:
+        code = zlib.decompress(data).decode("utf-8") if depth == 0 else apply_delta(code, data)
+    return code
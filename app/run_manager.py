@@ -0,0 +1,200 @@
+import collections
+import os
+import sys
+import threading
+import time
+
+from .limits import kill_process_tree
+
+MAX_PARALLEL_RUNS = 2  # runs executing at once; further runs wait in a queue
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+STOPPED = "stopped"
+
+
+def wait_with_usage(process):
+    """``process.wait()`` plus the child's CPU seconds and peak RSS in KB (None where os.wait4 is missing)."""
+    if not hasattr(os, "wait4"):
+        return process.wait(), None, None
+    try:
+        _, status, usage = os.wait4(process.pid, 0)
+    except ChildProcessError:  # already reaped
+        return process.wait(), None, None
+    process.returncode = os.waitstatus_to_exitcode(status)
+    peak_rss_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return process.returncode, usage.ru_utime + usage.ru_stime, peak_rss_kb
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class Run:
+    """One execution of a tab's code and what is known about it."""
+
+    def __init__(self, tab_id, target, output, timeout=0, on_finished=None):
+        self.tab_id = tab_id
+        self.target = target  # called with the run on its worker thread, returns the exit code
+        self.output = output  # the run's OutputRingBuffer
+        self.timeout = timeout  # wall-clock seconds, 0 for none
+        self.on_finished = on_finished  # called with the run once it is over, from whichever thread ended it
+        self.reason = None  # why the run was killed, if it was
+        self.state = QUEUED
+        self.process = None
+        self.pid = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.exit_code = None
+        self.thread = None
+        self.cpu_seconds = None  # filled in by the target where the platform reports them
+        self.result = None  # instrument result of a profiling run mode
+        self.peak_rss_kb = None
+
+    @property
+    def active(self):
+        return self.state in (QUEUED, RUNNING)
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def summary(self, previous=None):
+        """One line with the run's exit code, timings, memory and output volume.
+
+        ``previous`` (a RunReport of the same tab) adds the change in wall time.
+        """
+        parts = [f"exit {self.exit_code if self.exit_code is not None else '-'}", f"wall {self.elapsed:.2f} s"]
+        if previous and previous.wall_seconds:
+            parts[-1] += f" ({(self.elapsed - previous.wall_seconds) / previous.wall_seconds:+.0%} vs last run)"
+        if self.cpu_seconds is not None:
+            parts.append(f"cpu {self.cpu_seconds:.2f} s")
+        if self.peak_rss_kb:
+            parts.append(f"peak RSS {format_bytes(self.peak_rss_kb * 1024)}")
+        parts.append(f"output {format_bytes(self.output.total)}")
+        return "[" + " | ".join(parts) + "]"
+
+
+class RunManager:
+    """Registry of the latest run of every tab.
+
+    Up to ``max_parallel`` runs execute at once, each on its own worker
+    thread; the rest are started in submission order as slots free up.
+    """
+
+    def __init__(self, max_parallel=MAX_PARALLEL_RUNS):
+        self.max_parallel = max_parallel
+        self.runs = {}  # tab_id -> Run
+        self._queue = collections.deque()
+        self._lock = threading.Lock()
+
+    def get(self, tab_id):
+        return self.runs.get(tab_id)
+
+    def active_runs(self):
+        with self._lock:
+            return [run for run in self.runs.values() if run.active]
+
+    def submit(self, tab_id, target, output, timeout=0, on_finished=None):
+        """Queue a run for ``tab_id``; returns None if the tab already has one in progress."""
+        with self._lock:
+            current = self.runs.get(tab_id)
+            if current and current.active:
+                return None
+            run = Run(tab_id, target, output, timeout, on_finished)
+            self.runs[tab_id] = run
+            self._queue.append(run)
+        self._start_queued()
+        return run
+
+    def set_max_parallel(self, max_parallel):
+        self.max_parallel = max(1, max_parallel)
+        self._start_queued()
+
+    def attach(self, run, process):
+        """Record the process ``run`` executes in; called from its worker thread."""
+        with self._lock:
+            run.process = process
+            run.pid = process.pid
+            stopped = run.state == STOPPED
+        if stopped:
+            kill_process_tree(process)
+
+    def stop(self, tab_id, reason=None):
+        """Stop the tab's run; returns it, or None if nothing was in progress."""
+        run = self.runs.get(tab_id)
+        return run if run and self.kill(run, reason) else None
+
+    def kill(self, run, reason=None):
+        """Stop ``run`` and its whole process tree, recording ``reason``; False if it was already over."""
+        with self._lock:
+            if not run.active:
+                return False
+            queued = run.state == QUEUED
+            if queued:
+                self._queue.remove(run)
+                run.finished = time.time()
+                run.output.close()
+            run.state = STOPPED
+            run.reason = reason
+            process = run.process
+        if process:
+            kill_process_tree(process)
+        if queued and run.on_finished:
+            run.on_finished(run)
+        return True
+
+    def stop_all(self):
+        for tab_id in list(self.runs):
+            self.stop(tab_id)
+
+    def forget(self, tab_id):
+        self.stop(tab_id)
+        self.runs.pop(tab_id, None)
+
+    def _start_queued(self):
+        starting = []
+        with self._lock:
+            running = sum(run.state == RUNNING for run in self.runs.values())
+            while self._queue and running < self.max_parallel:
+                run = self._queue.popleft()
+                run.state = RUNNING
+                run.started = time.time()
+                starting.append(run)
+                running += 1
+        for run in starting:
+            run.thread = threading.Thread(target=self._execute, args=(run,), name=f"run-{run.tab_id}", daemon=True)
+            run.thread.start()
+
+    def _execute(self, run):
+        exit_code = None
+        watchdog = None
+        if run.timeout:
+            watchdog = threading.Timer(run.timeout, self.kill, (run, f"wall-clock timeout of {run.timeout} s"))
+            watchdog.daemon = True
+            watchdog.start()
+        try:
+            exit_code = run.target(run)
+        except Exception as ex:
+            print("Run Error:", repr(ex))
+        finally:
+            if watchdog:
+                watchdog.cancel()
+            with self._lock:
+                run.exit_code = exit_code
+                run.finished = time.time()
+                run.process = None
+                if run.state == RUNNING:
+                    run.state = FINISHED if exit_code == 0 else FAILED
+            if run.on_finished:
+                run.on_finished(run)
+            self._start_queued()
@@ -0,0 +1,103 @@
+# Runs a user script the way `python script.py` would, and on failure also
+# writes a JSON record of the error to a side file, so the editor can mark
+# the failing line without executing the code a second time:
+#   python script_runner.py <script> <report> [<mode> <result>]
+# With a mode (see instruments.MODES) the code runs instrumented and the
+# instrument's result is written to the result file. Memory and CPU limits
+# come in the limits.LIMITS_ENV environment variable.
+# kernel_worker.py uses run() for the same purpose.
+import builtins
+import importlib.util
+import json
+import os
+import sys
+import traceback
+
+
+def load_sibling(name):
+    """Import ``<name>.py`` from this directory by path, under a name no module of the user's can take."""
+    spec = importlib.util.spec_from_file_location(
+        f"_editor_{name}", os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+try:
+    from . import instruments, limits  # imported by the editor as app.script_runner
+except ImportError:
+    # Run as a script (or loaded by kernel_worker.py): a plain "import instruments"
+    # would hide the user's own instruments.py, or be hidden by it.
+    instruments = load_sibling("instruments")
+    limits = load_sibling("limits")
+
+
+def error_record(e, filename):
+    lineno = None
+    for entry in reversed(traceback.extract_tb(e.__traceback__)):
+        if entry.filename == filename:
+            lineno = entry.lineno
+            break
+    if lineno is None and isinstance(e, SyntaxError) and e.filename == filename:
+        lineno = e.lineno
+    return {
+        "type": type(e).__name__,
+        "message": str(e),
+        "lineno": lineno,
+        "module": e.name if isinstance(e, ModuleNotFoundError) else None,
+    }
+
+
+def read_report(path):
+    """Contents of a JSON side file written by the child (error record or instrument result), or None."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def run(code, filename, namespace, report_path=None, mode=None, result_path=None):
+    """Execute ``code`` in ``namespace`` and return its exit status."""
+    sys.path[0] = os.path.dirname(filename)
+    instrument = instruments.MODES[mode](filename) if mode else None
+    try:
+        code = compile(code, filename, "exec")
+        if instrument:
+            instrument.start()
+        try:
+            exec(code, namespace)
+        finally:
+            if instrument:
+                instrument.stop()
+                with open(result_path, "w", encoding="utf-8") as f:
+                    json.dump(instrument.result(), f)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except BaseException as e:
+        # Skip this module's own frame so the traceback matches a plain run.
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        if report_path:
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(error_record(e, filename), f)
+        return 1
+    return 0
+
+
+def main():
+    filename, report_path = sys.argv[1], sys.argv[2]
+    mode, result_path = (sys.argv[3], sys.argv[4]) if len(sys.argv) > 4 else (None, None)
+    limits.apply_limits(os.environ.pop(limits.LIMITS_ENV, None))
+    with open(filename, encoding="utf-8") as f:
+        code = f.read()
+    sys.argv = [filename]
+    namespace = {"__name__": "__main__", "__file__": filename, "__builtins__": builtins}
+    sys.exit(run(code, filename, namespace, report_path, mode, result_path))
+
+
+if __name__ == "__main__":
+    main()
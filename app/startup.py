@@ -0,0 +1,67 @@
+# Startup timing. ``python main.py --startup-report`` starts the editor in a fresh
+# interpreter and prints how long it took until the last code was restored
+# and the window editable, followed by where the time to import the editor
+# goes (from ``python -X importtime``), slowest modules first. Setting
+# EDITOR_STARTUP_REPORT=1 makes a normal start print its own timing.
+import os
+import subprocess
+import sys
+import time
+
+STARTED = time.perf_counter()  # imported first by the app package
+STARTUP_REPORT_ENV = "EDITOR_STARTUP_REPORT"
+IMPORT_REPORT_TOP = 25
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def report_ready(app):
+    """Record how long the editor took to become editable; called once the last code is restored."""
+    app.startup_seconds = time.perf_counter() - STARTED
+    setting = os.environ.get(STARTUP_REPORT_ENV)
+    if setting:
+        print(f"Editor ready {app.startup_seconds * 1000:.0f} ms after import", flush=True)
+        if setting == "exit":
+            app.after_idle(app.on_close)
+
+
+def import_times(module="app.editor_app"):
+    """``[(cumulative us, self us, name), ...]`` for every module a fresh interpreter imports for ``module``."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=PROJECT_DIR, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), int(own), name.strip()))
+    return rows
+
+
+def time_window():
+    """Seconds from launching ``main.py`` until the editor reports itself ready, or None if it did not."""
+    env = {**os.environ, STARTUP_REPORT_ENV: "exit"}
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(PROJECT_DIR, "main.py")], cwd=PROJECT_DIR,
+                               env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    for line in process.stdout:
+        if line.startswith("Editor ready"):
+            ready = time.perf_counter() - started
+            process.wait()
+            return ready
+    process.wait()
+    return None
+
+
+def main():
+    ready = time_window()
+    if ready is None:
+        print("Editor did not start (no display?)")
+    else:
+        print(f"Cold start to editable window: {ready * 1000:.0f} ms")
+    rows = import_times()
+    if not rows:
+        return
+    print(f"Importing the editor: {rows[-1][0] / 1000:.1f} ms")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative, own, name in sorted(rows, reverse=True)[:IMPORT_REPORT_TOP]:
+        print(f"{cumulative / 1000:14.1f} {own / 1000:9.1f}  {name}")
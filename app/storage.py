@@ -0,0 +1,472 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from .revisions import SNAPSHOT_EVERY, compress_snapshot, make_delta, rebuild
+
+COMMIT_INTERVAL = 1.0  # seconds a write may wait to be batched with the next ones
+PREVIEW_CHARS = 400
+PREVIEW_LINES = 3
+SEARCH_LIMIT = 200
+MATCH_START = "\x02"  # wrap matched terms in search snippets
+MATCH_END = "\x03"
+
+
+class SavedCode(NamedTuple):
+    id: int
+    tab_id: str
+    timestamp: int  # unix seconds
+    code: str
+
+
+class CodeSummary(NamedTuple):
+    id: int
+    tab_id: str
+    timestamp: int
+    preview: str  # first PREVIEW_LINES lines of the code
+
+
+SUMMARY_COLUMNS = f"id, tab_id, timestamp, substr(code, 1, {PREVIEW_CHARS})"
+
+
+def _summary(row):
+    code_id, tab_id, timestamp, head = row
+    return CodeSummary(code_id, tab_id, timestamp, "\n".join((head or "").splitlines()[:PREVIEW_LINES]))
+
+
+class Revision(NamedTuple):
+    id: int
+    tab_id: str
+    timestamp: int
+    is_snapshot: bool
+    size: int  # stored (compressed) bytes
+
+
+class RunReport(NamedTuple):
+    id: int
+    code_id: Optional[int]
+    tab_id: str
+    code_hash: str  # which version of the code ran
+    timestamp: int
+    wall_seconds: float
+    cpu_seconds: Optional[float]  # None where the platform does not report it
+    peak_rss_kb: Optional[int]
+    output_bytes: int
+    exit_code: Optional[int]
+    reason: Optional[str]  # why the run was stopped, if it was
+
+
+RUN_COLUMNS = ("id, code_id, tab_id, code_hash, timestamp, wall_seconds, cpu_seconds, peak_rss_kb, "
+               "output_bytes, exit_code, reason")
+
+
+def content_hash(code):
+    return hashlib.blake2b(code.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def normalize_code(code):
+    """A tab's text the way it is saved, so runs hash to the same value as the code they ran."""
+    return code.strip()
+
+
+def format_timestamp(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S") if timestamp else ""
+
+
+def _iso_to_epoch(value):
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except (TypeError, ValueError):
+        return 0
+
+
+def _create_codes(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS codes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tab_id TEXT,
+            timestamp TEXT,
+            code TEXT
+        )
+    """)
+
+
+def _integer_timestamps_and_hash(conn):
+    conn.create_function("iso_to_epoch", 1, _iso_to_epoch)
+    conn.create_function("content_hash", 1, lambda code: content_hash(code or ""))
+    conn.execute("""
+        CREATE TABLE codes_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tab_id TEXT,
+            timestamp INTEGER,
+            code TEXT,
+            code_hash TEXT
+        )
+    """)
+    conn.execute("""
+        INSERT INTO codes_new (id, tab_id, timestamp, code, code_hash)
+        SELECT id, tab_id, iso_to_epoch(timestamp), code, content_hash(code) FROM codes
+    """)
+    conn.execute("DROP TABLE codes")
+    conn.execute("ALTER TABLE codes_new RENAME TO codes")
+
+
+def _index_tab_id(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_codes_tab_id ON codes (tab_id, id)")
+
+
+def _full_text_index(conn):
+    try:
+        conn.execute("CREATE VIRTUAL TABLE codes_fts USING fts5(code, content='codes', content_rowid='id')")
+    except sqlite3.OperationalError:
+        return  # SQLite built without FTS5; search_codes falls back to LIKE
+    conn.execute("""
+        CREATE TRIGGER codes_fts_insert AFTER INSERT ON codes BEGIN
+            INSERT INTO codes_fts (rowid, code) VALUES (new.id, new.code);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER codes_fts_delete AFTER DELETE ON codes BEGIN
+            INSERT INTO codes_fts (codes_fts, rowid, code) VALUES ('delete', old.id, old.code);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER codes_fts_update AFTER UPDATE OF code ON codes BEGIN
+            INSERT INTO codes_fts (codes_fts, rowid, code) VALUES ('delete', old.id, old.code);
+            INSERT INTO codes_fts (rowid, code) VALUES (new.id, new.code);
+        END
+    """)
+    conn.execute("INSERT INTO codes_fts (codes_fts) VALUES ('rebuild')")
+
+
+def _revisions(conn):
+    conn.create_function("compress_snapshot", 1, lambda code: compress_snapshot(code or ""))
+    conn.execute("""
+        CREATE TABLE revisions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tab_id TEXT,
+            timestamp INTEGER,
+            depth INTEGER,
+            data BLOB,
+            code_hash TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX idx_revisions_tab_id ON revisions (tab_id, id)")
+    # Current code of every tab becomes its first revision.
+    conn.execute("""
+        INSERT INTO revisions (tab_id, timestamp, depth, data, code_hash)
+        SELECT tab_id, timestamp, 0, compress_snapshot(code), code_hash FROM codes ORDER BY id
+    """)
+
+
+def _runs(conn):
+    conn.execute("""
+        CREATE TABLE runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            code_id INTEGER,
+            tab_id TEXT,
+            code_hash TEXT,
+            timestamp INTEGER,
+            wall_seconds REAL,
+            cpu_seconds REAL,
+            peak_rss_kb INTEGER,
+            output_bytes INTEGER,
+            exit_code INTEGER,
+            reason TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX idx_runs_code_id ON runs (code_id, id)")
+    conn.execute("CREATE INDEX idx_runs_tab_id ON runs (tab_id, id)")
+
+
+def fts_query(text):
+    """Turn what the user typed into an FTS5 query matching every word as a prefix."""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+# Applied in order; PRAGMA user_version records how many already ran.
+# Only ever append to this list.
+MIGRATIONS = [
+    _create_codes,
+    _integer_timestamps_and_hash,
+    _index_tab_id,
+    _full_text_index,
+    _revisions,
+    _runs,
+]
+
+
+class CodeStore:
+    """Owns the single connection to app.db.
+
+    The connection is opened once in WAL mode and shared by the Tk thread
+    and worker threads behind a lock. Writes are committed right away when
+    the last commit is older than ``commit_interval``, otherwise they stay in
+    the open transaction until the next write or ``flush()`` picks them up.
+    """
+
+    def __init__(self, path, commit_interval=COMMIT_INTERVAL):
+        self.path = path
+        self.commit_interval = commit_interval
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._last_commit = 0.0
+        self._has_full_text = None
+        self._revision_heads = {}  # tab_id -> (revision id, depth, code) of its latest revision
+        self._conn = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self.init_schema()
+
+    def init_schema(self):
+        with self._lock:
+            self.flush()
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+                self._conn.execute("BEGIN")
+                try:
+                    migration(self._conn)
+                    self._conn.execute(f"PRAGMA user_version = {number}")
+                    self._conn.commit()
+                except Exception:
+                    self._conn.rollback()
+                    raise
+
+    def _write(self, sql, params=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            self._dirty = True
+            if time.monotonic() - self._last_commit >= self.commit_interval:
+                self.flush()
+            return cursor
+
+    def flush(self, wait=True):
+        """Commit pending writes, if any.
+
+        With ``wait`` False it returns at once while another thread holds the
+        store (a writer in the middle of a transaction commits it anyway),
+        leaving what is pending to the next call.
+        """
+        if not self._dirty:
+            return  # nothing to commit: not worth queueing behind a writer
+        if not self._lock.acquire(blocking=wait):
+            return
+        try:
+            if self._dirty:
+                self._conn.commit()
+                self._dirty = False
+                self._last_commit = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+    def last_code(self) -> str:
+        with self._lock:
+            row = self._conn.execute("SELECT code FROM codes ORDER BY id DESC LIMIT 1").fetchone()
+        return row[0] if row else ""
+
+    def next_tab_number(self) -> int:
+        """A number above every code id and every ``tab_<n>`` id saved so far."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT (SELECT MAX(id) FROM codes),"
+                " (SELECT MAX(CAST(SUBSTR(tab_id, 5) AS INTEGER)) FROM codes WHERE tab_id LIKE 'tab_%')").fetchone()
+        return max(row[0] or 0, row[1] or 0) + 1
+
+    def upsert_code(self, tab_id, code):
+        """Save ``code`` as the latest row of ``tab_id``; returns False if it was unchanged."""
+        with self._lock:
+            changed = self._upsert(tab_id, code)
+            if changed and time.monotonic() - self._last_commit >= self.commit_interval:
+                self.flush()
+            return changed
+
+    def upsert_codes(self, codes):
+        """Save ``{tab_id: code}`` in a single transaction; returns the tab ids that changed."""
+        with self._lock:
+            changed = [tab_id for tab_id, code in codes.items() if self._upsert(tab_id, code)]
+            self.flush()
+        return changed
+
+    def _upsert(self, tab_id, code):
+        code_hash = content_hash(code)
+        existing = self._conn.execute(
+            "SELECT id, code_hash FROM codes WHERE tab_id = ? ORDER BY id DESC LIMIT 1", (tab_id,)).fetchone()
+        if existing and existing[1] == code_hash:
+            return False
+        if existing:
+            self._conn.execute("UPDATE codes SET timestamp = ?, code = ?, code_hash = ? WHERE id = ?",
+                               (int(time.time()), code, code_hash, existing[0]))
+        else:
+            self._conn.execute("INSERT INTO codes (tab_id, timestamp, code, code_hash) VALUES (?, ?, ?, ?)",
+                               (tab_id, int(time.time()), code, code_hash))
+        self._add_revision(tab_id, code, code_hash)
+        self._dirty = True
+        return True
+
+    def _revision_head(self, tab_id):
+        head = self._revision_heads.get(tab_id)
+        if head is None:
+            row = self._conn.execute("SELECT id, depth FROM revisions WHERE tab_id = ? ORDER BY id DESC LIMIT 1",
+                                     (tab_id,)).fetchone()
+            if row:
+                head = self._revision_heads[tab_id] = (row[0], row[1], self._revision_code(row[0]))
+        return head
+
+    def _add_revision(self, tab_id, code, code_hash):
+        head = self._revision_head(tab_id)
+        if head and head[2] == code:
+            return
+        if head is None or head[1] + 1 >= SNAPSHOT_EVERY:
+            depth, data = 0, compress_snapshot(code)
+        else:
+            depth, data = head[1] + 1, make_delta(head[2], code)
+        cursor = self._conn.execute(
+            "INSERT INTO revisions (tab_id, timestamp, depth, data, code_hash) VALUES (?, ?, ?, ?, ?)",
+            (tab_id, int(time.time()), depth, data, code_hash))
+        self._revision_heads[tab_id] = (cursor.lastrowid, depth, code)
+
+    def _revision_code(self, revision_id):
+        row = self._conn.execute("SELECT tab_id, depth FROM revisions WHERE id = ?", (revision_id,)).fetchone()
+        if not row:
+            return None
+        # Revisions of a tab are chained one after another back to the last snapshot.
+        chain = self._conn.execute(
+            "SELECT depth, data FROM revisions WHERE tab_id = ? AND id <= ? ORDER BY id DESC LIMIT ?",
+            (row[0], revision_id, row[1] + 1)).fetchall()
+        return rebuild(reversed(chain))
+
+    def list_revisions(self, tab_id) -> list[Revision]:
+        """Revisions of ``tab_id``, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, tab_id, timestamp, depth = 0, length(data) FROM revisions "
+                "WHERE tab_id = ? ORDER BY id DESC", (tab_id,)).fetchall()
+        return [Revision(code_id, tab, timestamp, bool(snapshot), size)
+                for code_id, tab, timestamp, snapshot, size in rows]
+
+    def revision_code(self, revision_id) -> Optional[str]:
+        with self._lock:
+            return self._revision_code(revision_id)
+
+    def restore_revision(self, revision_id):
+        """Make an old revision the tab's current code (recorded as a new revision)."""
+        with self._lock:
+            row = self._conn.execute("SELECT tab_id FROM revisions WHERE id = ?", (revision_id,)).fetchone()
+            if row:
+                self.upsert_code(row[0], self._revision_code(revision_id))
+
+    def count_codes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM codes").fetchone()[0]
+
+    def codes_before(self, before_id=None, limit=50) -> list[CodeSummary]:
+        """Summaries of the ``limit`` newest codes older than ``before_id`` (keyset page)."""
+        with self._lock:
+            if before_id is None:
+                rows = self._conn.execute(f"SELECT {SUMMARY_COLUMNS} FROM codes ORDER BY id DESC LIMIT ?",
+                                          (limit,)).fetchall()
+            else:
+                rows = self._conn.execute(
+                    f"SELECT {SUMMARY_COLUMNS} FROM codes WHERE id < ? ORDER BY id DESC LIMIT ?",
+                    (before_id, limit)).fetchall()
+        return [_summary(row) for row in rows]
+
+    def codes_after(self, after_id, limit=50) -> list[CodeSummary]:
+        """Summaries of the ``limit`` codes just newer than ``after_id``, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {SUMMARY_COLUMNS} FROM codes WHERE id > ? ORDER BY id ASC LIMIT ?",
+                (after_id, limit)).fetchall()
+        return [_summary(row) for row in reversed(rows)]
+
+    def codes_at(self, offset, limit=50) -> list[CodeSummary]:
+        """Summaries starting at position ``offset``, newest first (for scrollbar jumps)."""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {SUMMARY_COLUMNS} FROM codes ORDER BY id DESC LIMIT ? OFFSET ?",
+                                      (limit, offset)).fetchall()
+        return [_summary(row) for row in rows]
+
+    def search_codes(self, text, limit=SEARCH_LIMIT, code_id=None) -> list[CodeSummary]:
+        """Best matches for ``text`` first; ``preview`` is a snippet with the
+        matched terms wrapped in MATCH_START/MATCH_END. ``code_id`` limits
+        the search to that one code."""
+        query = fts_query(text)
+        if not query:
+            return []
+        with self._lock:
+            if self.has_full_text:
+                rows = self._conn.execute("""
+                    SELECT c.id, c.tab_id, c.timestamp, snippet(codes_fts, 0, ?, ?, '...', 16)
+                    FROM codes_fts JOIN codes c ON c.id = codes_fts.rowid
+                    WHERE codes_fts MATCH ? AND (? IS NULL OR c.id = ?) ORDER BY rank LIMIT ?
+                """, (MATCH_START, MATCH_END, query, code_id, code_id, limit)).fetchall()
+                return [CodeSummary(*row) for row in rows]
+            rows = self._conn.execute(
+                f"SELECT {SUMMARY_COLUMNS} FROM codes WHERE code LIKE ? AND (? IS NULL OR id = ?)"
+                " ORDER BY id DESC LIMIT ?", (f"%{text.strip()}%", code_id, code_id, limit)).fetchall()
+        return [_summary(row) for row in rows]
+
+    @property
+    def has_full_text(self):
+        if self._has_full_text is None:
+            with self._lock:
+                self._has_full_text = self._conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'codes_fts'").fetchone() is not None
+        return self._has_full_text
+
+    def code_summary(self, code_id) -> Optional[CodeSummary]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {SUMMARY_COLUMNS} FROM codes WHERE id = ?", (code_id,)).fetchone()
+        return _summary(row) if row else None
+
+    def get_code(self, code_id) -> Optional[SavedCode]:
+        with self._lock:
+            row = self._conn.execute("SELECT id, tab_id, timestamp, code FROM codes WHERE id = ?",
+                                     (code_id,)).fetchone()
+        return SavedCode(*row) if row else None
+
+    def update_code(self, code_id, code):
+        with self._lock:
+            code_hash = content_hash(code)
+            row = self._conn.execute("SELECT tab_id FROM codes WHERE id = ?", (code_id,)).fetchone()
+            if row:
+                self._add_revision(row[0], code, code_hash)
+            self._write("UPDATE codes SET code = ?, code_hash = ?, timestamp = ? WHERE id = ?",
+                        (code, code_hash, int(time.time()), code_id))
+
+    def delete_code(self, code_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM runs WHERE code_id = ?", (code_id,))
+            self._write("DELETE FROM codes WHERE id = ?", (code_id,))
+
+    def add_run(self, tab_id, code, wall_seconds, cpu_seconds, peak_rss_kb, output_bytes, exit_code, reason=None):
+        """Record a finished run of ``code`` against the tab's saved code row."""
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM codes WHERE tab_id = ? ORDER BY id DESC LIMIT 1",
+                                     (tab_id,)).fetchone()
+            self._write("INSERT INTO runs (code_id, tab_id, code_hash, timestamp, wall_seconds, cpu_seconds,"
+                        " peak_rss_kb, output_bytes, exit_code, reason) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (row[0] if row else None, tab_id, content_hash(normalize_code(code)), int(time.time()),
+                         wall_seconds, cpu_seconds, peak_rss_kb, output_bytes, exit_code, reason))
+
+    def list_runs(self, code_id, limit=50) -> list[RunReport]:
+        """Latest runs of a saved code, newest first."""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {RUN_COLUMNS} FROM runs WHERE code_id = ? ORDER BY id DESC LIMIT ?",
+                                      (code_id, limit)).fetchall()
+        return [RunReport(*row) for row in rows]
+
+    def last_run(self, tab_id) -> Optional[RunReport]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {RUN_COLUMNS} FROM runs WHERE tab_id = ? ORDER BY id DESC LIMIT 1",
+                                     (tab_id,)).fetchone()
+        return RunReport(*row) if row else None
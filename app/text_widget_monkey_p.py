@@ -1,24 +1,71 @@
+import contextlib
 import re
 import subprocess
 import sys
+import time
 import tkinter as tk
 
 # Save original Text class
 from tkinter import messagebox
 import builtins
-import inspect
+import types
 from keyword import kwlist
+from .document import Document
+from .highlighter import HIGHLIGHT_TAGS, LineHighlighter
+from .completion import COMPLETION_POLL_MS, MISSING, get_completion_service
+from .completion_index import CompletionIndex, merge_completions
 
-builtin_functions = [name for name, obj in vars(builtins).items()
-                     if inspect.isbuiltin(obj) or inspect.isfunction(obj)]
+BUILTIN_FUNCTIONS = frozenset(name for name, obj in vars(builtins).items()
+                              if isinstance(obj, (types.BuiltinFunctionType, types.FunctionType)))
 
-BUILTIN_FUNCTIONS = set(builtin_functions)
+KEYWORDS = frozenset(kwlist)
 
-KEYWORDS = set(kwlist)
+STATIC_COMPLETIONS = CompletionIndex(KEYWORDS | BUILTIN_FUNCTIONS)
+
+WORKBOOK_CACHE_SECONDS = 5
+_workbook_cache = (0.0, [])
+
+
+def _workbook_names():
+    global _workbook_cache
+    fetched_at, names = _workbook_cache
+    if time.monotonic() - fetched_at > WORKBOOK_CACHE_SECONDS:
+        try:
+            import xlwings as xw
+            names = [b.name for b in xw.books]
+        except Exception as e:
+            print(repr(e))
+            names = []
+        _workbook_cache = (time.monotonic(), names)
+    return list(names)
+
+
+# Body of the Tcl proc that takes the place of a Text widget's command. Only
+# edits call into Python (``hook before <cmd> <args>`` and ``hook after``
+# around the real call); everything else, and every Tcl error, stays in Tcl
+# and reaches the caller as usual. Errors raised by Python code called from
+# Tcl would instead stop mainloop(), even when the caller catches them.
+EDIT_PROXY = """
+    if {$cmd in {insert delete replace}} {
+        %(hook)s before $cmd {*}$args
+        set result [uplevel 1 [list %(orig)s $cmd {*}$args]]
+        %(hook)s after
+        return $result
+    }
+    uplevel 1 [list %(orig)s $cmd {*}$args]
+"""
+
+
+def install_edit_proxy(interp, command, hook):
+    """Move Tcl ``command`` to ``<command>_orig`` and put an EDIT_PROXY proc calling ``hook`` in its place.
+
+    Returns the new name of the original command.
+    """
+    orig = command + "_orig"
+    interp.call("rename", command, orig)
+    interp.call("proc", command, "cmd args", EDIT_PROXY % {"hook": hook, "orig": orig})
+    return orig
 
-# Prepare regex
-KEYWORD_PATTERN = re.compile(r'\b(' + '|'.join(re.escape(w) for w in KEYWORDS) + r')\b')
-BUILTIN_PATTERN = re.compile(r'\b(' + '|'.join(re.escape(w) for w in BUILTIN_FUNCTIONS) + r')\b')
 
 OriginalText = tk.Text
 
@@ -29,24 +76,155 @@ class PatchedText(OriginalText):
         super().__init__(*args, **kwargs)
 
         self._colorify_after_id = None
+        self._bulk_depth = 0
+        self._identifiers = CompletionIndex()
+        self._highlighter = LineHighlighter(KEYWORDS, BUILTIN_FUNCTIONS, self._identifiers)
+        self._document = Document()
+        self._document_stale = False
+        self._pending_edit = None  # (start, end, chars) of the edit being made
+        # Proxy the Tcl widget command so every insert/delete, including the
+        # ones done by Tk's own key bindings and undo, is seen.
+        self._orig_widget_cmd = install_edit_proxy(self.tk, self._w, self.register(self._on_edit))
         self.customize_text_widget()
         self.char_count = 0
         self.used_paste = False
         self.active_menu = None
         self.local_scope = {}
-        try:
-            import jedi
-            self.jedi = jedi
-        except ImportError:
-            jedi = None
-            self.jedi = None
-            print("Jedi is not installed")
 
     def insert(self, index, chars, *args):
         result = super().insert(index, chars, *args)
         self.after_colorify()  # or self.colorify() if you want immediate
         return result
 
+    def destroy(self):
+        super().destroy()
+        try:
+            self.tk.call("rename", self._w, "")  # the proxy proc outlives the widget otherwise
+        except tk.TclError:
+            pass
+
+    def _position(self, index):
+        line, col = self.tk.call(self._orig_widget_cmd, "index", index).split(".")
+        return int(line), int(col)
+
+    def _on_edit(self, phase, cmd=None, *args):
+        """Called by the widget's proxy proc before and after each insert/delete/replace."""
+        try:
+            if phase == "before":
+                # An edit that fails in Tk never gets its "after" call; this replaces what it left.
+                self._pending_edit = None
+                self._pending_edit = self._before_edit(cmd, args)
+                return
+            edit, self._pending_edit = self._pending_edit, None
+            if edit and not self._document_stale:
+                self._document.replace(*edit)
+        except Exception as ex:
+            # Never let an exception out into Tcl; re-read the text when next needed instead.
+            print("Edit Hook Error:", repr(ex))
+            self._document_stale = True
+
+    def _before_edit(self, cmd, args):
+        if getattr(self, 'disable_colorify', False):
+            self._document_stale = True  # not tracked (output panes); read back if ever asked for
+        elif cmd == "insert":
+            return self._note_edit(args[0], args[0], "".join(args[1::2]))
+        elif cmd == "delete" and len(args) > 2:
+            self._document_stale = True  # several ranges at once
+            self._highlighter.reset()
+        elif cmd == "delete":
+            return self._note_edit(args[0], args[1] if len(args) > 1 else None, "")
+        else:
+            return self._note_edit(args[0], args[1], "".join(args[2::2]))
+        return None
+
+    def _note_edit(self, start_index, end_index, chars):
+        """Resolve an edit's range the way Tk will and tell the highlighter; returns (start, end, chars).
+
+        ``end_index`` None means the character at ``start_index``.
+        """
+        last = self._index("end-1c")
+        start = end = self._index(start_index)
+        if end_index is None:
+            end_index = "%d.%d+1c" % start
+        if end_index != start_index:
+            end = self._index(end_index)
+            if end <= start:
+                end = start  # Tk leaves the text alone
+            elif end > last and start[1] == 0 and start[0] > 1:
+                # Tk never deletes the final newline; a range from a line start
+                # through it takes the line break before the range instead.
+                start = self._index(f"{start[0] - 1}.end")
+        start, end = min(start, last), min(end, last)
+        self._highlighter.replace_lines(start[0] - 1, end[0] - start[0], chars.count("\n"))
+        return start, end, chars
+
+    def _index(self, index):
+        """``(line, col)`` of a Tk index, from the Document while it is in sync and
+        understands the index, from the widget otherwise."""
+        if not self._document_stale:
+            position = self._document.resolve(index)
+            if position:
+                return position
+        return self._position(index)
+
+    @contextlib.contextmanager
+    def bulk_edit(self):
+        """Group the edits made inside the block into one undo step and one
+        highlighting pass, however many inserts and deletes they take."""
+        self._bulk_depth += 1
+        if self._bulk_depth == 1:
+            autoseparators = self.cget("autoseparators")
+            self.configure(autoseparators=False)
+            self.edit_separator()
+        try:
+            yield self
+        finally:
+            self._bulk_depth -= 1
+            if not self._bulk_depth:
+                self.edit_separator()
+                self.configure(autoseparators=autoseparators)
+                self.after_colorify()
+
+    def rewrite_lines(self, start_line, end_line, rewrite):
+        """Replace each of lines ``start_line``..``end_line`` by ``rewrite(line)`` in a single edit.
+
+        The cursor and the selection stay on the same characters as far as
+        the rewrite allows.
+        """
+        old = self.get_document().get_lines(start_line, end_line)
+        new = [rewrite(line) for line in old]
+        if new == old:
+            return
+        marks = [("insert", self._position("insert"))]
+        try:
+            marks += [("sel.first", self._position("sel.first")), ("sel.last", self._position("sel.last"))]
+        except tk.TclError:
+            pass
+
+        def moved(line, col):
+            if start_line <= line <= end_line and col:
+                i = line - start_line
+                col = max(0, min(len(new[i]), col + len(new[i]) - len(old[i])))
+            return f"{line}.{col}"
+
+        with self.bulk_edit():
+            self.replace(f"{start_line}.0", f"{end_line}.end", "\n".join(new))
+        positions = {name: moved(*position) for name, position in marks}
+        self.mark_set("insert", positions["insert"])
+        if "sel.first" in positions:
+            self.tag_add("sel", positions["sel.first"], positions["sel.last"])
+
+    def get_document(self):
+        """The Document mirroring this widget, read back from Tk first if it went out of sync."""
+        if self._document_stale:
+            self._document.reset(self.tk.call(self._orig_widget_cmd, "get", "1.0", "end-1c"))
+            self._document_stale = False
+        return self._document
+
+    def snapshot(self):
+        """The whole text (without Tk's trailing newline), without copying it out of Tk on every call."""
+        return self.get_document().snapshot()
+
     def customize_text_widget(self):
         # Set visual tab width to 4 characters
         self.config(tabs="4c")
@@ -82,8 +260,7 @@ class PatchedText(OriginalText):
         try:
             subprocess.run([sys.executable, "-m", "pip", "install", "jedi"], check=True)
             # messagebox.showinfo("Success", "Jedi installed successfully. Restarting app...")
-            import jedi
-            self.jedi = jedi
+            get_completion_service().reload()
             # self.restart_app()
         except subprocess.CalledProcessError as e:
             messagebox.showerror("Error", f"Failed to install Jedi:\n{e}")
@@ -120,14 +297,7 @@ class PatchedText(OriginalText):
                 text.delete(start_idx, end_idx)
 
                 # Get open workbooks
-                try:
-                    import xlwings as xw
-                    workbooks = [b.name for b in xw.books]
-                except Exception as e:
-                    print(repr(e))
-                    workbooks = []
-
-                return workbooks  # Only return if matched and inside quotes
+                return _workbook_names()  # Only return if matched and inside quotes
 
         return  # Cursor not inside any match, do nothing
 
@@ -155,23 +325,13 @@ class PatchedText(OriginalText):
                     start_line = end_line = line
 
                 # First check: do all lines start with '#'
-                all_commented = True
-                for line in range(start_line, end_line + 1):
-                    line_text = text.get(f"{line}.0", f"{line}.end")
-                    if not line_text.lstrip().startswith("#"):
-                        all_commented = False
-                        break
-
-                for line in range(start_line, end_line + 1):
-                    line_start = f"{line}.0"
-                    if all_commented:
-                        # Uncomment: remove first #
-                        idx = text.search(r'#', line_start, f"{line}.end", regexp=True)
-                        if idx:
-                            text.delete(idx)
-                    else:
-                        # Comment: insert #
-                        text.insert(line_start, "#")
+                lines = text.get_document().get_lines(start_line, end_line)
+                if all(line.lstrip().startswith("#") for line in lines):
+                    # Uncomment: remove first #
+                    text.rewrite_lines(start_line, end_line, lambda line: line.replace("#", "", 1))
+                else:
+                    # Comment: insert #
+                    text.rewrite_lines(start_line, end_line, lambda line: "#" + line)
 
                 return 'break'
 
@@ -204,8 +364,8 @@ class PatchedText(OriginalText):
         if event.char in pairs:
             if selected:
                 selected_text = text.get(start, end)
-                text.delete(start, end)
-                text.insert(start, event.char + selected_text + pairs[event.char])
+                with text.bulk_edit():
+                    text.replace(start, end, event.char + selected_text + pairs[event.char])
                 text.mark_set("insert", f"{start}+{len(event.char + selected_text) + 1}c")
                 return "break"
 
@@ -240,14 +400,11 @@ class PatchedText(OriginalText):
                     sel_end = text.index("sel.last")
                     start_line = int(sel_start.split('.')[0])
                     end_line = int(sel_end.split('.')[0])
-                    for line in range(start_line, end_line + 1):
-                        text.insert(f"{line}.0", "    ")
+                    text.rewrite_lines(start_line, end_line, lambda line: "    " + line)
                     return "break"  # ← Don't try autocomplete if indenting block
                 except tk.TclError:
                     pass  # No selection, continue with normal autocomplete
 
-                # Get full code
-                code = text.get("1.0", "end")
                 line_str, col_str = text.index("insert").split(".")
                 line = int(line_str)
                 column = int(col_str)
@@ -265,21 +422,61 @@ class PatchedText(OriginalText):
                     text.insert("insert", "    ")
                     return "break"
 
-                # Jedi autocomplete
-                if not self.jedi:
+                # Names (not attributes) come straight from the local index
+                service = get_completion_service()
+                if not current_line[:len(current_line) - len(prefix)].endswith("."):
+                    completions = text.local_completions(prefix)
+                    if completions or service.state == MISSING:
+                        return self._show_completions(text, completions, presorted=True)
+
+                # Jedi autocomplete, computed on the completion thread (nothing
+                # shows until Jedi has loaded there)
+                if service.state == MISSING:
                     print("jedi not installed, cancel autocompletion ...")
                     return "break"
-                script = self.jedi.Script(code=code, path="script.py")
-                completions = script.complete(line, column)
-                completions = [
-                    x.name for x in completions
-                    if not x.name.startswith("__") and x.name.startswith(prefix)
-                ]
+                code = text.snapshot()
+                self._request_completion(service, text, code, line, column, prefix)
+                return "break"
+
+            return self._show_completions(text, completions)
+        except Exception as e:
+            print("Autocomplete error:", e)
+            return "break"
 
+    def _request_completion(self, service, text, code, line, column, prefix):
+        # A fixed path per widget lets Jedi reuse what it parsed last time.
+        generation = service.submit(code, f"script_{id(text)}.py", line, column)
+        cursor = text.index("insert")
+
+        def poll():
+            if service.generation != generation:
+                return  # a newer request took over
+            if text.index("insert") != cursor:
+                service.cancel()  # user kept typing; the answer is stale
+                return
+            names = service.take_result(generation)
+            if names is None:
+                self.after(COMPLETION_POLL_MS, poll)
+                return
+            self._show_completions(text, [name for name in names if name.startswith(prefix)])
+
+        self.after(COMPLETION_POLL_MS, poll)
+
+    def local_completions(self, prefix):
+        """Keywords, builtins and identifiers of this buffer starting with ``prefix``."""
+        if getattr(self, 'disable_colorify', False):
+            return []
+        # Harvest identifiers of lines not lexed yet (only edited lines after the first time).
+        self._highlighter.update(self._fetch_lines, int(self.index("end-1c").split('.')[0]))
+        return merge_completions(STATIC_COMPLETIONS.complete(prefix), self._identifiers.complete(prefix))
+
+    def _show_completions(self, text, completions, presorted=False):
+        try:
             if not completions:
                 return "break"
 
-            completions.sort(key=lambda x: x.lower())
+            if not presorted:
+                completions.sort(key=lambda x: x.lower())
 
             if len(completions) == 1:
                 return self.insert_completion(completions[0], text=text)
@@ -447,73 +644,50 @@ class PatchedText(OriginalText):
             self.after_cancel(self._colorify_after_id)
             self._colorify_after_id = None
 
-        text = self.get_active_text()
-        if not text or getattr(text, 'disable_colorify', False):
+        if getattr(self, 'disable_colorify', False):
             return
 
-        code = text.get("1.0", "end")
-        # Clear old tags
-        text.tag_remove("comment", "1.0", "end")
-        text.tag_remove("keyword", "1.0", "end")
-        text.tag_remove("string", "1.0", "end")
-        text.tag_remove("builtin", "1.0", "end")
-
         # Determine visible area
         try:
-            first_visible = text.index("@0,0")
-            last_visible = text.index(f"@0,{text.winfo_height()}")
+            first_visible = self.index("@0,0")
+            last_visible = self.index(f"@0,{self.winfo_height()}")
             start_line = int(first_visible.split('.')[0])
             end_line = int(last_visible.split('.')[0])
         except Exception:
             # Fallback to all lines
             start_line = 1
-            end_line = int(text.index("end-1c").split('.')[0])
-
-        # Highlight only visible lines
-        for i in range(start_line, end_line + 1):
-            line = text.get(f"{i}.0", f"{i}.end")
-            stripped = line.lstrip()
-
-            # Highlight comment
-            if stripped.startswith("#"):
-                start_index = f"{i}.0+{len(line) - len(stripped)}c"
-                end_index = f"{i}.end"
-                text.tag_add("comment", start_index, end_index)
-
-            # Highlight KEYWORDS (skip content after #)
-            comment_pos = line.find("#")
-            scan_line = line if comment_pos == -1 else line[:comment_pos]
-
-            for match in KEYWORD_PATTERN.finditer(scan_line):
-                start_col = match.start()
-                end_col = match.end()
-                start_idx = f"{i}.{start_col}"
-                end_idx = f"{i}.{end_col}"
-                text.tag_add("keyword", start_idx, end_idx)
-
-            for match in BUILTIN_PATTERN.finditer(scan_line):
-                start_col = match.start()
-                end_col = match.end()
-                start_idx = f"{i}.{start_col}"
-                end_idx = f"{i}.{end_col}"
-                text.tag_add("builtin", start_idx, end_idx)
-
-            for match in re.finditer(r'(\'(?:\\.|[^\\\'])*?\'|"(?:\\.|[^\\"])*?")', scan_line):
-                start_col = match.start()
-                end_col = match.end()
-                start_idx = f"{i}.{start_col}"
-                end_idx = f"{i}.{end_col}"
-                text.tag_add("string", start_idx, end_idx)
-
-            pattern = r"('''(?:\\.|[^\\])*?'''|\"\"\"(?:\\.|[^\\])*?\"\"\")"
-            for match in re.finditer(pattern, code, re.DOTALL):
-                start = match.start()
-                end = match.end()
-                start_index = text.index(f"1.0 + {start} chars")
-                end_index = text.index(f"1.0 + {end} chars")
-                text.tag_add("string", start_index, end_index)
+            end_line = int(self.index("end-1c").split('.')[0])
+
+        # Re-lex only from the first edited line, then tag the visible lines
+        # whose tokens are not on the widget yet.
+        highlighter = self._highlighter
+        highlighter.update(self._fetch_lines, end_line)
+        lines = [i for i in range(start_line - 1, min(end_line, highlighter.valid)) if not highlighter.tagged[i]]
+        if lines:
+            self._retag_lines(lines)
+
+    def _fetch_lines(self, start, stop):
+        return self.get_document().get_lines(start + 1, stop)
+
+    def _retag_lines(self, lines):
+        """Bring the tags of ``lines`` (0-based) in line with their tokens, in two Tcl calls per tag."""
+        highlighter = self._highlighter
+        cleared = []
+        ranges = {tag: [] for tag in HIGHLIGHT_TAGS}
+        for i in lines:
+            line = i + 1
+            cleared += (f"{line}.0", f"{line}.end")
+            for tag, start_col, end_col in highlighter.tokens[i]:
+                ranges[tag] += (f"{line}.{start_col}", f"{line}.{end_col}")
+            highlighter.tagged[i] = True
+        for tag in HIGHLIGHT_TAGS:
+            self.tk.call(self._orig_widget_cmd, "tag", "remove", tag, *cleared)
+            if ranges[tag]:
+                self.tk.call(self._orig_widget_cmd, "tag", "add", tag, *ranges[tag])
 
     def after_colorify(self, delay=100):
+        if self._bulk_depth:
+            return  # bulk_edit() schedules it once at the end
         if self._colorify_after_id:
             self.after_cancel(self._colorify_after_id)
         self._colorify_after_id = self.after(delay, self.colorify)
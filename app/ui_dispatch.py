@@ -0,0 +1,113 @@
+import collections
+import threading
+import time
+
+UI_PUMP_MS = 20  # how often the Tk thread looks for work
+UI_BUDGET_MS = 8  # Tk-thread time spent on queued work per tick
+
+CALL = "call"
+APPEND = "append"
+
+
+class UiDispatcher:
+    """The only way worker threads get something done to Tk widgets.
+
+    Workers post messages (a function to call, or text to append to a Text
+    widget) and stream OutputRingBuffers; one ``after()`` pump on the Tk
+    thread handles them, stopping each tick once ``budget_ms`` is spent so
+    the editor keeps handling input. Consecutive appends to the same widget
+    are joined into a single insert.
+    """
+
+    def __init__(self, root, interval_ms=UI_PUMP_MS, budget_ms=UI_BUDGET_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.budget = budget_ms / 1000
+        self.max_lines = {}  # widget -> lines kept by appends
+        self._messages = collections.deque()
+        self._streams = []  # [buffer, widget] pairs
+        self._lock = threading.Lock()
+        self._after_id = root.after(interval_ms, self._pump)
+
+    def call(self, func, *args):
+        """Run ``func(*args)`` on the Tk thread."""
+        self._messages.append((CALL, func, args))
+
+    def append(self, widget, text):
+        """Insert ``text`` at the end of ``widget`` and scroll to it."""
+        self._messages.append((APPEND, widget, text))
+
+    def stream(self, buffer, widget, max_lines=None):
+        """Copy what arrives in ``buffer`` into ``widget`` until the buffer is closed and empty."""
+        if max_lines:
+            self.max_lines[widget] = max_lines
+        with self._lock:
+            self._streams.append([buffer, widget])
+
+    @property
+    def busy(self):
+        """Whether streams or messages are still waiting for the pump."""
+        return bool(self._streams or self._messages)
+
+    def close(self):
+        if self._after_id:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _pump(self):
+        deadline = time.perf_counter() + self.budget
+        with self._lock:
+            streams = list(self._streams)
+        for index, entry in enumerate(streams):
+            if index and time.perf_counter() >= deadline:
+                # Start with the streams not reached next tick. Messages wait as
+                # well: they may be about output (a run's end) still in these buffers.
+                with self._lock:
+                    for left in reversed(streams[index:]):
+                        self._streams.remove(left)
+                        self._streams.insert(0, left)
+                self._after_id = self.root.after(1, self._pump)
+                return
+            try:
+                done = self._drain(*entry)
+            except Exception as ex:
+                print("UI Dispatch Error:", repr(ex))
+                done = True
+            if done:
+                with self._lock:
+                    self._streams.remove(entry)
+
+        messages = self._messages
+        while messages and time.perf_counter() < deadline:
+            kind, target, payload = messages.popleft()
+            try:
+                if kind == APPEND:
+                    parts = [payload]
+                    while messages and messages[0][0] == APPEND and messages[0][1] is target:
+                        parts.append(messages.popleft()[2])
+                    self._insert(target, "".join(parts))
+                else:
+                    target(*payload)
+            except Exception as ex:
+                print("UI Dispatch Error:", repr(ex))
+        # Come back right away while work is left over, after the events waiting meanwhile.
+        self._after_id = self.root.after(1 if messages else self.interval_ms, self._pump)
+
+    def _drain(self, buffer, widget):
+        """Insert what ``buffer`` holds into ``widget``; True once the buffer is closed and empty."""
+        closed = buffer.closed
+        chunk = buffer.drain()
+        if chunk:
+            self._insert(widget, chunk)
+        return closed and not chunk
+
+    def _insert(self, widget, text):
+        if not widget.winfo_exists():
+            return
+        widget.insert("end", text)
+        max_lines = self.max_lines.get(widget)
+        if max_lines:
+            lines = int(widget.index("end-1c").split(".")[0])
+            if lines > max_lines:
+                widget.delete("1.0", f"{lines - max_lines + 1}.0")
+        widget.see("end")
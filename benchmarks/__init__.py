@@ -0,0 +1,5 @@
+# Benchmarks of the editor's hot paths: highlighting, name checking and
+# lint, the code store, the saved-codes browser and run output. Run
+#   python -m benchmarks --out results.json
+# (under xvfb-run on machines without a display, or the widget suites are
+# skipped) and diff the JSON of two versions.
@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from app.storage import CodeStore
+
+from . import analysis, editor, output, storage
+from .harness import DEFAULT_REPEAT, MAX_CASE_SECONDS, Results
+
+SUITES = ("colorify", "analysis", "storage", "browser", "output")
+SIZES = (100, 1_000, 10_000, 50_000)  # lines of the synthetic modules
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the editor's hot paths.")
+    parser.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES), help="lines of the synthetic modules")
+    parser.add_argument("--db-rows", type=int, default=storage.DB_ROWS)
+    parser.add_argument("--output-sizes", nargs="+", type=int, default=list(output.OUTPUT_SIZES),
+                        help="bytes printed by the child")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="samples per case")
+    parser.add_argument("--max-case-seconds", type=float, default=MAX_CASE_SECONDS)
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    parser.add_argument("--quiet", action="store_true", help="no progress on stderr")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = Results(args.repeat, args.max_case_seconds, verbose=not args.quiet)
+    suites = set(args.suite)
+
+    root = None
+    if suites & {"colorify", "browser", "output"}:
+        root, reason = editor.tk_root()
+        if root is None:
+            for name in sorted(suites & {"colorify", "browser"}):
+                results.skip(name, reason)
+
+    try:
+        if "colorify" in suites and root:
+            editor.run_colorify(results, root, args.sizes)
+        if "analysis" in suites:
+            analysis.run(results, args.sizes)
+        if suites & {"storage", "browser"}:
+            with tempfile.TemporaryDirectory() as directory:
+                store = CodeStore(os.path.join(directory, "bench.db"))
+                try:
+                    storage.fill(store, args.db_rows)
+                    if "storage" in suites:
+                        storage.run(results, store, args.db_rows)
+                    if "browser" in suites and root:
+                        editor.run_browser(results, root, store, args.db_rows)
+                finally:
+                    store.close()
+        if "output" in suites:
+            output.run(results, args.output_sizes, root)
+    finally:
+        if root:
+            root.destroy()
+
+    report = json.dumps(results.report(), indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,27 @@
+"""Name checking and live lint on synthetic modules."""
+import ast
+
+from app.linter import lint_code
+from app.name_checker import NameChecker
+
+from .harness import synthetic_source
+
+
+def run(results, sizes):
+    for lines in sizes:
+        source = synthetic_source(lines)
+        tree = ast.parse(source)
+
+        def check(_):
+            checker = NameChecker()
+            checker.visit(tree)
+            return {"errors": len(checker.errors)}
+
+        results.measure("name_checker.visit", check, lines=lines)
+        results.measure("lint.cold", lambda _: lint_code(source), lines=lines)
+
+        # A keystroke in the middle of the file: only the edited block is analyzed again.
+        _, cache = lint_code(source)
+        middle = len(source) // 2
+        edited = source[:middle] + source[middle:].replace("total = 0", "total = 1", 1)
+        results.measure("lint.edit", lambda _: lint_code(edited, dict(cache)), lines=lines)
@@ -0,0 +1,130 @@
+"""Widget benchmarks: highlighting in PatchedText and building the saved-codes browser.
+
+They need a display; on build boxes run them under Xvfb (``xvfb-run python -m benchmarks``).
+"""
+import tkinter as tk
+
+from app.code_browser import SavedCodesBrowser
+
+from .harness import synthetic_source
+
+WINDOW_GEOMETRY = "1200x900"
+
+
+def tk_root():
+    """``(root, None)``, or ``(None, reason)`` when Tk cannot start (no display)."""
+    try:
+        root = tk.Tk()
+    except tk.TclError as ex:
+        return None, str(ex)
+    root.geometry(WINDOW_GEOMETRY)
+    return root, None
+
+
+class EditorFixture:
+    """One editor widget at a time, filled with a synthetic module.
+
+    Importing ``app`` has replaced tk.Text by PatchedText already.
+    """
+
+    def __init__(self, root, source):
+        self.root = root
+        self.source = source
+        self.text = None
+
+    def fresh(self):
+        if self.text is not None:
+            self.text.destroy()
+        self.text = tk.Text(self.root, wrap="none", font=("Courier", 16, "bold"), undo=True)
+        self.text.pack(fill="both", expand=True)
+        self.text.insert("1.0", self.source)
+        self.root.update()
+        return self.text
+
+    def highlighted(self):
+        self.fresh()
+        self.text.colorify()
+        return self.text
+
+    def close(self):
+        if self.text is not None:
+            self.text.destroy()
+            self.text = None
+
+
+def middle_visible_line(text):
+    first = int(text.index("@0,0").split(".")[0])
+    last = int(text.index(f"@0,{text.winfo_height()}").split(".")[0])
+    return (first + last) // 2
+
+
+def run_colorify(results, root, sizes):
+    for lines in sizes:
+        fixture = EditorFixture(root, synthetic_source(lines))
+        try:
+            # Opening a file: lex and tag what is on screen.
+            results.measure("colorify.open", lambda text: text.colorify(), setup=fixture.fresh, lines=lines)
+
+            # Jumping to the end lexes everything above it once.
+            def scroll_end(text):
+                text.see("end")
+                text.colorify()
+            results.measure("colorify.scroll_end", scroll_end, setup=fixture.fresh, lines=lines)
+
+            # A keystroke in the middle of the screen.
+            text = fixture.highlighted()
+            line = middle_visible_line(text)
+
+            def keystroke(_):
+                text.insert(f"{line}.4", "x")
+                text.colorify()
+            results.measure("colorify.keystroke", keystroke, lines=lines)
+
+            # Opening a triple-quoted string on the first line flips the state of every line after it.
+            text.see("1.0")
+            text.colorify()
+            opened = [False]
+
+            def toggle_string(_):
+                if opened[0]:
+                    text.delete("1.0", "1.3")
+                else:
+                    text.insert("1.0", '"""')
+                opened[0] = not opened[0]
+                text.colorify()
+            results.measure("colorify.triple_quote", toggle_string, lines=lines)
+
+            # Selecting a block and commenting it out, as Ctrl+/ does.
+            block_end = min(lines, 2000)
+            commented = [False]
+
+            def comment_block(_):
+                if commented[0]:
+                    text.rewrite_lines(1, block_end, lambda line: line[1:])
+                else:
+                    text.rewrite_lines(1, block_end, lambda line: "#" + line)
+                commented[0] = not commented[0]
+                text.colorify()
+            results.measure("bulk_edit.comment_block", comment_block, lines=lines, block=block_end)
+        finally:
+            fixture.close()
+
+
+def run_browser(results, root, store, rows):
+    # The browser only needs a Tk parent that carries the store.
+    root.store = store
+    windows = []
+
+    def setup():
+        while windows:
+            windows.pop().win.destroy()
+
+    def build(_):
+        browser = SavedCodesBrowser(root)
+        windows.append(browser)
+        browser.win.update()  # the first <Configure> renders the visible rows
+
+    try:
+        results.measure("manage_codes.open", build, setup=setup, rows=rows)
+    finally:
+        setup()
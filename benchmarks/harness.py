@@ -0,0 +1,135 @@
+import math
+import os
+import platform
+import sys
+import time
+
+DEFAULT_REPEAT = 20  # samples per case
+MAX_CASE_SECONDS = 10.0  # stop sampling a case after this long (keeping at least MIN_SAMPLES)
+MIN_SAMPLES = 3
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    summary = {
+        "samples": len(ordered),
+        "min": ordered[0],
+        "max": ordered[-1],
+        "mean": sum(ordered) / len(ordered),
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}"] = percentile(ordered, pct)
+    return summary
+
+
+def peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Results:
+    """Collects the cases of a benchmark session and turns them into the JSON report."""
+
+    def __init__(self, repeat=DEFAULT_REPEAT, max_case_seconds=MAX_CASE_SECONDS, verbose=True):
+        self.repeat = repeat
+        self.max_case_seconds = max_case_seconds
+        self.verbose = verbose
+        self.cases = []
+        self.skipped = []
+
+    def measure(self, name, func, setup=None, repeat=None, **params):
+        """Time ``func(state)`` where ``state = setup()`` is prepared, untimed, before every sample.
+
+        Extra keyword arguments are recorded as the case's parameters.
+        Whatever ``func`` returns last, if a dict, is stored with the case,
+        which is returned.
+        """
+        repeat = repeat or self.repeat
+        samples = []
+        extra = None
+        deadline = time.perf_counter() + self.max_case_seconds
+        while len(samples) < repeat:
+            state = setup() if setup else None
+            started = time.perf_counter()
+            extra = func(state)
+            samples.append(time.perf_counter() - started)
+            if len(samples) >= MIN_SAMPLES and time.perf_counter() > deadline:
+                break
+        return self.add(name, samples, extra if isinstance(extra, dict) else None, **params)
+
+    def add(self, name, samples, extra=None, **params):
+        case = {"name": name, "params": params, "unit": "s", **summarize(samples)}
+        if extra:
+            case.update(extra)
+        self.cases.append(case)
+        if self.verbose:
+            described = " ".join(f"{key}={value}" for key, value in params.items())
+            print(f"{name:<28} {described:<24} p50 {case['p50'] * 1000:10.3f} ms   "
+                  f"p90 {case['p90'] * 1000:10.3f} ms   n={case['samples']}", file=sys.stderr)
+        return case
+
+    def skip(self, name, reason):
+        self.skipped.append({"name": name, "reason": reason})
+        if self.verbose:
+            print(f"{name:<28} skipped: {reason}", file=sys.stderr)
+
+    def report(self):
+        return {
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": int(time.time()),
+            "peak_rss_kb": peak_rss_kb(),
+            "cases": self.cases,
+            "skipped": self.skipped,
+        }
+
+
+def synthetic_source(lines):
+    """A ``lines``-line Python module mixing functions, classes, comments, strings and docstrings.
+
+    Every name is bound before it is used, so the checker has nothing to
+    report and all the time goes into the walk itself.
+    """
+    out = ["import os", "import sys", ""]
+    i = 0
+    while True:
+        block = [
+            f"class Item{i}:",
+            f'    """Docstring of Item{i}.',
+            "",
+            "    It spans a few lines, like real ones do.",
+            '    """',
+            "",
+            "    def __init__(self, value):",
+            "        self.value = value  # keep it",
+            "",
+            f"def compute_{i}(values, factor={i}):",
+            "    total = 0",
+            "    for index, value in enumerate(values):",
+            "        if index % 2 and value is not None:",
+            "            total += value * factor",
+            "        elif isinstance(value, str):",
+            "            total += len(value.strip('\\'\"'))",
+            f"    result = [Item{i}(x) for x in range(total % 7)]",
+            f'    print(f"compute_{i}: {{total}} {{len(result)}}", file=sys.stderr)',
+            "    return os.path.join('a', str(total))",
+            "",
+        ]
+        if len(out) + len(block) > lines:
+            break
+        out += block
+        i += 1
+    out += ["# filler"] * (lines - len(out))
+    return "\n".join(out[:lines]) + "\n"
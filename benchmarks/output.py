@@ -0,0 +1,90 @@
+"""Run output handling: a child printing a lot, read the way App.run_code reads it.
+
+A worker thread reads the pipe into an OutputRingBuffer while this thread
+plays the Tk side: it drains the buffer every UI_PUMP_MS, either just
+decoding it (headless) or streaming it into an output Text through the
+UiDispatcher when a Tk root is available.
+"""
+import subprocess
+import sys
+import threading
+import time
+import tkinter as tk
+
+from app.editor_app import OUTPUT_BUFFER_BYTES, OUTPUT_MAX_LINES, READ_CHUNK_BYTES
+from app.output_buffer import OutputRingBuffer
+from app.ui_dispatch import UI_PUMP_MS, UiDispatcher
+
+OUTPUT_SIZES = (1 << 20, 64 << 20, 1 << 30)  # 1 MB to 1 GB
+
+CHILD = """
+import sys
+block = (b"x" * 99 + b"\\n") * 655
+left = int(sys.argv[1])
+while left > 0:
+    sys.stdout.buffer.write(block[:left])
+    left -= len(block)
+"""
+
+
+def start_child(size, buffer):
+    process = subprocess.Popen([sys.executable, "-c", CHILD, str(size)], stdout=subprocess.PIPE)
+
+    def read():
+        while data := process.stdout.read1(READ_CHUNK_BYTES):
+            buffer.append(data)
+        buffer.close(process.wait())
+
+    thread = threading.Thread(target=read, name="bench-reader", daemon=True)
+    thread.start()
+    return thread
+
+
+def pipe(size):
+    buffer = OutputRingBuffer(OUTPUT_BUFFER_BYTES)
+    start_child(size, buffer)
+    shown = 0
+    while True:
+        closed = buffer.closed
+        shown += len(buffer.drain())
+        if closed:
+            break
+        time.sleep(UI_PUMP_MS / 1000)
+    return {"bytes": buffer.total, "dropped": buffer.dropped, "shown_chars": shown}
+
+
+def widget(size, root, dispatcher, output):
+    output.delete("1.0", "end")
+    buffer = OutputRingBuffer(OUTPUT_BUFFER_BYTES)
+    dispatcher.stream(buffer, output, OUTPUT_MAX_LINES)
+    start_child(size, buffer)
+    while not buffer.closed or dispatcher.busy:
+        root.update()
+        time.sleep(0.001)
+    return {"bytes": buffer.total, "dropped": buffer.dropped,
+            "shown_lines": int(output.index("end-1c").split(".")[0])}
+
+
+def with_throughput(case):
+    case["mb_per_s"] = case["bytes"] / (1 << 20) / case["p50"]
+    return case
+
+
+def run(results, sizes=OUTPUT_SIZES, root=None):
+    for size in sizes:
+        with_throughput(results.measure("output.pipe", lambda _: pipe(size), bytes=size))
+
+    if root is None:
+        results.skip("output.widget", "no Tk root")
+        return
+    dispatcher = UiDispatcher(root)
+    output = tk.Text(root, wrap="none")
+    output.disable_colorify = True  # as the output console
+    output.pack(fill="both", expand=True)
+    try:
+        for size in sizes:
+            with_throughput(results.measure("output.widget", lambda _: widget(size, root, dispatcher, output),
+                                            bytes=size))
+    finally:
+        dispatcher.close()
+        output.destroy()
@@ -0,0 +1,26 @@
+"""Saving and restoring code on a database that already holds many rows."""
+from .harness import synthetic_source
+
+DB_ROWS = 100_000
+FILL_BATCH = 2_000
+CODE_LINES = 40  # size of each stored code
+
+
+def fill(store, rows):
+    code = synthetic_source(CODE_LINES)
+    for start in range(0, rows, FILL_BATCH):
+        store.upsert_codes({f"tab_{i}": f"{code}# {i}\n" for i in range(start, min(rows, start + FILL_BATCH))})
+
+
+def run(results, store, rows):
+    """Time the store's hot calls; ``store`` already holds ``rows`` codes (see fill())."""
+    code = synthetic_source(CODE_LINES)
+    edits = iter(range(10 ** 9))
+
+    # A changed code for an existing tab, as autosave sends after an edit.
+    results.measure("store.upsert_code", lambda _: store.upsert_code("tab_0", f"{code}# edit {next(edits)}\n"),
+                    rows=rows)
+    results.measure("store.upsert_code.new_tab", lambda _: store.upsert_code(f"new_{next(edits)}", code), rows=rows)
+    results.measure("store.flush", lambda _: store.flush(),
+                    setup=lambda: store.upsert_code("tab_1", f"{code}# flush {next(edits)}\n"), rows=rows)
+    results.measure("store.last_code", lambda _: store.last_code(), rows=rows)
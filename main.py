@@ -10,5 +10,9 @@ lib_path = os.path.join(base_dir, "lib")
 sys.path.insert(0, lib_path)
 
 if __name__ == "__main__":
-    app = App()
-    app.mainloop()
+    if "--startup-report" in sys.argv:
+        from app.startup import main
+        main()
+    else:
+        app = App()
+        app.mainloop()
@@ -0,0 +1,45 @@
+import threading
+
+from app.autosave import AutosaveWriter
+
+
+class SlowStore:
+    """Records upsert_codes calls; the first one waits until released."""
+
+    def __init__(self):
+        self.saved = []
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def upsert_codes(self, codes):
+        self.writing.set()
+        assert self.release.wait(5)
+        self.saved.append(codes)
+        if codes.get("tab_1") == "boom":
+            raise RuntimeError("disk full")
+
+
+def test_snapshots_queued_during_a_write_are_merged():
+    store = SlowStore()
+    writer = AutosaveWriter(store)
+    writer.submit({"tab_1": "a"})
+    assert store.writing.wait(5)
+    writer.submit({"tab_1": "b", "tab_2": "x"})
+    writer.submit({"tab_1": "c"})
+    writer.submit({})  # nothing to save is not queued
+    store.release.set()
+    writer.close()
+    assert store.saved == [{"tab_1": "a"}, {"tab_1": "c", "tab_2": "x"}]
+    assert not writer.is_alive()
+
+
+def test_a_failed_write_does_not_stop_the_writer(capsys):
+    store = SlowStore()
+    writer = AutosaveWriter(store)
+    writer.submit({"tab_1": "boom"})
+    assert store.writing.wait(5)
+    writer.submit({"tab_2": "y"})
+    store.release.set()
+    writer.close()
+    assert store.saved == [{"tab_1": "boom"}, {"tab_2": "y"}]
+    assert "Autosave Error" in capsys.readouterr().out
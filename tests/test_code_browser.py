@@ -0,0 +1,143 @@
+import pytest
+
+from app import code_browser
+from app.code_browser import CodePager, SearchResults
+from app.storage import MATCH_END, MATCH_START, SEARCH_LIMIT, CodeStore
+
+
+class RecordingStore(CodeStore):
+    """A CodeStore that notes which query each read used."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.queries = []
+
+    def codes_before(self, before_id=None, limit=50):
+        self.queries.append(("before", before_id))
+        return super().codes_before(before_id, limit)
+
+    def codes_after(self, after_id, limit=50):
+        self.queries.append(("after", after_id))
+        return super().codes_after(after_id, limit)
+
+    def codes_at(self, offset, limit=50):
+        self.queries.append(("at", offset))
+        return super().codes_at(offset, limit)
+
+    def search_codes(self, text, limit=SEARCH_LIMIT, code_id=None):
+        self.queries.append(("search", text, code_id))
+        return super().search_codes(text, limit, code_id)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RecordingStore(str(tmp_path / "app.db"))
+    store.upsert_codes({f"tab_{i}": f"x = {i}\n" for i in range(1, 131)})  # ids 1..130
+    yield store
+    store.close()
+
+
+def ids(rows):
+    return [row.id for row in rows]
+
+
+def test_pages_next_to_a_loaded_one_use_keyset_queries(store):
+    pager = CodePager(store, page_size=50)
+    assert pager.count == 130
+    assert ids(pager.rows(0, 3)) == [130, 129, 128]
+    assert ids(pager.rows(48, 52)) == [82, 81, 80, 79]  # across the first page boundary
+    assert ids(pager.rows(99, 130)) == list(range(31, 0, -1))  # the last page is short
+    assert store.queries == [("before", None), ("before", 81), ("before", 31)]
+
+
+def test_scrollbar_jump_falls_back_to_offset_then_pages_backwards(store):
+    pager = CodePager(store, page_size=50)
+    assert ids(pager.rows(100, 102)) == [30, 29]
+    assert ids(pager.rows(98, 101)) == [32, 31, 30]  # the page before, by keyset
+    assert ids(pager.rows(49, 51)) == [81, 80]
+    assert store.queries == [("at", 100), ("after", 30), ("after", 80)]
+
+
+def test_cached_pages_are_served_without_queries_and_evicted_least_recently_used(store, monkeypatch):
+    monkeypatch.setattr(code_browser, "MAX_CACHED_PAGES", 2)
+    pager = CodePager(store, page_size=50)
+    pager.rows(0, 1)
+    pager.rows(50, 51)
+    pager.rows(0, 1)  # page 0 is now the most recently used
+    assert len(store.queries) == 2
+    pager.rows(100, 101)
+    assert list(pager._pages) == [0, 2]  # page 1 went
+    pager.rows(0, 1)
+    assert len(store.queries) == 3
+    pager.rows(50, 51)
+    assert store.queries[-1] == ("before", 81)  # refetched from the still cached page 0
+
+
+def test_replace_updates_a_cached_row_in_place(store):
+    pager = CodePager(store, page_size=50)
+    pager.rows(0, 50)
+    store.update_code(129, "y = 2\n")
+    pager.replace(store.code_summary(129))
+    assert [row.preview for row in pager.rows(0, 3)] == ["x = 130", "y = 2", "x = 128"]
+    assert len(store.queries) == 1
+
+
+def test_reset_recounts_and_drops_cached_pages(store):
+    pager = CodePager(store, page_size=50)
+    pager.rows(0, 1)
+    store.delete_code(130)
+    pager.reset()
+    assert pager.count == 129
+    assert ids(pager.rows(0, 1)) == [129]
+
+
+@pytest.fixture
+def search_store(tmp_path):
+    store = RecordingStore(str(tmp_path / "search.db"))
+    store.upsert_codes({
+        "tab_1": "import json\n\ndata = json.loads(text)\n",
+        "tab_2": "def parse(text):\n    return text.split()\n",
+        "tab_3": "print('hello')\n",
+        "tab_4": "parser = make_parser()\nparser.parse(source)\n",
+    })
+    yield store
+    store.close()
+
+
+def test_full_text_search_matches_word_prefixes_with_highlighted_snippets(search_store):
+    if not search_store.has_full_text:
+        pytest.skip("SQLite built without FTS5")
+    results = SearchResults(search_store, "pars")
+    assert results.count == 2
+    previews = {row.id: row.preview for row in results.rows(0, 10)}
+    assert f"def {MATCH_START}parse{MATCH_END}(text)" in previews[2]
+    assert f"{MATCH_START}parser{MATCH_END} = make_" in previews[4]
+    assert ids(SearchResults(search_store, "json loads").rows(0, 10)) == [1]  # every word must match
+    assert SearchResults(search_store, "  ").count == 0
+
+
+def test_like_fallback_without_full_text(search_store, monkeypatch):
+    monkeypatch.setattr(search_store, "_has_full_text", False)
+    results = SearchResults(search_store, "text")
+    assert ids(results.rows(0, 10)) == [2, 1]  # newest first
+    assert results.rows(0, 10)[0].preview == "def parse(text):\n    return text.split()"
+
+
+@pytest.mark.parametrize("full_text", [True, False])
+def test_replace_updates_the_edited_match_in_place(search_store, monkeypatch, full_text):
+    if not full_text:
+        monkeypatch.setattr(search_store, "_has_full_text", False)
+    elif not search_store.has_full_text:
+        pytest.skip("SQLite built without FTS5")
+    results = SearchResults(search_store, "parse")
+    before = ids(results.rows(0, 10))
+    search_store.update_code(2, "def parse_all(items):\n    return [parse(item) for item in items]\n")
+    results.replace(search_store.code_summary(2))
+    assert ids(results.rows(0, 10)) == before  # nothing re-ranked or re-run
+    assert search_store.queries == [("search", "parse", None), ("search", "parse", 2)]
+    edited = results.rows(0, 10)[before.index(2)]
+    assert "parse(item)" in edited.preview.replace(MATCH_START, "").replace(MATCH_END, "")
+
+    search_store.update_code(4, "nothing to see\n")  # no longer matches: shows its first lines
+    results.replace(search_store.code_summary(4))
+    assert results.rows(0, 10)[before.index(4)].preview == "nothing to see"
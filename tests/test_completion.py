@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+
+from app.completion import LOADING, MISSING, READY, CompletionService
+
+
+class Completion:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeJedi:
+    """Stands in for the jedi module: completes the names listed in the code, blocking while ``gate`` is clear."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.gate.set()
+        self.completing = threading.Event()
+        self.projects = []
+        self.scripts = []
+
+    def Project(self, path):
+        self.projects.append((path, threading.current_thread().name))
+        return path
+
+    def Script(self, code, path, project):
+        self.scripts.append((code, path, project))
+        jedi = self
+
+        class Script:
+            def complete(self, line, column):
+                jedi.completing.set()
+                assert jedi.gate.wait(5)
+                if code == "boom":
+                    raise ValueError("parse failed")
+                return [Completion(name) for name in code.split()]
+
+        return Script()
+
+
+def wait_for(take, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = take()
+        if value is not None:
+            return value
+        time.sleep(0.005)
+    raise AssertionError("timed out")
+
+
+@pytest.fixture
+def jedi():
+    return FakeJedi()
+
+
+def test_jedi_is_loaded_on_the_completion_thread(jedi):
+    loaded = threading.Event()
+
+    def loader():
+        assert loaded.wait(5)
+        return jedi
+
+    service = CompletionService(loader)
+    assert service.state == LOADING  # the caller did not wait for the import
+    generation = service.submit("alpha beta", "script_1.py", 1, 0)
+    loaded.set()
+    assert wait_for(lambda: service.take_result(generation)) == ["alpha", "beta"]
+    assert service.state == READY
+    assert [thread for _, thread in jedi.projects] == ["completion"]
+    assert jedi.scripts == [("alpha beta", "script_1.py", jedi.projects[0][0])]
+
+
+def test_dunder_names_are_left_out(jedi):
+    service = CompletionService(lambda: jedi)
+    generation = service.submit("__init__ name", "script_1.py", 1, 0)
+    assert wait_for(lambda: service.take_result(generation)) == ["name"]
+    assert service.take_result(generation) is None  # a result is taken once
+
+
+def test_only_the_newest_request_is_answered(jedi):
+    service = CompletionService(lambda: jedi)
+    jedi.gate.clear()
+    first = service.submit("first", "script_1.py", 1, 0)
+    assert jedi.completing.wait(5)
+    second = service.submit("second", "script_1.py", 1, 0)
+    third = service.submit("third", "script_1.py", 1, 0)  # replaces the waiting second one
+    jedi.gate.set()
+    assert wait_for(lambda: service.take_result(third)) == ["third"]
+    assert service.take_result(first) is None and service.take_result(second) is None
+    assert [code for code, _, _ in jedi.scripts] == ["first", "third"]
+
+
+def test_cancelled_request_gets_no_result(jedi):
+    service = CompletionService(lambda: jedi)
+    jedi.gate.clear()
+    generation = service.submit("stale", "script_1.py", 1, 0)
+    assert jedi.completing.wait(5)
+    service.cancel()
+    jedi.gate.set()
+    later = service.submit("fresh", "script_1.py", 1, 0)
+    assert wait_for(lambda: service.take_result(later)) == ["fresh"]
+    assert service.take_result(generation) is None
+
+
+def test_failed_completion_answers_no_names(jedi, capsys):
+    service = CompletionService(lambda: jedi)
+    generation = service.submit("boom", "script_1.py", 1, 0)
+    assert wait_for(lambda: service.take_result(generation)) == []
+    assert "Autocomplete error" in capsys.readouterr().out
+
+
+def test_missing_jedi_answers_no_names_until_reloaded(jedi):
+    installed = []
+    service = CompletionService(lambda: jedi if installed else None)
+    generation = service.submit("name", "script_1.py", 1, 0)
+    assert wait_for(lambda: service.take_result(generation)) == []
+    assert service.state == MISSING
+
+    installed.append(True)
+    service.reload()
+    generation = service.submit("name", "script_1.py", 1, 0)
+    assert wait_for(lambda: service.take_result(generation)) == ["name"]
+    assert service.state == READY
@@ -0,0 +1,31 @@
+from app.completion_index import CompletionIndex, merge_completions
+
+
+def test_prefix_queries_ignore_case_for_order_only():
+    index = CompletionIndex(["value", "Values", "valid", "other", "val"])
+    assert index.complete("val") == ["valid", "value"]
+    assert index.complete("Val") == ["Values"]
+    assert index.complete("x") == []
+
+
+def test_exact_and_dunder_names_are_not_offered():
+    index = CompletionIndex(["name", "__name__", "names"])
+    assert index.complete("name") == ["names"]
+    assert index.complete("_") == []
+
+
+def test_words_are_reference_counted():
+    index = CompletionIndex()
+    index.add("item")
+    index.add("item")
+    index.discard("item")
+    assert index.complete("it") == ["item"]
+    index.discard("item")
+    index.discard("item")  # more discards than adds are ignored
+    assert index.complete("it") == []
+    assert len(index) == 0
+
+
+def test_merge_keeps_the_order_and_drops_duplicates():
+    assert merge_completions(["Alpha", "beta"], ["alpha", "beta", "gamma"], []) == \
+        ["Alpha", "alpha", "beta", "gamma"]
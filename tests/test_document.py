@@ -0,0 +1,72 @@
+import pytest
+
+from app.document import Document
+
+TEXT = "def f():\n    return 1\n\nx = f()"
+
+
+def test_replace_tracks_edits_and_version():
+    document = Document(TEXT)
+    version = document.version
+    document.replace((2, 4), (2, 12), "pass")
+    document.replace((4, 7), (4, 7), "\ny = 2")
+    assert document.snapshot() == "def f():\n    pass\n\nx = f()\ny = 2"
+    assert document.line_count == 5
+    assert document.get_lines(2, 3) == ["    pass", ""]
+    assert document.version == version + 2
+
+
+def test_replace_across_lines():
+    document = Document(TEXT)
+    document.replace((1, 8), (3, 0), " ...")
+    assert document.lines == ["def f(): ...", "x = f()"]
+
+
+@pytest.mark.parametrize("offset", range(len(TEXT) + 1))
+def test_offset_and_position_agree_with_the_snapshot(offset):
+    document = Document(TEXT)
+    line, col = document.position(offset)
+    assert document.offset(line, col) == offset
+    assert "\n".join(document.lines[:line - 1] + [document.lines[line - 1][:col]]) == TEXT[:offset]
+
+
+def test_offsets_follow_edits_before_them():
+    document = Document(TEXT)
+    assert document.offset(4, 0) == 23
+    document.replace((1, 0), (1, 0), "# top\n")
+    assert document.offset(5, 0) == 29
+    assert document.position(29) == (5, 0)
+
+
+@pytest.mark.parametrize("index, position", [
+    ("1.0", (1, 0)),
+    ("2.4", (2, 4)),
+    ("2.99", (2, 12)),  # past the line end: its newline
+    ("2.end", (2, 12)),
+    ("0.5", (1, 0)),
+    ("9.3", (5, 0)),  # past the last line: end
+    ("end", (5, 0)),
+    ("end-1c", (4, 7)),
+    ("end+3c", (5, 0)),
+    ("1.0-1c", (1, 0)),
+    ("1.8+1c", (2, 0)),
+    ("2.0 - 1 chars", (1, 8)),
+    ("2.2+2c-1c", (2, 3)),
+    ("1.0+23c", (4, 0)),
+    ("2.6 linestart", (2, 0)),
+    ("2.0 lineend", (2, 12)),
+    ("end lineend", (5, 0)),
+])
+def test_resolve_clamps_like_tk(index, position):
+    assert Document(TEXT).resolve(index) == position
+
+
+@pytest.mark.parametrize("index", ["insert", "sel.first", "@10,20", "endmark", "1.0 wordstart", "1.0+1 lines"])
+def test_resolve_leaves_the_rest_to_tk(index):
+    assert Document(TEXT).resolve(index) is None
+
+
+def test_resolve_empty_document():
+    document = Document()
+    assert document.resolve("end-1c") == (1, 0)
+    assert document.resolve("1.0+1c") == (2, 0)
@@ -0,0 +1,67 @@
+import tkinter
+
+import pytest
+
+from app.text_widget_monkey_p import install_edit_proxy
+
+# Stands in for a Text widget command: "index" fails like "index sel.first"
+# without a selection, "insert" fails on a bad index, the rest echo.
+FAKE_WIDGET = """
+proc fake {cmd args} {
+    if {$cmd eq "index"} { error "text doesn't contain any characters tagged with \\"sel\\"" }
+    if {$cmd eq "insert" && [lindex $args 0] eq "bad"} { error "bad text index \\"bad\\"" }
+    return "$cmd [join $args ,]"
+}
+"""
+
+
+@pytest.fixture
+def proxied():
+    interp = tkinter.Tcl()
+    interp.eval(FAKE_WIDGET)
+    calls = []
+    install_edit_proxy(interp.tk, "fake", interp.register(lambda *args: calls.append(args)))
+    return interp, calls
+
+
+def test_caught_tcl_error_does_not_stop_mainloop(proxied):
+    interp, calls = proxied
+    with pytest.raises(tkinter.TclError, match="sel"):
+        interp.tk.call("fake", "index", "sel.first")
+    interp.mainloop()  # re-raised the caught error while the proxy was a Python command
+    assert calls == []
+
+
+def test_edits_call_hook_around_the_real_command(proxied):
+    interp, calls = proxied
+    assert interp.tk.call("fake", "insert", "1.0", "a b", "tag") == "insert 1.0,a b,tag"
+    assert interp.tk.call("fake", "delete", "1.0", "end") == "delete 1.0,end"
+    assert calls == [("before", "insert", "1.0", "a b", "tag"), ("after",),
+                     ("before", "delete", "1.0", "end"), ("after",)]
+
+
+def test_other_commands_bypass_hook(proxied):
+    interp, calls = proxied
+    assert interp.tk.call("fake", "tag", "add", "sel", "1.0", "end") == "tag add,sel,1.0,end"
+    assert calls == []
+
+
+def test_failed_edit_raises_to_caller_without_after(proxied):
+    interp, calls = proxied
+    with pytest.raises(tkinter.TclError, match="bad text index"):
+        interp.tk.call("fake", "insert", "bad", "x")
+    interp.mainloop()
+    assert calls == [("before", "insert", "bad", "x")]
+
+
+def test_failing_hook_does_not_stop_mainloop():
+    interp = tkinter.Tcl()
+    interp.eval(FAKE_WIDGET)
+    interp.report_callback_exception = lambda *exc: None
+
+    def hook(*args):
+        raise ValueError("hook failed")
+
+    install_edit_proxy(interp.tk, "fake", interp.register(hook))
+    interp.tk.call("fake", "insert", "1.0", "x")
+    interp.mainloop()
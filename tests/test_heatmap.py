@@ -0,0 +1,12 @@
+from app.heatmap import HEAT_COLORS, heat_levels
+
+
+def test_levels_are_graded_by_share_of_the_costliest_line():
+    top = len(HEAT_COLORS) - 1
+    levels = heat_levels([[1, 1, 10.0], [2, 5, 5.0], [3, 1, 0.1], [4, 1, 0.0]])
+    assert levels == {1: top, 2: len(HEAT_COLORS) // 2, 3: 0, 4: 0}
+
+
+def test_no_cost_at_all():
+    assert heat_levels([[1, 3, 0.0], [2, 1, 0.0]]) == {1: 0, 2: 0}
+    assert heat_levels([]) == {}
@@ -0,0 +1,104 @@
+import random
+from keyword import kwlist
+
+from app.completion_index import CompletionIndex
+from app.document import Document
+from app.highlighter import NORMAL, LineHighlighter, lex_line
+
+KEYWORDS = frozenset(kwlist)
+BUILTINS = frozenset({"print", "len"})
+
+SNIPPETS = ["def f(x):", "    return len(x)", "# note", "s = 'a' + \"b\"", '"""', "'''", "doc text",
+            "print(value)", "", "x = '''inline'''", "    pass"]
+
+
+def lex(line, state=NORMAL):
+    return lex_line(line, state, KEYWORDS, BUILTINS)
+
+
+def test_lex_line_tags():
+    tokens, state = lex("def f(x): return len(x)  # done")
+    assert tokens == [("keyword", 0, 3), ("keyword", 10, 16), ("builtin", 17, 20), ("comment", 25, 31)]
+    assert state == NORMAL
+
+
+def test_strings_hide_what_is_inside():
+    assert lex("s = 'if # x' + \"len\"")[0] == [("string", 4, 12), ("string", 15, 20)]
+    assert lex(r"'it\'s'")[0] == [("string", 0, 7)]
+
+
+def test_triple_quoted_string_spans_lines():
+    assert lex('x = """doc') == ([("string", 4, 10)], '"""')
+    assert lex("still in for", '"""') == ([("string", 0, 12)], '"""')
+    assert lex('end""" if x', '"""') == ([("string", 0, 6), ("keyword", 7, 9)], NORMAL)
+    assert lex("'''", "'''") == ([("string", 0, 3)], NORMAL)
+
+
+def test_other_names_are_collected():
+    names = set()
+    lex_line("for item in items: print(item)", NORMAL, KEYWORDS, BUILTINS, names)
+    assert names == {"item", "items"}
+
+
+def full_lex(lines):
+    state, tokens, ends, names = NORMAL, [], [], set()
+    for line in lines:
+        line_tokens, state = lex_line(line, state, KEYWORDS, BUILTINS, names)
+        tokens.append(line_tokens)
+        ends.append(state)
+    return tokens, ends, names
+
+
+def test_incremental_update_matches_a_full_lex():
+    rng = random.Random(1)
+    document = Document("\n".join(rng.choice(SNIPPETS) for _ in range(40)))
+    index = CompletionIndex()
+    highlighter = LineHighlighter(KEYWORDS, BUILTINS, index)
+
+    def fetch(start, stop):
+        return document.get_lines(start + 1, stop)
+
+    highlighter.update(fetch, document.line_count)
+    for _ in range(300):
+        first = rng.randrange(document.line_count) + 1
+        last = min(document.line_count, first + rng.choice((0, 0, 1, 3)))
+        start = (first, rng.randint(0, len(document.lines[first - 1])))
+        end = (last, rng.randint(0, len(document.lines[last - 1])))
+        if end < start:
+            start, end = end, start
+        chars = "\n".join(rng.choice(SNIPPETS) for _ in range(rng.choice((0, 1, 1, 2))))[:rng.randint(0, 30)]
+        highlighter.replace_lines(start[0] - 1, end[0] - start[0], chars.count("\n"))
+        document.replace(start, end, chars)
+        highlighter.update(fetch, document.line_count)
+
+        tokens, ends, names = full_lex(document.lines)
+        assert highlighter.tokens == tokens
+        assert highlighter.ends == ends
+        assert set(index.complete("")) == names
+
+
+def test_update_stops_once_the_state_converges():
+    lines = ["x = 1"] * 100
+    highlighter = LineHighlighter(KEYWORDS, BUILTINS)
+    fetched = []
+
+    def fetch(start, stop):
+        fetched.append((start, stop))
+        return lines[start:stop]
+
+    highlighter.update(fetch, len(lines))
+    lines[10] = "y = 2"
+    highlighter.replace_lines(10, 0, 0)
+    fetched.clear()
+    assert highlighter.update(lambda start, stop: fetch(start, min(stop, start + 5)), len(lines)) == [10]
+    assert fetched == [(10, 15)]
+
+
+def test_opening_a_string_relexes_below():
+    lines = ["a = 1", "b = 2", "c = 3"]
+    highlighter = LineHighlighter(KEYWORDS, BUILTINS)
+    highlighter.update(lambda start, stop: lines[start:stop], len(lines))
+    lines[0] = 'a = """'
+    highlighter.replace_lines(0, 0, 0)
+    assert highlighter.update(lambda start, stop: lines[start:stop], len(lines)) == [0, 1, 2]
+    assert highlighter.ends == ['"""'] * 3
@@ -0,0 +1,87 @@
+import sys
+
+import pytest
+
+from app.script_runner import read_report, run
+
+WORKLOAD = """\
+def busy(n):
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+for _ in range(3):
+    busy(200_000)
+"""
+
+
+@pytest.fixture
+def run_mode(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    script = str(tmp_path / "script.py")
+
+    def run_mode(mode, code=WORKLOAD):
+        result = tmp_path / f"{mode}.json"
+        assert run(code, script, {"__name__": "__main__", "__file__": script}, mode=mode,
+                   result_path=str(result)) == 0
+        return script, read_report(str(result))
+
+    return run_mode
+
+
+def rows_of(result, script):
+    return {row["function"]: row for row in result["functions"] if row["file"] == script}
+
+
+def test_profile_counts_calls_and_sorts_by_cumulative_time(run_mode):
+    script, result = run_mode("profile")
+    busy = rows_of(result, script)["busy"]
+    assert (busy["line"], busy["calls"]) == (1, 3)
+    assert 0 < busy["self"] <= busy["cumulative"]
+    cumulative = [row["cumulative"] for row in result["functions"]]
+    assert cumulative == sorted(cumulative, reverse=True)
+    assert not any(row["file"].endswith(("script_runner.py", "instruments.py")) for row in result["functions"])
+
+
+def test_sampling_profile_finds_the_busy_function(run_mode):
+    script, result = run_mode("sample")
+    busy = rows_of(result, script)["busy"]
+    assert busy["calls"] is None  # a sampler cannot count calls
+    assert busy["cumulative"] > 0
+
+
+def test_line_heat_counts_every_line_of_the_script(run_mode):
+    script, result = run_mode("lines")
+    lines = {line: (hits, seconds) for line, hits, seconds in result["lines"]}
+    assert result["script"] == script
+    assert lines[9][0] == 3  # busy(200_000)
+    assert lines[4][0] == 600_000
+    assert set(lines) == {1, 2, 3, 4, 5, 8, 9}
+    assert lines[4][1] > 0
+
+
+MEMORY_WORKLOAD = """\
+import json
+
+
+def build(n):
+    return [str(i) * 10 for i in range(n)]
+
+
+kept = build(5_000)
+temporary = json.loads(json.dumps(build(2_000)))
+del temporary
+"""
+
+
+def test_memory_charges_allocations_to_script_lines(run_mode):
+    script, result = run_mode("memory", MEMORY_WORKLOAD)
+    lines = {line: size for line, count, size in result["lines"]}
+    assert result["peak"] >= result["snapshot_size"] > 100_000
+    assert max(lines, key=lines.get) in (5, 8)  # the list built for ``kept``
+    assert lines.get(5, 0) + lines.get(8, 0) > 100_000
+    sizes = [site["size"] for site in result["sites"]]
+    assert sizes == sorted(sizes, reverse=True)
+    assert not any(site["file"].endswith("tracemalloc.py") for site in result["sites"])
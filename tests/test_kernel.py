@@ -0,0 +1,115 @@
+import pytest
+
+from app.kernel import MARKER_ENV, Kernel, KernelPool
+from app.script_runner import read_report
+
+
+@pytest.fixture
+def kernel():
+    kernel = Kernel()
+    yield kernel
+    kernel.close()
+
+
+def run(kernel, code, tmp_path, **kwargs):
+    chunks = []
+    status = kernel.run(code, str(tmp_path / "script.py"), chunks.append, **kwargs)
+    return status, b"".join(chunks).decode()
+
+
+def test_runs_code_and_reports_the_end_of_each_run(kernel, tmp_path):
+    assert run(kernel, "print('hello')\n", tmp_path) == (0, "hello\n")
+    assert run(kernel, "import sys\nsys.exit(4)\n", tmp_path) == (4, "")
+    assert kernel.runs == 2 and kernel.alive
+    assert kernel.peak_rss_kb > 0 and kernel.last_cpu_seconds is not None
+
+
+def test_errors_are_reported_and_the_kernel_lives_on(kernel, tmp_path):
+    report = tmp_path / "error.json"
+    status, output = run(kernel, "x = 1\nundefined_name\n", tmp_path, report_path=str(report))
+    assert status == 1 and "NameError" in output
+    assert read_report(str(report))["lineno"] == 2
+    assert run(kernel, "print(2)\n", tmp_path) == (0, "2\n")
+
+
+def test_script_sees_neither_the_marker_nor_the_worker_args(tmp_path):
+    kernel = Kernel(preload=("json",))
+    try:
+        status, output = run(kernel, f"import os, sys\nprint(sys.argv, {MARKER_ENV!r} in os.environ)\n", tmp_path)
+        assert (status, output) == (0, f"[{str(tmp_path / 'script.py')!r}] False\n")
+    finally:
+        kernel.close()
+
+
+def test_namespace_is_kept_only_when_asked(kernel, tmp_path):
+    run(kernel, "counter = 1\n", tmp_path)
+    assert run(kernel, "counter += 1\nprint(counter)\n", tmp_path, fresh=False) == (0, "2\n")
+    status, output = run(kernel, "print(counter)\n", tmp_path, fresh=True)
+    assert status == 1 and "NameError" in output
+
+
+def test_malformed_end_of_run_line_kills_the_kernel(kernel, tmp_path):
+    code = f"import os, sys\nsys.stdout.flush()\nos.write(1, {kernel.marker!r} + b' garbage\\n')\n"
+    status, _ = run(kernel, code, tmp_path)
+    assert status != 0
+    assert not kernel.alive
+
+
+def test_failing_output_callback_kills_the_kernel(kernel, tmp_path):
+    def on_output(data):
+        raise RuntimeError("buffer gone")
+
+    with pytest.raises(RuntimeError):
+        kernel.run("print('x')\n", str(tmp_path / "script.py"), on_output)
+    assert not kernel.alive
+
+
+def test_dead_kernel_returns_its_exit_code(kernel, tmp_path):
+    status, _ = run(kernel, "import os\nos._exit(7)\n", tmp_path)
+    assert status == 7 and not kernel.alive
+
+
+@pytest.fixture
+def pool():
+    pool = KernelPool(size=1, max_runs=2)
+    yield pool
+    pool.close()
+
+
+def test_pool_hands_out_warm_kernels_and_takes_them_back(pool, tmp_path):
+    kernel = pool.acquire()
+    assert kernel.alive
+    extra = pool.acquire()  # started on demand: the pool only keeps one idle
+    assert extra is not kernel
+    extra.close()
+    run(kernel, "pass\n", tmp_path)
+    pool.release(kernel)
+    assert pool.acquire() is kernel  # most recently used first
+    pool.release(kernel)
+
+
+def test_pool_recycles_worn_and_dead_kernels(pool, tmp_path):
+    kernel = pool.acquire()
+    for _ in range(2):
+        run(kernel, "pass\n", tmp_path)
+    pool.release(kernel)
+    assert not kernel.alive  # max_runs reached
+    replacement = pool.acquire()
+    assert replacement is not kernel and replacement.alive
+
+    run(replacement, "import os\nos._exit(1)\n", tmp_path)
+    pool.release(replacement)
+    fresh = pool.acquire()
+    assert fresh is not replacement and fresh.alive
+    pool.release(fresh)
+
+
+def test_closed_pool_shuts_down_kernels_coming_back(tmp_path):
+    pool = KernelPool(size=1)
+    kernel = pool.acquire()
+    pool.close()
+    assert pool._idle == []
+    run(kernel, "pass\n", tmp_path)
+    pool.release(kernel)
+    assert not kernel.alive
+    assert pool._idle == []  # and nothing started in its place
@@ -0,0 +1,51 @@
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+
+from app.editor_app import RUNNER_PATH
+from app.limits import LIMITS_ENV, RunLimits, exit_reason, popen_options
+from app.script_runner import read_report
+
+posix_only = pytest.mark.skipif(os.name == "nt", reason="rlimits are POSIX only")
+
+
+def run_script(tmp_path, code, limits):
+    script = tmp_path / "script.py"
+    script.write_text(code, encoding="utf-8")
+    report = tmp_path / "script.error.json"
+    process = subprocess.run([sys.executable, RUNNER_PATH, str(script), str(report)],
+                             capture_output=True, timeout=60, **popen_options(limits))
+    return process.returncode, read_report(str(report))
+
+
+def test_popen_options_pass_limits_in_env_without_preexec():
+    options = popen_options(RunLimits(memory_mb=512, cpu_seconds=3), {"PATH": "x", LIMITS_ENV: "stale"})
+    assert "preexec_fn" not in options
+    assert options["env"] == {"PATH": "x", LIMITS_ENV: "512,3"}
+    assert LIMITS_ENV not in popen_options(RunLimits(), {LIMITS_ENV: "stale"})["env"]
+
+
+@posix_only
+def test_memory_limit_is_applied_by_the_runner(tmp_path):
+    limits = RunLimits(memory_mb=300)
+    returncode, error = run_script(tmp_path, "data = bytearray(1024 ** 3)\n", limits)
+    assert returncode == 1
+    assert error["type"] == "MemoryError" and error["lineno"] == 1
+    assert exit_reason(returncode, error, limits) == "memory limit of 300 MB exceeded"
+
+
+@posix_only
+def test_cpu_limit_is_applied_by_the_runner(tmp_path):
+    limits = RunLimits(cpu_seconds=1)
+    returncode, _ = run_script(tmp_path, "while True:\n    pass\n", limits)
+    assert returncode in (-signal.SIGXCPU, -signal.SIGKILL)
+    assert exit_reason(returncode, None, limits) == "CPU time limit of 1 s exceeded"
+
+
+def test_no_limits_by_default(tmp_path):
+    returncode, error = run_script(tmp_path, f"import os\nassert {LIMITS_ENV!r} not in os.environ\n",
+                                   RunLimits())
+    assert (returncode, error) == (0, None)
@@ -0,0 +1,111 @@
+import ast
+import time
+
+from app import linter
+from app.linter import LintService, lint_code
+from app.name_checker import NameChecker
+
+CODE = """\
+import os
+
+
+def load(path):
+    return open(path).read()
+
+
+@decorate
+def save(path, data):
+    with open(path, "w") as handle:
+        handle.write(data)
+
+
+print(missing)
+result = load(os.getcwd())
+"""
+
+
+def names(diagnostics):
+    return [(d.message.split("'")[1], d.lineno, d.col) for d in diagnostics]
+
+
+def test_matches_the_whole_module_check():
+    diagnostics, _ = lint_code(CODE)
+    checker = NameChecker()
+    checker.visit(ast.parse(CODE))
+    assert names(diagnostics) == checker.errors == [("decorate", 8, 1), ("missing", 14, 6)]
+    assert all(not d.syntax and d.end_col == d.col + len(name) for d, (name, _, _) in zip(diagnostics,
+                                                                                          checker.errors))
+
+
+def test_order_across_blocks():
+    diagnostics, _ = lint_code("print(later)\nlater = 1\ndef f():\n    return later\n")
+    assert names(diagnostics) == [("later", 1, 6)]
+
+
+def test_only_changed_blocks_are_walked_again(monkeypatch):
+    _, cache = lint_code(CODE)
+    walked = []
+    analyze = linter._analyze
+    monkeypatch.setattr(linter, "_analyze", lambda stmt, first: walked.append(first) or analyze(stmt, first))
+
+    edited = CODE.replace("return open(path).read()", "return open(path).read(size)")
+    diagnostics, cache = lint_code(edited, cache)
+    assert walked == [4]
+    assert names(diagnostics) == [("size", 5, 27), ("decorate", 8, 1), ("missing", 14, 6)]
+
+    # Blocks moved down by an inserted line are still reused.
+    walked.clear()
+    diagnostics, _ = lint_code("\n" + edited, cache)
+    assert walked == []
+    assert names(diagnostics) == [("size", 6, 27), ("decorate", 9, 1), ("missing", 15, 6)]
+
+
+def test_syntax_error_keeps_the_cache():
+    _, cache = lint_code(CODE)
+    diagnostics, kept = lint_code("def f(:\n    pass\n", cache)
+    assert len(diagnostics) == 1 and diagnostics[0].syntax and diagnostics[0].lineno == 1
+    assert kept is cache
+
+
+def test_star_import_silences_undefined_names():
+    assert lint_code("from os import *\nprint(getcwd())\n")[0] == []
+
+
+def wait_for(service, key, generation):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        diagnostics = service.take_result(key, generation)
+        if diagnostics is not None:
+            return diagnostics
+        assert service.is_current(key, generation)
+        time.sleep(0.01)
+    raise AssertionError("no lint result")
+
+
+def test_service_answers_every_tab():
+    service = LintService()
+    first = service.submit("tab_1", "print(one)\n")
+    second = service.submit("tab_2", "print(two)\n")
+    assert names(wait_for(service, "tab_2", second)) == [("two", 1, 6)]
+    assert names(wait_for(service, "tab_1", first)) == [("one", 1, 6)]
+
+
+def test_service_drops_a_tabs_superseded_request_only():
+    service = LintService()
+    old = service.submit("tab_1", "print(old)\n")
+    other = service.submit("tab_2", "print(other)\n")
+    new = service.submit("tab_1", "print(new)\n")
+    assert not service.is_current("tab_1", old)
+    assert names(wait_for(service, "tab_1", new)) == [("new", 1, 6)]
+    assert names(wait_for(service, "tab_2", other)) == [("other", 1, 6)]
+    assert service.take_result("tab_1", old) is None
+
+
+def test_forgotten_tab_gets_no_result():
+    service = LintService()
+    generation = service.submit("tab_1", "print(x)\n")
+    service.forget("tab_1")
+    assert not service.is_current("tab_1", generation)
+    later = service.submit("tab_2", "y = 1\n")
+    assert wait_for(service, "tab_2", later) == []
+    assert service.take_result("tab_1", generation) is None
@@ -0,0 +1,61 @@
+import ast
+import textwrap
+
+import pytest
+
+from app.name_checker import NameChecker
+
+
+def undefined(code):
+    checker = NameChecker()
+    checker.visit(ast.parse(textwrap.dedent(code)))
+    return [name for name, _, _ in checker.errors]
+
+
+@pytest.mark.parametrize("code", [
+    "x = 1\nprint(x)",
+    "import os.path\nos.getcwd()",
+    "from collections import deque as dq\ndq()",
+    "def f(a, /, b, *args, c, **kw):\n    return a, b, args, c, kw",
+    "def f():\n    return g()\ndef g():\n    return 1",
+    "for i in range(3):\n    print(i)\nelse:\n    print(i)",
+    "with open('f') as handle:\n    handle.read()",
+    "try:\n    pass\nexcept ValueError as error:\n    print(error)",
+    "if (n := 10) > 5:\n    print(n)",
+    "[y for x in range(3) if (y := x)]\nprint(y)",
+    "squares = {x: x * x for x in range(3)}",
+    "def outer():\n    value = 1\n    def inner():\n        nonlocal value\n        value += 1\n    return inner",
+    "def set_it():\n    global later\n    later = 1\ndef use():\n    return later",
+    "class A:\n    size = 1\n    def area(self):\n        return self.size",
+    "point = None\nmatch point:\n    case {'x': x, **rest}:\n        print(x, rest)"
+    "\n    case [first, *others]:\n        print(first, others)\n    case str() as text:\n        print(text)",
+    "from os import *\nprint(getcwd(), anything)",
+    "print(__name__, __file__)",
+    "while True:\n    if done:\n        break\n    done = True",
+    "f = lambda a, b=1: a + b",
+])
+def test_bound_names_are_not_reported(code):
+    assert undefined(code) == []
+
+
+@pytest.mark.parametrize("code, names", [
+    ("print(missing)", ["missing"]),
+    ("x = x + 1", ["x"]),  # read before the binding
+    ("print(later)\nlater = 1", ["later"]),
+    ("def f():\n    return local_of_g\ndef g():\n    local_of_g = 1", ["local_of_g"]),
+    ("class A:\n    size = 1\n    def area(self):\n        return size", ["size"]),  # class bodies are skipped
+    ("[x for x in range(3)]\nprint(x)", ["x"]),  # comprehension variables stay inside
+    ("[x for x in x]", ["x"]),  # the first iterable is read outside
+    ("def f(a=default):\n    pass", ["default"]),  # defaults are read where the def is
+    ("try:\n    pass\nexcept Missing:\n    pass", ["Missing"]),
+    ("lambda: unknown", ["unknown"]),
+    ("a = undefined_one\nb = undefined_two", ["undefined_one", "undefined_two"]),
+])
+def test_unbound_names_are_reported(code, names):
+    assert undefined(code) == names
+
+
+def test_errors_carry_positions_in_order():
+    checker = NameChecker()
+    checker.visit(ast.parse("def f():\n    return b\nprint(a)\n"))
+    assert checker.errors == [("b", 2, 11), ("a", 3, 6)]
@@ -0,0 +1,64 @@
+import threading
+
+from app.output_buffer import OutputRingBuffer
+
+
+def test_drain_returns_what_was_appended_once():
+    buffer = OutputRingBuffer(100)
+    buffer.append(b"hello ")
+    buffer.append(b"world\n")
+    assert buffer.drain() == "hello world\n"
+    assert buffer.drain() == ""
+    assert (buffer.total, buffer.dropped) == (12, 0)
+
+
+def test_keeps_only_the_last_max_bytes():
+    buffer = OutputRingBuffer(10)
+    for chunk in (b"0123", b"4567", b"89ab", b"cdef"):
+        buffer.append(chunk)
+    assert buffer.drain() == "6789abcdef"
+    assert (buffer.total, buffer.dropped) == (16, 6)
+
+
+def test_chunk_larger_than_the_buffer():
+    buffer = OutputRingBuffer(4)
+    buffer.append(b"ab")
+    buffer.append(b"0123456789")
+    assert buffer.drain() == "6789"
+    assert buffer.dropped == 8
+
+
+def test_multibyte_characters_split_across_drains():
+    buffer = OutputRingBuffer(100)
+    data = "é€".encode()
+    buffer.append(data[:1])
+    assert buffer.drain() == ""
+    buffer.append(data[1:4])
+    assert buffer.drain() == "é"
+    buffer.append(data[4:])
+    assert buffer.drain() == "€"
+
+
+def test_truncated_character_is_replaced_once_closed():
+    buffer = OutputRingBuffer(100)
+    buffer.append("€".encode()[:2])
+    buffer.close(1)
+    assert buffer.drain() == "�"
+    assert (buffer.closed, buffer.returncode) == (True, 1)
+
+
+def test_concurrent_appends_are_all_counted():
+    buffer = OutputRingBuffer(1000)
+
+    def write():
+        for _ in range(1000):
+            buffer.append(b"x" * 10)
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert buffer.total == 40_000
+    assert len(buffer.drain()) == 1000
+    assert buffer.dropped == 39_000
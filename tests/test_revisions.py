@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from app.revisions import SNAPSHOT_EVERY, apply_delta, compress_snapshot, make_delta, rebuild
+from app.storage import CodeStore
+
+VERSIONS = [
+    "",
+    "x = 1\n",
+    "x = 1\ny = 2\n",
+    "import os\nx = 1\ny = 2\n",
+    "import os\nx = 10\ny = 2",  # no final newline
+    "\n\n\n",
+    "é = '€'\r\nz = 3\r\n",
+]
+
+
+@pytest.mark.parametrize("old", VERSIONS)
+@pytest.mark.parametrize("new", VERSIONS)
+def test_delta_turns_old_into_new(old, new):
+    assert apply_delta(old, make_delta(old, new)) == new
+
+
+def test_delta_of_a_small_edit_is_small():
+    old = "".join(f"line {i}\n" for i in range(2000))
+    new = old.replace("line 1000\n", "line 1000 changed\n")
+    assert len(make_delta(old, new)) < 100 < len(compress_snapshot(new))
+
+
+def test_rebuild_follows_the_chain_from_a_snapshot():
+    rng = random.Random(3)
+    code = "a\nb\nc\n"
+    chain = [(0, compress_snapshot(code))]
+    for depth in range(1, 30):
+        lines = code.splitlines(keepends=True)
+        lines.insert(rng.randrange(len(lines) + 1), f"line {depth}\n")
+        if rng.random() < 0.3:
+            del lines[rng.randrange(len(lines))]
+        new = "".join(lines)
+        chain.append((depth, make_delta(code, new)))
+        code = new
+        assert rebuild(chain) == code
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CodeStore(str(tmp_path / "app.db"), commit_interval=0)
+    yield store
+    store.close()
+
+
+def test_store_keeps_every_version_with_periodic_snapshots(store):
+    body = "".join(f"print(x, {j} * {j})\n" for j in range(50))
+    codes = [f"x = {i}\n" + body for i in range(SNAPSHOT_EVERY * 2 + 5)]
+    for code in codes:
+        store.upsert_code("tab_1", code)
+    revisions = store.list_revisions("tab_1")[::-1]
+    assert len(revisions) == len(codes)
+    assert [i for i, revision in enumerate(revisions) if revision.is_snapshot] == [0, SNAPSHOT_EVERY,
+                                                                                  2 * SNAPSHOT_EVERY]
+    assert all(revision.size < revisions[0].size for revision in revisions[1:SNAPSHOT_EVERY])
+    assert [store.revision_code(revision.id) for revision in revisions] == codes
+
+
+def test_revisions_of_tabs_do_not_mix(store):
+    for i in range(5):
+        store.upsert_code("tab_1", f"a = {i}\n")
+        store.upsert_code("tab_2", f"b = {i}\n")
+    assert [store.revision_code(revision.id) for revision in store.list_revisions("tab_2")] == \
+        [f"b = {i}\n" for i in reversed(range(5))]
+
+
+def test_restore_records_a_new_revision(store):
+    store.upsert_code("tab_1", "old\n")
+    store.upsert_code("tab_1", "new\n")
+    oldest = store.list_revisions("tab_1")[-1]
+    store.restore_revision(oldest.id)
+    assert store.last_code() == "old\n"
+    assert [store.revision_code(revision.id) for revision in store.list_revisions("tab_1")] == \
+        ["old\n", "new\n", "old\n"]
+
+
+def test_heads_are_read_back_after_reopening(tmp_path):
+    path = str(tmp_path / "app.db")
+    store = CodeStore(path)
+    store.upsert_code("tab_1", "one\n")
+    store.upsert_code("tab_1", "two\n")
+    store.close()
+    store = CodeStore(path)
+    try:
+        store.upsert_code("tab_1", "three\n")
+        assert [store.revision_code(revision.id) for revision in store.list_revisions("tab_1")] == \
+            ["three\n", "two\n", "one\n"]
+        assert [revision.is_snapshot for revision in store.list_revisions("tab_1")] == [False, False, True]
+    finally:
+        store.close()
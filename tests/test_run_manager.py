@@ -0,0 +1,106 @@
+import threading
+import time
+
+from app.output_buffer import OutputRingBuffer
+from app.run_manager import FAILED, FINISHED, QUEUED, RUNNING, STOPPED, Run, RunManager
+from app.storage import RunReport
+
+
+class Gate:
+    """A run target that blocks until released and returns ``exit_code``."""
+
+    def __init__(self, exit_code=0):
+        self.exit_code = exit_code
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, run):
+        self.started.set()
+        assert self.release.wait(5)
+        return self.exit_code
+
+
+def submit(manager, tab_id, target, **kwargs):
+    finished = threading.Event()
+    run = manager.submit(tab_id, target, OutputRingBuffer(1024), on_finished=lambda run: finished.set(), **kwargs)
+    return run, finished
+
+
+def test_runs_past_the_limit_wait_in_order():
+    manager = RunManager(max_parallel=1)
+    first, second = Gate(), Gate(exit_code=1)
+    run1, done1 = submit(manager, "tab_1", first)
+    run2, done2 = submit(manager, "tab_2", second)
+    assert first.started.wait(5)
+    assert (run1.state, run2.state) == (RUNNING, QUEUED)
+
+    first.release.set()
+    assert done1.wait(5) and second.started.wait(5)
+    assert run1.state == FINISHED and run1.exit_code == 0
+    second.release.set()
+    assert done2.wait(5)
+    assert run2.state == FAILED and run2.exit_code == 1
+
+
+def test_one_active_run_per_tab():
+    manager = RunManager()
+    gate = Gate()
+    run, done = submit(manager, "tab_1", gate)
+    assert submit(manager, "tab_1", Gate())[0] is None
+    gate.release.set()
+    assert done.wait(5)
+    assert submit(manager, "tab_1", lambda run: 0)[0] is not None
+
+
+def test_stopping_a_queued_run_finishes_it_without_starting():
+    manager = RunManager(max_parallel=1)
+    gate = Gate()
+    submit(manager, "tab_1", gate)
+    queued, done = submit(manager, "tab_2", Gate())
+    assert manager.stop("tab_2", "stopped by user") is queued
+    assert done.is_set()
+    assert (queued.state, queued.reason, queued.output.closed) == (STOPPED, "stopped by user", True)
+    assert queued.started is None
+    assert manager.stop("tab_2") is None
+    gate.release.set()
+
+
+def test_timeout_stops_the_run():
+    manager = RunManager()
+    gate = Gate()
+    run, done = submit(manager, "tab_1", gate, timeout=0.05)
+    assert gate.started.wait(5)
+    deadline = time.monotonic() + 5
+    while run.state != STOPPED and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert run.state == STOPPED and run.reason == "wall-clock timeout of 0.05 s"
+    gate.release.set()
+    assert done.wait(5)
+    assert run.state == STOPPED
+
+
+def test_stop_all_leaves_nothing_active():
+    manager = RunManager(max_parallel=1)
+    gates = [Gate() for _ in range(3)]
+    for i, gate in enumerate(gates):
+        submit(manager, f"tab_{i}", gate)
+    manager.stop_all()
+    assert manager.active_runs() == []
+    for gate in gates:
+        gate.release.set()
+
+
+def test_summary_line():
+    buffer = OutputRingBuffer(1 << 20)
+    buffer.append(b"x" * 2048)
+    run = Run("tab_1", None, buffer)
+    run.started, run.finished = 100.0, 101.5
+    run.exit_code, run.cpu_seconds, run.peak_rss_kb = 0, 1.25, 30 * 1024
+    assert run.summary() == "[exit 0 | wall 1.50 s | cpu 1.25 s | peak RSS 30.0 MB | output 2.0 KB]"
+    previous = RunReport(1, None, "tab_1", "", 0, 2.0, None, None, 0, 0, None)
+    assert run.summary(previous).startswith("[exit 0 | wall 1.50 s (-25% vs last run) | cpu")
+
+
+def test_summary_of_a_run_that_never_started():
+    run = Run("tab_1", None, OutputRingBuffer(16))
+    assert run.summary() == "[exit - | wall 0.00 s | output 0 B]"
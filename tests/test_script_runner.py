@@ -0,0 +1,69 @@
+import subprocess
+import sys
+
+import pytest
+
+from app.editor_app import RUNNER_PATH
+from app.script_runner import read_report, run
+
+
+@pytest.fixture
+def run_code(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "path", list(sys.path))  # run() points sys.path[0] at the script's folder
+
+    def run_code(code):
+        script = str(tmp_path / "script.py")
+        report = tmp_path / "script.error.json"
+        if report.exists():
+            report.unlink()
+        status = run(code, script, {"__name__": "__main__", "__file__": script}, str(report))
+        return status, read_report(str(report))
+
+    return run_code
+
+
+def test_success_writes_no_report(run_code):
+    assert run_code("x = 1\n") == (0, None)
+
+
+def test_error_line_is_the_scripts_innermost_frame(run_code, capsys):
+    status, error = run_code("def f():\n    return missing\n\nf()\n")
+    assert status == 1
+    assert error == {"type": "NameError", "message": "name 'missing' is not defined", "lineno": 2, "module": None}
+    assert "Traceback" in capsys.readouterr().err
+
+
+def test_error_inside_a_library_points_at_the_calling_line(run_code):
+    _, error = run_code("import json\n\njson.loads('{')\n")
+    assert (error["type"], error["lineno"]) == ("JSONDecodeError", 3)
+
+
+def test_syntax_error_line(run_code):
+    _, error = run_code("x = 1\ny = (\n")
+    assert (error["type"], error["lineno"]) == ("SyntaxError", 2)
+
+
+def test_missing_module_is_named(run_code):
+    _, error = run_code("import no_such_module_here\n")
+    assert (error["type"], error["module"], error["lineno"]) == ("ModuleNotFoundError", "no_such_module_here", 1)
+
+
+@pytest.mark.parametrize("code, status", [
+    ("raise SystemExit", 0),
+    ("raise SystemExit(3)", 3),
+    ("import sys\nsys.exit('bye')", 1),
+])
+def test_system_exit_is_an_exit_status_not_an_error(run_code, code, status):
+    assert run_code(code) == (status, None)
+
+
+def test_users_modules_named_like_the_runners_own(tmp_path):
+    (tmp_path / "instruments.py").write_text("MINE = 'instruments'\n", encoding="utf-8")
+    (tmp_path / "limits.py").write_text("MINE = 'limits'\n", encoding="utf-8")
+    script = tmp_path / "script.py"
+    script.write_text("import instruments, limits\nprint(instruments.MINE, limits.MINE)\n", encoding="utf-8")
+    result = tmp_path / "result.json"
+    process = subprocess.run([sys.executable, RUNNER_PATH, str(script), str(tmp_path / "error.json"),
+                              "lines", str(result)], capture_output=True, text=True, timeout=60)
+    assert (process.returncode, process.stdout) == (0, "instruments limits\n")
+    assert read_report(str(result))["lines"]  # the runner's own instruments still ran
@@ -0,0 +1,188 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app import storage
+from app.storage import MIGRATIONS, CodeStore, content_hash
+
+
+def legacy_db(path, rows):
+    """An app.db as the editor wrote it before migrations: ISO text timestamps, no user_version."""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE codes (id INTEGER PRIMARY KEY AUTOINCREMENT, tab_id TEXT, timestamp TEXT, code TEXT)")
+    conn.executemany("INSERT INTO codes (tab_id, timestamp, code) VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def user_version(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CodeStore(str(tmp_path / "app.db"), commit_interval=0)
+    yield store
+    store.close()
+
+
+def test_new_database_gets_every_migration(tmp_path, store):
+    assert user_version(store.path) == len(MIGRATIONS)
+    assert store.count_codes() == 0
+
+
+def test_legacy_rows_are_migrated(tmp_path):
+    path = str(tmp_path / "app.db")
+    legacy_db(path, [("tab_1", "2024-01-02T03:04:05.123456", "print('a')\n"),
+                     ("tab_2", "not a date", "import os\n")])
+    store = CodeStore(path)
+    try:
+        first, second = store.get_code(1), store.get_code(2)
+        assert (first.tab_id, first.code) == ("tab_1", "print('a')\n")
+        assert isinstance(first.timestamp, int) and first.timestamp > 0
+        assert second.timestamp == 0
+        hashes = store._conn.execute("SELECT code_hash FROM codes ORDER BY id").fetchall()
+        assert hashes == [(content_hash("print('a')\n"),), (content_hash("import os\n"),)]
+        # Saved codes become each tab's first revision.
+        assert [revision.is_snapshot for revision in store.list_revisions("tab_1")] == [True]
+        assert store.revision_code(store.list_revisions("tab_2")[0].id) == "import os\n"
+        if store.has_full_text:
+            assert [summary.id for summary in store.search_codes("os")] == [2]
+        indexes = {row[0] for row in store._conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_codes_tab_id", "idx_revisions_tab_id", "idx_runs_tab_id"} <= indexes
+    finally:
+        store.close()
+    assert user_version(path) == len(MIGRATIONS)
+
+
+def test_reopening_runs_nothing_again(tmp_path):
+    path = str(tmp_path / "app.db")
+    CodeStore(path).close()
+    store = CodeStore(path)
+    try:
+        store.upsert_code("tab_1", "x = 1\n")
+    finally:
+        store.close()
+    store = CodeStore(path)
+    try:
+        assert store.last_code() == "x = 1\n"
+        assert len(store.list_revisions("tab_1")) == 1
+    finally:
+        store.close()
+
+
+def test_failed_migration_is_rolled_back(tmp_path, monkeypatch):
+    path = str(tmp_path / "app.db")
+    legacy_db(path, [("tab_1", "2024-01-02T03:04:05", "x = 1\n")])
+
+    def broken(conn):
+        conn.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("migration failed")
+
+    monkeypatch.setattr(storage, "MIGRATIONS", MIGRATIONS[:2] + [broken])
+    with pytest.raises(RuntimeError):
+        CodeStore(path)
+    assert user_version(path) == 2
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+        assert conn.execute("SELECT timestamp FROM codes").fetchone()[0] > 0
+    finally:
+        conn.close()
+
+
+def test_unchanged_code_is_not_saved_again(store):
+    assert store.upsert_code("tab_1", "x = 1\n")
+    assert not store.upsert_code("tab_1", "x = 1\n")
+    assert store.upsert_codes({"tab_1": "x = 2\n", "tab_2": "y = 1\n"}) == ["tab_1", "tab_2"]
+    assert store.count_codes() == 2
+    assert store.last_code() == "y = 1\n"
+
+
+def test_next_tab_number_is_above_every_saved_tab(store):
+    assert store.next_tab_number() == 1
+    store.upsert_code("tab_7", "x = 1\n")
+    store.upsert_code("scratch", "y = 1\n")
+    assert store.next_tab_number() == 8
+    for i in range(10):
+        store.upsert_code(f"other_{i}", "")
+    assert store.next_tab_number() == 13  # above the highest code id
+
+
+def test_runs_link_to_the_saved_code_they_ran(store):
+    code = "print('hi')\n\n"  # as the tab holds it; saved stripped
+    store.upsert_code("tab_1", code.strip())
+    store.add_run("tab_1", code, 0.5, 0.25, 2048, 3, 0)
+    store.add_run("tab_1", code + "x = 1\n", 0.75, None, None, 0, 1, "stopped")
+    code_id = store.get_code(1).id
+    saved_hash = store._conn.execute("SELECT code_hash FROM codes WHERE id = ?", (code_id,)).fetchone()[0]
+
+    first, second = reversed(store.list_runs(code_id))
+    assert first.code_hash == saved_hash != second.code_hash
+    assert (first.tab_id, first.wall_seconds, first.cpu_seconds, first.peak_rss_kb, first.output_bytes,
+            first.exit_code, first.reason) == ("tab_1", 0.5, 0.25, 2048, 3, 0, None)
+    assert store.last_run("tab_1") == second
+    assert (second.cpu_seconds, second.exit_code, second.reason) == (None, 1, "stopped")
+
+
+def test_runs_without_saved_code(store):
+    assert store.last_run("tab_9") is None
+    store.add_run("tab_9", "pass", 0.1, None, None, 0, 0)
+    assert store.last_run("tab_9").code_id is None
+
+
+def test_deleting_a_code_deletes_its_runs(store):
+    store.upsert_code("tab_1", "x = 1")
+    store.add_run("tab_1", "x = 1", 0.1, None, None, 0, 0)
+    store.delete_code(1)
+    assert store.list_runs(1) == [] and store.last_run("tab_1") is None
+
+
+def saved_code(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT code FROM codes").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_flush_without_waiting_leaves_a_busy_store_alone(tmp_path):
+    store = CodeStore(str(tmp_path / "app.db"), commit_interval=3600)
+    try:
+        store.upsert_code("tab_1", "x = 1\n")  # first write commits
+        store.upsert_code("tab_1", "x = 2\n")  # this one waits for a flush
+        holding, done = threading.Event(), threading.Event()
+
+        def writer():
+            with store._lock:
+                holding.set()
+                assert done.wait(5)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        assert holding.wait(5)
+        store.flush(wait=False)  # returns instead of waiting for the writer
+        done.set()
+        thread.join(5)
+        assert saved_code(store.path) == "x = 1\n"
+        store.flush(wait=False)
+        assert saved_code(store.path) == "x = 2\n"
+        assert not store._dirty
+    finally:
+        store.close()
+
+
+def test_flush_of_a_clean_store_takes_no_lock(tmp_path, monkeypatch):
+    store = CodeStore(str(tmp_path / "app.db"))
+    try:
+        monkeypatch.setattr(store, "_lock", None)  # any use of it would raise
+        store.flush()
+        store.flush(wait=False)
+    finally:
+        monkeypatch.undo()
+        store.close()
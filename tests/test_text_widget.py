@@ -0,0 +1,165 @@
+import tkinter
+
+import pytest
+
+from app.document import Document
+from app.text_widget_monkey_p import PatchedText
+
+
+class FakeText:
+    """Enough of a Text widget to run PatchedText's bulk-edit methods without a display.
+
+    The text lives in a Document, as PatchedText keeps it; what would reach
+    Tk (undo separators, scheduled highlighting, marks and tags) is logged.
+    """
+
+    bulk_edit = PatchedText.bulk_edit
+    rewrite_lines = PatchedText.rewrite_lines
+    after_colorify = PatchedText.after_colorify
+    get_document = PatchedText.get_document
+
+    def __init__(self, text, insert="1.0", sel=None):
+        self._document = Document(text)
+        self._document_stale = False
+        self._bulk_depth = 0
+        self._colorify_after_id = None
+        self.autoseparators = True
+        self.log = []
+        self.marks = {"insert": insert}
+        if sel:
+            self.marks["sel.first"], self.marks["sel.last"] = sel
+
+    def _position(self, index):
+        if index not in self.marks:
+            raise tkinter.TclError(f'text doesn\'t contain any characters tagged with "{index}"')
+        line, col = self.marks[index].split(".")
+        return int(line), int(col)
+
+    def cget(self, option):
+        return getattr(self, option)
+
+    def configure(self, autoseparators):
+        self.autoseparators = autoseparators
+
+    def edit_separator(self):
+        self.log.append(("separator", self.autoseparators))
+
+    def replace(self, start, end, chars):
+        self.log.append(("replace", start, end, chars))
+        self._document.replace(self._document.resolve(start), self._document.resolve(end), chars)
+        self.after_colorify()  # as every edit of a PatchedText does
+
+    def colorify(self):
+        pass
+
+    def after(self, delay, callback):
+        self.log.append(("after", delay))
+        return f"after#{len(self.log)}"
+
+    def after_cancel(self, after_id):
+        self.log.append(("after_cancel", after_id))
+
+    def mark_set(self, name, index):
+        self.marks[name] = index
+
+    def tag_add(self, tag, first, last):
+        self.log.append(("tag add", tag, first, last))
+
+
+CODE = "def f():\n    x = 1\n    return x\n"
+
+
+def test_bulk_edit_is_one_undo_step_and_one_highlighting_pass():
+    text = FakeText(CODE)
+    with text.bulk_edit():
+        text.replace("2.4", "2.5", "y")
+        with text.bulk_edit():  # nested blocks belong to the outer one
+            text.replace("3.11", "3.12", "y")
+        assert text.log[-1][0] == "replace"  # no separator and no highlighting yet
+    assert text.log == [("separator", False), ("replace", "2.4", "2.5", "y"), ("replace", "3.11", "3.12", "y"),
+                        ("separator", False), ("after", 100)]
+    assert text.autoseparators is True
+    assert text.get_document().snapshot() == "def f():\n    y = 1\n    return y\n"
+
+
+def test_bulk_edit_that_fails_still_ends_the_undo_step():
+    text = FakeText(CODE)
+    with pytest.raises(ValueError):
+        with text.bulk_edit():
+            text.replace("1.0", "1.3", "async def")
+            raise ValueError("rewrite failed")
+    assert text.log[-2:] == [("separator", False), ("after", 100)]
+    assert text.autoseparators is True and text._bulk_depth == 0
+
+
+def test_edits_outside_a_bulk_edit_reschedule_highlighting_each_time():
+    text = FakeText(CODE)
+    text.replace("1.0", "1.0", "#")
+    text.replace("1.0", "1.1", "")
+    assert [entry for entry in text.log if entry[0] != "replace"] == [("after", 100), ("after_cancel", "after#2"),
+                                                                      ("after", 100)]
+
+
+def test_rewrite_lines_is_a_single_replace():
+    text = FakeText(CODE)
+    text.rewrite_lines(2, 3, lambda line: "#" + line)
+    assert text.get_document().snapshot() == "def f():\n#    x = 1\n#    return x\n"
+    assert [entry for entry in text.log if entry[0] == "replace"] == [("replace", "2.0", "3.end",
+                                                                       "#    x = 1\n#    return x")]
+
+
+def test_rewrite_lines_that_changes_nothing_does_not_edit():
+    text = FakeText(CODE)
+    text.rewrite_lines(1, 3, lambda line: line.replace("#", "", 1))
+    assert text.log == []
+
+
+@pytest.mark.parametrize("insert, expected", [
+    ("2.9", "2.10"),  # inside a rewritten line: moves with its character
+    ("2.0", "2.0"),  # at a line start: stays there
+    ("1.3", "1.3"),  # outside the rewritten lines
+    ("4.0", "4.0"),
+])
+def test_rewrite_lines_keeps_the_cursor_on_its_character(insert, expected):
+    text = FakeText(CODE, insert=insert)
+    text.rewrite_lines(2, 3, lambda line: "#" + line)
+    assert text.marks["insert"] == expected
+
+
+def test_rewrite_lines_clamps_the_cursor_to_a_shortened_line():
+    text = FakeText(CODE, insert="2.2")
+    text.rewrite_lines(2, 3, lambda line: line.lstrip())
+    assert text.get_document().get_lines(2, 3) == ["x = 1", "return x"]
+    assert text.marks["insert"] == "2.0"
+
+
+def test_rewrite_lines_keeps_the_selection():
+    text = FakeText(CODE, insert="3.12", sel=("2.0", "3.12"))
+    text.rewrite_lines(2, 3, lambda line: "    " + line)
+    assert text.marks["insert"] == "3.16"
+    assert text.log[-1] == ("tag add", "sel", "2.0", "3.16")
+
+
+@pytest.fixture
+def widget():
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError:
+        pytest.skip("needs a display")
+    root.withdraw()
+    widget = PatchedText(root, undo=True)
+    yield widget
+    root.destroy()
+
+
+def test_rewrite_lines_is_undone_in_one_step(widget):
+    widget.insert("1.0", CODE)
+    widget.edit_reset()
+    widget.mark_set("insert", "2.9")
+    widget.rewrite_lines(1, 3, lambda line: "    " + line)
+    assert widget.get("1.0", "end-1c") == "    def f():\n        x = 1\n        return x\n"
+    assert widget.index("insert") == "2.13"
+    widget.edit_undo()
+    assert widget.get("1.0", "end-1c") == CODE
+    with pytest.raises(tkinter.TclError):
+        widget.edit_undo()  # nothing left: the rewrite was one step
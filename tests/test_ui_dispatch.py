@@ -0,0 +1,82 @@
+import time
+
+from app.output_buffer import OutputRingBuffer
+from app.ui_dispatch import UiDispatcher
+
+
+class FakeRoot:
+    """Records the pump's after() calls instead of running a Tk event loop."""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, func):
+        self.scheduled.append(ms)
+        return len(self.scheduled)
+
+    def after_cancel(self, after_id):
+        pass
+
+
+class FakeText:
+    def __init__(self, exists=True, delay=0.0):
+        self.text = ""
+        self.exists = exists
+        self.delay = delay
+
+    def winfo_exists(self):
+        return self.exists
+
+    def insert(self, index, text):
+        time.sleep(self.delay)
+        self.text += text
+
+    def see(self, index):
+        pass
+
+
+def closed_buffer(data):
+    buffer = OutputRingBuffer(1 << 20)
+    buffer.append(data)
+    buffer.close(0)
+    return buffer
+
+
+def test_stream_output_comes_before_later_messages():
+    dispatcher = UiDispatcher(FakeRoot())
+    widget = FakeText()
+    dispatcher.stream(closed_buffer(b"output\n"), widget)
+    dispatcher.call(lambda: widget.insert("end", "finished\n"))
+    dispatcher._pump()
+    assert widget.text == "output\nfinished\n"
+    dispatcher._pump()  # the buffer is seen empty and dropped
+    assert not dispatcher.busy
+
+
+def test_failing_stream_is_dropped_and_the_pump_goes_on():
+    dispatcher = UiDispatcher(FakeRoot())
+    broken, widget = FakeText(), FakeText()
+    broken.insert = None  # calling it raises TypeError
+    dispatcher.stream(closed_buffer(b"lost"), broken)
+    dispatcher.stream(closed_buffer(b"kept"), widget)
+    dispatcher.append(widget, "!")
+    dispatcher._pump()
+    assert widget.text == "kept!"
+    dispatcher._pump()
+    assert not dispatcher.busy
+
+
+def test_streams_over_budget_wait_for_the_next_tick():
+    root = FakeRoot()
+    dispatcher = UiDispatcher(root, budget_ms=1)
+    slow, other = FakeText(delay=0.005), FakeText()
+    dispatcher.stream(closed_buffer(b"slow"), slow)
+    dispatcher.stream(closed_buffer(b"other"), other)
+    dispatcher.append(other, "!")
+
+    dispatcher._pump()
+    assert (slow.text, other.text) == ("slow", "")
+    assert root.scheduled[-1] == 1  # back right away
+
+    dispatcher._pump()
+    assert other.text == "other!"